@@ -1,5 +1,8 @@
 from flask import Flask, jsonify, request
 from config import Config, init_db
+from serialization import FastJSONProvider
+from services.query_monitor import init_query_monitoring
+from services.metrics import init_metrics
 import os
 from dotenv import load_dotenv
 
@@ -9,14 +12,22 @@ from routes.internship_routes import internship_bp
 from routes.analytics_routes import analytics_bp
 from routes.resume_routes import resume_bp
 from routes.allocation_routes import allocation_bp
+from routes.application_routes import application_bp
 
 # Load environment variables
 load_dotenv()
 
-def create_app():
+def create_app(config_object=Config):
     """Application factory function: Initializes app, configures DB, and registers routes."""
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
+    # Faster JSON encoding (orjson when available) that also understands ObjectId/datetime
+    app.json = FastJSONProvider(app)
+
+    # Per-request DB query counting / N+1 detection; must be installed before connecting
+    init_query_monitoring(app)
+    # Prometheus request/Gemini/Mongo metrics served at /metrics; also before connecting
+    init_metrics(app)
 
     # Initialize the MongoDB connection within the app context
     with app.app_context():
@@ -31,6 +42,7 @@ def create_app():
     app.register_blueprint(analytics_bp)
     app.register_blueprint(resume_bp)
     app.register_blueprint(allocation_bp)
+    app.register_blueprint(application_bp)
 
     # --- Root Route ---
     @app.route('/')
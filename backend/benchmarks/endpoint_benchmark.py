@@ -0,0 +1,246 @@
+"""
+End-to-end endpoint benchmark: boots create_app() on a local port against a
+local mongod (or an in-memory mongomock stand-in) and a fake Gemini server,
+then drives the main endpoints at a fixed concurrency and reports throughput
+and latency percentiles per endpoint.
+
+    python -m benchmarks.endpoint_benchmark --mock --requests 500 --concurrency 16
+    python -m benchmarks.endpoint_benchmark --mongo-uri mongodb://localhost:27017/internx_benchmark \\
+        --gemini-latency-ms 800 --gemini-error-rate 0.02 --output results.json
+
+Results are printed (or written with --output) as JSON, so runs on two commits
+can be diffed. The benchmark seeds and afterwards drops its own database; never
+point --mongo-uri at a database holding real data.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gemini import FakeGeminiServer
+
+ENDPOINTS = ('internships', 'preferences', 'resume_analyze', 'recommend')
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return None
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * pct / 100))]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def seed_dataset(n_users, n_internships, seed):
+    """Loads a synthetic dataset (see seed.py) and returns the user ids as strings."""
+    from models import User, Preferences, Internship, ResumeAnalysis
+    from seed import build_user_docs, build_internship_docs
+
+    rng = random.Random(seed)
+    users, preferences, analyses = build_user_docs(rng, seed, 0, n_users, password_hash='benchmark')
+    User._get_collection().insert_many(users)
+    Preferences._get_collection().insert_many(preferences)
+    if analyses:
+        ResumeAnalysis._get_collection().insert_many(analyses)
+    Internship._get_collection().insert_many(build_internship_docs(rng, seed, 0, n_internships))
+    return [str(user['_id']) for user in users]
+
+
+def request_builders(user_ids):
+    """Maps endpoint name -> fn(rng, i) returning (method, path, json body or None)."""
+    from seed import ROLES, LOCATIONS
+
+    def internships(rng, i):
+        skill = rng.choice(rng.choice(ROLES)[1])
+        if rng.random() < 0.5:
+            return 'GET', f"/api/internships?limit=50&skills={skill}", None
+        return 'GET', "/api/internships?limit=50", None
+
+    def preferences(rng, i):
+        pool = rng.choice(ROLES)[1]
+        return 'POST', "/api/internships/preferences", {
+            "userId": rng.choice(user_ids),
+            "skills": rng.sample(pool, min(3, len(pool))),
+            "location": rng.choice(LOCATIONS)
+        }
+
+    def resume_analyze(rng, i):
+        # Unique text per request so the resume cache does not absorb the Gemini round trip
+        pool = rng.choice(ROLES)[1]
+        return 'POST', "/api/resume/analyze", {
+            "userId": rng.choice(user_ids),
+            "resumeText": f"Candidate #{i}. Built projects using {', '.join(rng.sample(pool, min(4, len(pool))))}."
+        }
+
+    def recommend(rng, i):
+        return 'POST', "/api/allocation/recommend", {"userId": rng.choice(user_ids)}
+
+    return {"internships": internships, "preferences": preferences,
+            "resume_analyze": resume_analyze, "recommend": recommend}
+
+
+def drive(base_url, build, total, concurrency, seed):
+    """Issues total requests from concurrency threads; returns the endpoint's result dict."""
+    local = threading.local()
+    latencies, statuses, errors = [], Counter(), Counter()
+    lock = threading.Lock()
+
+    def one(i):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        method, path, body = build(random.Random(f"{seed}:{i}"), i)
+        started = time.perf_counter()
+        try:
+            response = local.session.request(method, base_url + path, json=body, timeout=120)
+            response.content
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            status = None
+            with lock:
+                errors[type(e).__name__] += 1
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[str(status)] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(total / wall, 1) if wall > 0 else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p90": ms(percentile(latencies, 90)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "status_codes": dict(statuses),
+        "client_errors": dict(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mock', action='store_true', help="Use an in-memory mongomock database instead of mongod")
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/internx_benchmark',
+                        help="Dedicated benchmark database (dropped afterwards)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--internships', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+    parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help=f"Comma-separated subset of {ENDPOINTS}")
+    parser.add_argument('--gemini-latency-ms', type=float, default=300)
+    parser.add_argument('--gemini-jitter-ms', type=float, default=50)
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep-data', action='store_true', help="Do not drop the benchmark database afterwards")
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    if args.mock:
+        try:
+            import mongomock
+        except ImportError:
+            parser.error("--mock needs mongomock: pip install mongomock")
+
+    fake_gemini = FakeGeminiServer(latency_ms=args.gemini_latency_ms, jitter_ms=args.gemini_jitter_ms,
+                                   error_rate=args.gemini_error_rate, seed=args.seed).start()
+    # The Gemini client reads its configuration at import time, so set it before importing the app
+    os.environ['GEMINI_BASE_URL'] = fake_gemini.base_url
+    os.environ['GEMINI_API_KEY'] = 'benchmark'
+
+    from mongoengine import get_db
+    from werkzeug.serving import make_server
+    from app import create_app
+    from config import Config
+
+    class BenchmarkConfig(Config):
+        DEBUG = False
+        MONGO_URI = args.mongo_uri
+        if args.mock:
+            MONGO_SETTINGS = {'mongo_client_class': mongomock.MongoClient}
+
+    app = create_app(BenchmarkConfig)
+    db = get_db()
+    for name in ('users', 'preferences', 'internships', 'resume_analysis'):
+        db.drop_collection(name)
+
+    seeding_started = time.perf_counter()
+    user_ids = seed_dataset(args.users, args.internships, args.seed)
+    seeding_seconds = time.perf_counter() - seeding_started
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-app', daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    builders = request_builders(user_ids)
+    results = {}
+    try:
+        for name in endpoints:
+            if args.warmup:
+                drive(base_url, builders[name], args.warmup, args.concurrency, f"warmup:{args.seed}")
+            results[name] = drive(base_url, builders[name], args.requests, args.concurrency, args.seed)
+            print(f"{name}: {results[name]['throughput_rps']} req/s, p99 {results[name]['latency_ms']['p99']} ms",
+                  file=sys.stderr)
+    finally:
+        server.shutdown()
+        fake_gemini.stop()
+        if not args.keep_data:
+            db.client.drop_database(db.name)
+
+    from services.gemini_client import gemini_client
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "config": {
+            "database": "mongomock" if args.mock else args.mongo_uri,
+            "users": args.users,
+            "internships": args.internships,
+            "requests_per_endpoint": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "seeding_seconds": round(seeding_seconds, 3),
+        "fake_gemini": fake_gemini.stats(),
+        "gemini_client": gemini_client.stats(),
+        "endpoints": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
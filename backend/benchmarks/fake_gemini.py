@@ -0,0 +1,238 @@
+"""
+Local stand-in for the Gemini REST API, for benchmarks and manual testing.
+
+    python -m benchmarks.fake_gemini --port 8089 --latency-ms 800 --error-rate 0.02
+
+Point the backend at it with GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta and
+any non-empty GEMINI_API_KEY. POST .../models/<model>:generateContent answers
+with a schema-shaped JSON document after the configured latency, and
+:streamGenerateContent?alt=sse streams the same document as Server-Sent Events
+in small text chunks (the first after a fifth of the latency, the rest spread
+over the remainder, like a model emitting tokens): a
+recommendation response when the request's responseSchema has a
+"recommendations" property (listing numbers or ids are taken from the prompt), a
+resume analysis otherwise. A fraction of calls (--error-rate) fail with 503 so
+client retries are exercised too; cut_after_chunks drops streams after that many
+chunks, without a finishReason, like a connection lost mid-response.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OBJECT_ID_RE = re.compile(r'"id": "([0-9a-f]{24})"')
+# Listing rows of the compact recommendation prompt (services.prompt_builder): "<number>|title|..."
+LISTING_RE = re.compile(r'^(\d+)\|', re.MULTILINE)
+OVERLOADED = {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}
+SKILL_WORDS = ["Python", "SQL", "React", "Flask", "MongoDB", "Docker", "AWS", "Machine Learning", "Communication"]
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) reported in usageMetadata."""
+    return max(1, len(text) // 4)
+
+
+def fake_recommendations(prompt, rng):
+    ids = list(dict.fromkeys(LISTING_RE.findall(prompt) or OBJECT_ID_RE.findall(prompt)))
+    if not ids:
+        ids = ["0" * 24]
+    return {
+        "recommendations": [{
+            "internshipId": internship_id,
+            "matchScore": round(rng.uniform(60, 98), 1),
+            "reasoning": "Strong overlap between the candidate's skills and the listing's requirements.",
+            "preparationMaterials": ["Review core data structures", "Prepare a project walkthrough"]
+        } for internship_id in ids[:3]]
+    }
+
+
+def fake_resume_analysis(prompt, rng):
+    skills = [s for s in SKILL_WORDS if s.lower() in prompt.lower()] or rng.sample(SKILL_WORDS, 3)
+    return {
+        "summary": "Motivated student with hands-on project experience. Eager to apply their skills in an internship.",
+        "skills_extracted": skills,
+        "market_readiness_score": rng.randint(40, 95)
+    }
+
+
+class FakeGeminiServer:
+    """
+    Threaded HTTP server emulating :generateContent and :streamGenerateContent with configurable latency
+    (latency_ms +/- jitter_ms) and error rate. Use as a context manager or
+    call start()/stop(); base_url is what GEMINI_BASE_URL should be set to.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=42,
+                 stream_chunk_chars=40, cut_after_chunks=None):
+        self.latency_ms = latency_ms
+        self.stream_chunk_chars = stream_chunk_chars
+        self.cut_after_chunks = cut_after_chunks
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def _draw(self):
+        """Returns (delay_seconds, fail, rng) for one request."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail, random.Random(self._rng.random())
+
+    def _generate(self, body, rng):
+        """Returns (response text, usageMetadata) for a decoded request body."""
+        prompt = "".join(part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', []))
+        schema = body.get('generationConfig', {}).get('responseSchema') or {}
+        if 'recommendations' in schema.get('properties', {}):
+            result = fake_recommendations(prompt, rng)
+        else:
+            result = fake_resume_analysis(prompt, rng)
+        text = json.dumps(result)
+        prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        return text, {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens
+        }
+
+    def respond(self, body):
+        """Builds the generateContent response for a decoded request body."""
+        delay, fail, rng = self._draw()
+        time.sleep(delay)
+        if fail:
+            return 503, OVERLOADED
+        text, usage = self._generate(body, rng)
+        return 200, {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+            "usageMetadata": usage
+        }
+
+    def respond_stream(self, body):
+        """
+        Returns (status, error payload or None, chunks) for streamGenerateContent;
+        chunks yields (seconds to wait, response chunk) pairs.
+        """
+        delay, fail, rng = self._draw()
+        if fail:
+            time.sleep(delay * 0.2)
+            return 503, OVERLOADED, iter(())
+        text, usage = self._generate(body, rng)
+        pieces = [text[i:i + self.stream_chunk_chars] for i in range(0, len(text), self.stream_chunk_chars)]
+        cut_after = self.cut_after_chunks
+
+        def chunks():
+            for n, piece in enumerate(pieces):
+                if cut_after is not None and n >= cut_after:
+                    return
+                wait = delay * 0.2 if n == 0 else delay * 0.8 / max(1, len(pieces) - 1)
+                last = n == len(pieces) - 1
+                chunk = {"candidates": [{"content": {"parts": [{"text": piece}], "role": "model"}}]}
+                if last:
+                    chunk["candidates"][0]["finishReason"] = "STOP"
+                    chunk["usageMetadata"] = usage
+                yield wait, chunk
+
+        return 200, None, chunks()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                streaming = ':streamGenerateContent' in self.path
+                if ':generateContent' not in self.path and not streaming:
+                    return self._send(404, {"error": {"code": 404, "message": f"Unknown method {self.path}"}})
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send(400, {"error": {"code": 400, "message": "Invalid JSON payload."}})
+                if not streaming:
+                    return self._send(*server.respond(body))
+
+                status, error, chunks = server.respond_stream(body)
+                if error is not None:
+                    return self._send(status, error)
+                # No Content-Length: the stream ends when the connection closes
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                for wait, chunk in chunks:
+                    time.sleep(wait)
+                    self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                    self.wfile.flush()
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-gemini', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        return {"requests": self.requests, "injected_errors": self.errors,
+                "latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Fake Gemini listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Search index benchmark: builds services.search_index.SearchIndex over a
+synthetic catalog (see seed.py) without MongoDB, saves and reloads it, then
+times a mixed query workload (exact terms, multi-term, prefixes and typos)
+and reports latency percentiles.
+
+    python -m benchmarks.search_benchmark --listings 1000000 --queries 2000
+    python -m benchmarks.search_benchmark --listings 100000 --concurrency 4 --output search.json
+
+The synthetic catalog has a small vocabulary, so common terms match a large
+share of the listings: latencies are a pessimistic bound for real catalogs.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+from benchmarks.endpoint_benchmark import git_commit, percentile
+
+
+def synthetic_rows(n_listings, seed, chunk=50000):
+    """Yields raw internship rows with ObjectIds, generated chunk by chunk to bound memory."""
+    from seed import build_internship_docs
+
+    rng = random.Random(seed)
+    for start in range(0, n_listings, chunk):
+        for row in build_internship_docs(rng, seed, start, min(chunk, n_listings - start)):
+            row['_id'] = ObjectId()
+            yield row
+
+
+def query_mix(n_queries, seed):
+    """Deterministic workload: a quarter each of single terms, two-term queries, prefixes and typos."""
+    from seed import ROLES, LOCATIONS
+
+    rng = random.Random(seed)
+    words = sorted({w for role, skills in ROLES for w in (role + " " + " ".join(skills)).lower().split() if len(w) > 2})
+    cities = [l.split(',')[0].lower() for l in LOCATIONS]
+    queries = []
+    for i in range(n_queries):
+        word = rng.choice(words)
+        kind = i % 4
+        if kind == 0:
+            queries.append(word)
+        elif kind == 1:
+            queries.append(f"{word} {rng.choice(cities + words)}")
+        elif kind == 2:
+            queries.append(word[:max(2, len(word) // 2)])
+        else:
+            j = rng.randrange(len(word) - 1)
+            queries.append(word[:j] + word[j + 1] + word[j] + word[j + 2:])  # swap two letters
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listings', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=2000, help="Measured queries")
+    parser.add_argument('--warmup', type=int, default=100, help="Unmeasured queries")
+    parser.add_argument('--concurrency', type=int, default=1, help="Query threads")
+    parser.add_argument('--limit', type=int, default=20, help="Results per query")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    from services.search_index import SearchIndex
+
+    path = os.path.join(tempfile.mkdtemp(prefix='search-benchmark-'), 'search_index.npz')
+    index = SearchIndex(path=path, sync=False)
+
+    started = time.perf_counter()
+    index.build(synthetic_rows(args.listings, args.seed))
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    file_bytes = index.save()
+    save_seconds = time.perf_counter() - started
+
+    # Queries run against a reloaded copy, as a freshly started worker would
+    index = SearchIndex(path=path, sync=False)
+    started = time.perf_counter()
+    index.load()
+    load_seconds = time.perf_counter() - started
+    print(f"Indexed {len(index)} listings in {build_seconds:.1f}s; reloaded in {load_seconds:.2f}s", file=sys.stderr)
+
+    for q in query_mix(args.warmup, args.seed + 1):
+        index.search(q, limit=args.limit)
+
+    queries = query_mix(args.queries, args.seed)
+    latencies, matches = [], []
+
+    def one(q):
+        t = time.perf_counter()
+        total, _ = index.search(q, limit=args.limit)
+        return time.perf_counter() - t, total
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for elapsed, total in pool.map(one, queries):
+            latencies.append(elapsed)
+            matches.append(total)
+    wall = time.perf_counter() - started
+    os.remove(path)
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "config": {"listings": args.listings, "queries": args.queries, "concurrency": args.concurrency,
+                   "limit": args.limit, "seed": args.seed},
+        "index": {
+            "listings": len(index),
+            "terms": len(index._terms),
+            "postings": int(len(index._post_docs)),
+            "file_mb": round(file_bytes / 2 ** 20, 1),
+            "build_seconds": round(build_seconds, 2),
+            "save_seconds": round(save_seconds, 2),
+            "load_seconds": round(load_seconds, 3),
+        },
+        "queries": {
+            "throughput_qps": round(len(queries) / wall, 1) if wall > 0 else None,
+            "mean_matches": round(sum(matches) / len(matches), 1) if matches else None,
+            "latency_ms": {
+                "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+                "p50": ms(percentile(latencies, 50)),
+                "p90": ms(percentile(latencies, 90)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(latencies[-1]) if latencies else None,
+            },
+        },
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Micro-benchmark: legacy to_dict()/serialize_document paths vs the precompiled
+encoders in serialization.py.
+
+    python -m benchmarks.serialization_benchmark --n 100000          # uses MONGO_URI
+    python -m benchmarks.serialization_benchmark --n 100000 --mock   # in-memory mongomock
+
+Results are printed as JSON. The benchmark writes to its own database
+(internx_benchmark by default) and drops it afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from mongoengine import connect, disconnect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SKILLS = ["Python", "SQL", "React", "AWS", "Docker", "Flask", "MongoDB", "Java", "Go", "Figma"]
+INTERESTS = ["FinTech", "HealthTech", "E-commerce", "AI/ML", "EdTech"]
+
+
+def legacy_preferences_to_dict(p):
+    """The pre-serialization-layer Preferences.to_dict (dereferences p.user)."""
+    return {
+        "id": str(p.id),
+        "user_id": str(p.user.id),
+        "skills": p.skills,
+        "interests": p.interests,
+        "location": p.location,
+        "updated_at": p.updated_at.isoformat()
+    }
+
+
+def legacy_serialize_document(doc):
+    """The pre-serialization-layer serialize_document (to_mongo round trip)."""
+    from mongoengine import ReferenceField
+    data = doc.to_mongo().to_dict()
+    data['id'] = str(data.pop('_id'))
+    for field_name, field in doc._fields.items():
+        if isinstance(field, ReferenceField) and data.get(field_name):
+            data[field_name] = str(data[field_name])
+    return data
+
+
+def timed(label, fn, n, results):
+    started = time.perf_counter()
+    output = fn()
+    elapsed = time.perf_counter() - started
+    results[label] = {
+        "seconds": round(elapsed, 4),
+        "docs_per_second": round(n / elapsed) if elapsed > 0 else None,
+    }
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=100000, help="Number of Preferences documents")
+    parser.add_argument('--mock', action='store_true', help="Use mongomock instead of MONGO_URI")
+    parser.add_argument('--db', default='internx_benchmark')
+    parser.add_argument('--legacy-limit', type=int, default=None,
+                        help="Cap the dereferencing legacy path (one query per doc) at this many docs")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.mock:
+        try:
+            import mongomock
+        except ImportError:
+            parser.error("--mock needs mongomock: pip install mongomock")
+        connect(args.db, host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+    else:
+        connect(args.db, host=os.getenv('MONGO_URI', 'mongodb://localhost:27017'))
+
+    from flask import Flask
+    from models import Preferences, User, serialize_document
+    from serialization import FastJSONProvider, serialize_rows
+
+    rng = random.Random(42)
+    user_ids = [ObjectId() for _ in range(args.n)]
+    User._get_collection().insert_many(
+        [{'_id': uid, 'name': f"User {i}", 'email': f"user{i}@bench.internx", 'password': 'x'} for i, uid in enumerate(user_ids)]
+    )
+    Preferences._get_collection().insert_many([{
+        'user': uid,
+        'skills': rng.sample(SKILLS, 4),
+        'interests': rng.sample(INTERESTS, 2),
+        'location': rng.choice(["Remote", "Delhi", "Bengaluru"]),
+        'updated_at': datetime.utcnow()
+    } for uid in user_ids])
+
+    n, results = args.n, {}
+    legacy_n = min(n, args.legacy_limit or n)
+    try:
+        timed("legacy_to_dict_with_dereference",
+              lambda: [legacy_preferences_to_dict(p) for p in Preferences.objects.limit(legacy_n)], legacy_n, results)
+        docs = timed("hydrate_documents", lambda: list(Preferences.objects), n, results)
+        timed("to_dict_no_dereference", lambda: [p.to_dict() for p in docs], n, results)
+        timed("legacy_serialize_document", lambda: [legacy_serialize_document(p) for p in docs], n, results)
+        timed("serialize_document", lambda: [serialize_document(p) for p in docs], n, results)
+        payload = timed("as_pymongo_serialize_rows",
+                        lambda: list(serialize_rows(Preferences, Preferences.objects.as_pymongo())), n, results)
+
+        provider = FastJSONProvider(Flask(__name__))
+        timed("json_stdlib_dumps", lambda: json.dumps(payload), n, results)
+        timed("json_fast_provider_dumps", lambda: provider.dumps(payload), n, results)
+    finally:
+        User.drop_collection()
+        Preferences.drop_collection()
+        disconnect()
+
+    print(json.dumps({"documents": n, "legacy_dereference_documents": legacy_n, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import json
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from mongoengine import connect
+
+# Ensure environment variables are loaded for MONGO_URI
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precomputes the memory-mapped internship matrix used by GET /api/internships/matches/<user_id>."
+    )
+    parser.add_argument('--directory', default=None,
+                        help="Index directory (default SEMANTIC_INDEX_DIR); must be the one the web workers use")
+    parser.add_argument('--dim', type=int, default=None, help="Hashed feature dimensions (default SEMANTIC_DIM or 512)")
+    args = parser.parse_args()
+
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return 1
+    connect(host=MONGO_URI)
+
+    # Import after connecting, as seed.py does
+    from services.semantic_index import SEMANTIC_DIM, SEMANTIC_INDEX_DIR, SemanticIndex
+
+    index = SemanticIndex(directory=args.directory or SEMANTIC_INDEX_DIR, dim=args.dim or SEMANTIC_DIM, sync=False)
+    print(f"Building the semantic index in {index.directory} (dim={index.dim})...")
+    started = time.monotonic()
+    index.rebuild()
+    # Running workers pick up the new generation on their next query
+    print(json.dumps({
+        "listings": len(index),
+        "dim": index.dim,
+        "matrix_mb": round(index._meta['capacity'] * index.dim * 4 / 2 ** 20, 1),
+        "seconds": round(time.monotonic() - started, 2),
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+from mongoengine import connect
+
+# Ensure environment variables are loaded for MONGO_URI / GEMINI_API_KEY
+load_dotenv()
+
+
+def load_items(path):
+    """Reads [{userId, resumeText}, ...] from a JSON array or a JSON-lines file."""
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk resume analysis for campus onboarding.")
+    parser.add_argument('input', help="JSON array or JSON-lines file of {userId, resumeText} objects")
+    parser.add_argument('--concurrency', type=int, default=None, help="Parallel Gemini calls (default RESUME_BULK_CONCURRENCY)")
+    parser.add_argument('--batch-size', type=int, default=500, help="Items per bulk_write batch")
+    parser.add_argument('--report', help="Optional path to write per-item results as JSON")
+    args = parser.parse_args()
+
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return 1
+    connect(host=MONGO_URI)
+
+    # Import after connecting, as seed.py does
+    from controllers.resume_controller import analyze_resumes_bulk
+
+    items = load_items(args.input)
+    print(f"Analyzing {len(items)} resumes in batches of {args.batch_size}...")
+
+    all_results, totals = [], {"total": 0, "succeeded": 0, "failed": 0, "llm_calls": 0, "elapsed_seconds": 0.0}
+    for start in range(0, len(items), args.batch_size):
+        batch = items[start:start + args.batch_size]
+        results, summary = analyze_resumes_bulk(batch, concurrency=args.concurrency)
+        for result in results:
+            result['index'] += start
+        all_results.extend(results)
+        for key in totals:
+            totals[key] += summary[key]
+        print(f"   Batch {start // args.batch_size + 1}: {summary['succeeded']}/{summary['total']} ok, "
+              f"{summary['items_per_second']} items/s")
+
+    elapsed = totals['elapsed_seconds']
+    totals['elapsed_seconds'] = round(elapsed, 3)
+    totals['items_per_second'] = round(totals['total'] / elapsed, 2) if elapsed > 0 else None
+    print(json.dumps(totals, indent=2))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(all_results, f, indent=2)
+        print(f"Per-item results written to {args.report}")
+
+    return 0 if totals['failed'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from dotenv import load_dotenv
+from mongoengine import connect
+
+# Ensure environment variables are loaded for MONGO_URI
+load_dotenv()
+
+
+def load_rows(path):
+    """Reads {name, email, password} rows from a CSV (with header), JSON array or JSON-lines file."""
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            return list(csv.DictReader(f))
+        content = f.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk user registration (users + default preferences).")
+    parser.add_argument('input', help="CSV, JSON array or JSON-lines file of {name, email, password}")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Documents per insert_many call")
+    parser.add_argument('--report', help="Optional path to write per-row results as JSON")
+    args = parser.parse_args()
+
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return 1
+    connect(host=MONGO_URI)
+
+    # Import after connecting, as seed.py does
+    from controllers.user_controller import register_users_bulk
+
+    rows = load_rows(args.input)
+    print(f"Registering {len(rows)} users...")
+    results, summary = register_users_bulk(rows, chunk_size=args.chunk_size)
+    print(json.dumps(summary, indent=2))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Per-row results written to {args.report}")
+
+    return 0 if summary['failed'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,3 @@
-from flask import Flask
 from mongoengine import connect
 from dotenv import load_dotenv
 import os
@@ -6,25 +5,29 @@ import os
 # 1. Load environment variables from .env file
 load_dotenv()
 
-def create_app():
-    """Initializes and configures the Flask application."""
-    app = Flask(__name__)
-    
-    # 2. Flask configuration (Can be expanded later, e.g., secret key)
-    # app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'default_secret_key') 
-    
-    # 3. Connect to MongoDB Atlas
+
+class Config:
+    """Flask configuration, read from environment variables."""
+    DEBUG = os.getenv('FLASK_DEBUG', os.getenv('FLASK_ENV') == 'development') in (True, '1', 'true', 'True')
+    MONGO_URI = os.getenv('MONGO_URI')
+    # Expose X-DB-Queries / X-DB-Time response headers outside debug mode too
+    DB_QUERY_HEADERS = os.getenv('DB_QUERY_HEADERS', 'false').lower() in ('1', 'true')
+    # Extra keyword arguments for mongoengine.connect (e.g. mongo_client_class for an in-memory stand-in)
+    MONGO_SETTINGS = {}
+    # SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
+
+
+def init_db(app):
+    """Connects MongoEngine to MongoDB Atlas using app.config['MONGO_URI']."""
     # The MONGO_URI is read from the .env file.
-    mongo_uri = os.getenv('MONGO_URI')
+    mongo_uri = app.config.get('MONGO_URI')
     if not mongo_uri:
         print("FATAL ERROR: MONGO_URI not found in environment variables.")
     else:
         try:
-            connect(host=mongo_uri)
+            connect(host=mongo_uri, **app.config.get('MONGO_SETTINGS', {}))
             print("MongoDB Connected successfully.")
         except Exception as e:
             print(f"MongoDB connection failed: {e}")
 
-    return app
-
-# The function is called in app.py to start the application.
+# init_db is called from create_app in app.py.
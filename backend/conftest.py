@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+
+from config import Config
+from services.query_monitor import _listener, install_listener, track_queries
+
+# mongomock collection methods and the server command each one stands for
+_MONGOMOCK_COMMANDS = {
+    'find': 'find', 'find_one': 'find', 'aggregate': 'aggregate', 'distinct': 'distinct',
+    'count_documents': 'count', 'estimated_document_count': 'count',
+    'insert_one': 'insert', 'insert_many': 'insert', 'bulk_write': 'update',
+    'update_one': 'update', 'update_many': 'update', 'replace_one': 'update',
+    'delete_one': 'delete', 'delete_many': 'delete',
+    'find_one_and_update': 'findAndModify', 'find_one_and_replace': 'findAndModify',
+    'find_one_and_delete': 'findAndModify',
+}
+
+
+class TestingConfig(Config):
+    TESTING = True
+    MONGO_URI = 'mongodb://localhost/internx_test'
+    MONGO_SETTINGS = {'mongo_client_class': mongomock.MongoClient}
+
+
+def _report_mongomock_commands(monkeypatch):
+    """
+    mongomock sends no pymongo monitoring events, so its collection calls are
+    reported to the query listener directly (nested calls made by mongomock
+    itself, e.g. find_one -> find, count once).
+    """
+    from mongomock.collection import Collection
+
+    local = threading.local()
+
+    def instrument(method, command_name):
+        original = getattr(Collection, method)
+
+        def wrapper(self, *args, **kwargs):
+            if getattr(local, 'active', False):
+                return original(self, *args, **kwargs)
+            first = args[0] if args else kwargs.get('filter', kwargs.get('pipeline'))
+            command = {command_name: self.name}
+            command['pipeline' if command_name == 'aggregate' else 'filter'] = (
+                first if isinstance(first, (dict, list)) else None
+            )
+            _listener.started(SimpleNamespace(command_name=command_name, command=command))
+            local.active = True
+            started = time.perf_counter()
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                local.active = False
+                _listener.succeeded(SimpleNamespace(
+                    command_name=command_name, duration_micros=int((time.perf_counter() - started) * 1e6)
+                ))
+
+        monkeypatch.setattr(Collection, method, wrapper)
+
+    for method, command_name in _MONGOMOCK_COMMANDS.items():
+        instrument(method, command_name)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """
+    The Flask app on an in-memory mongomock database, emptied after each test.
+    Process-wide indexes and caches are reset and their files kept under tmp_path.
+    """
+    from mongoengine.connection import get_db
+
+    from app import create_app
+    from services.internship_index import internship_index
+    from services.recommendation_cache import recommendation_cache
+    from services.resume_cache import resume_cache
+    from services.search_index import search_index
+    from services.semantic_index import semantic_index
+
+    _report_mongomock_commands(monkeypatch)
+    application = create_app(config_object=TestingConfig)
+
+    internship_index.__init__()
+    search_index.__init__(path=str(tmp_path / 'search_index.npz'))
+    semantic_index.__init__(directory=str(tmp_path / 'semantic_index'))
+    recommendation_cache.memory.clear()
+    resume_cache.memory.clear()
+
+    yield application
+
+    db = get_db()
+    for name in db.list_collection_names():
+        db[name].delete_many({})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """A local FakeGeminiServer that the shared gemini_client talks to for the test's duration."""
+    from benchmarks.fake_gemini import FakeGeminiServer
+    from services.gemini_client import gemini_client
+
+    server = FakeGeminiServer(latency_ms=0, jitter_ms=0).start()
+    monkeypatch.setattr(gemini_client, 'base_url', server.base_url)
+    monkeypatch.setattr(gemini_client, 'api_key', 'test-key')
+    monkeypatch.setattr(gemini_client, 'max_retries', 0)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Asserts that a block stays within a maximum number of DB commands:
+
+        def test_listing(client, query_budget):
+            with query_budget(2) as stats:
+                client.get('/api/internships/')
+
+    The listener must be installed before the MongoClient is created, which
+    create_app() already does; the fixture installs it as well for tests that
+    connect on their own.
+    """
+    install_listener()
+
+    @contextmanager
+    def budget(max_queries):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"Query budget exceeded: {stats.count} > {max_queries} commands. Shapes: {dict(stats.shapes)}"
+        )
+
+    return budget
@@ -1,13 +1,41 @@
 import json
 import logging
+import os
+import time
 import requests
-from flask import Blueprint, jsonify, request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from flask import Response, jsonify, request, stream_with_context
 from bson import ObjectId
 from mongoengine import DoesNotExist
 
-# Constants
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-pro:generateContent"
-GEMINI_API_KEY = "YOUR_GEMINI_API_KEY"  # Make sure to set this as an environment variable
+from models import User, Preferences, Internship, ResumeAnalysis, Allocation
+from serialization import serialize
+from services.allocation import ALLOCATION_CANDIDATES, ALLOCATION_MIN_SCORE, latest_run, run_allocation
+from services.applications import EXCLUDED_FROM_RANKING, LEGACY_STATUS, user_application_rows
+from services.ranker import InternshipRanker, build_profile
+from services.recommendation_cache import recommendation_cache
+from services.precompute import get_fresh, save_recommendations
+from services.gemini_client import gemini_client
+from services.fallback import local_recommendations
+from services.metrics import record_prompt_tokens, record_recommendation_fallback
+from services.json_stream import JsonArrayStreamParser
+from services.prompt_builder import build_recommendation_prompt, decode_recommendation, decode_recommendations
+from services.jobs import JobRunner, JobQueueFull
+from services.singleflight import SingleFlight
+
+# Number of locally pre-ranked internships forwarded to Gemini
+SHORTLIST_SIZE = int(os.getenv('RECOMMENDATION_SHORTLIST_SIZE', 25))
+# Seconds /recommend waits for Gemini before answering with the local fallback ranking
+RECOMMENDATION_DEADLINE = float(os.getenv('RECOMMENDATION_DEADLINE_SECONDS', 8))
+
+# Gemini calls run here so a request can stop waiting at its deadline while the
+# call carries on; a late answer still lands in the recommendation cache
+generation_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('RECOMMENDATION_GENERATION_WORKERS', 8)),
+    thread_name_prefix='recommend'
+)
+# Identical recommendation requests in flight at once (same user and inputs) share one Gemini call
+recommendation_flight = SingleFlight('recommendation')
 
 # System Prompt for Gemini AI
 system_prompt = """
@@ -26,7 +54,7 @@ RECOMMENDATION_SCHEMA = {
             "items": {
                 "type": "object",
                 "properties": {
-                    "internshipId": {"type": "string"},
+                    "internshipId": {"type": "string", "description": "Internship number from the list"},
                     "matchScore": {"type": "number"},
                     "reasoning": {"type": "string"},
                     "preparationMaterials": {
@@ -34,92 +62,388 @@ RECOMMENDATION_SCHEMA = {
                         "items": {"type": "string"}
                     }
                 },
-                "required": ["internshipId", "matchScore", "reasoning", "preparation Materials"]
+                "required": ["internshipId", "matchScore", "reasoning", "preparationMaterials"]
             },
             "minItems": 1,
             "maxItems": 3
-        },
-        "appliedStatus": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "internshipId": {"type": "string"},
-                    "status": {"type": "string", "enum": ["applied", "not_interested", "saved_for_later"]}
-                },
-                "required": ["internshipId", "status"]
-            }
         }
     },
-    "required": ["recommendations", "appliedStatus"]
+    "required": ["recommendations"]
 }
 
+def fetch_all_context(user_id, candidate_ids=None):
+    """
+    Loads the user's preferences, resume analysis, applications and the internship
+    catalog, then pre-ranks the catalog locally so only a shortlist is sent to
+    Gemini. Internships the user applied to or dismissed are excluded before ranking.
+    With candidate_ids (a fresh precomputed shortlist, best first) only those
+    listings are loaded and the catalog is not ranked at all.
+    Raises DoesNotExist if the user or their preferences are missing.
+    """
+    try:
+        user = User.objects.get(id=ObjectId(user_id))
+    except Exception:
+        raise DoesNotExist(f"User with ID {user_id} not found")
+
+    preferences = Preferences.objects.get(user=user).to_dict()
+    analysis = ResumeAnalysis.objects(user=user).first()
+    resume_analysis = analysis.to_dict() if analysis else None
+
+    applications = user_application_rows(user.id)
+    excluded = [row['internship'] for row in applications if row['status'] in EXCLUDED_FROM_RANKING]
+
+    if candidate_ids is not None:
+        listings = {i.id: i.to_dict() for i in Internship.objects(id__in=candidate_ids)}
+        excluded = set(excluded)
+        shortlist = [listings[i] for i in candidate_ids if i in listings and i not in excluded][:SHORTLIST_SIZE]
+        catalog_size = len(candidate_ids)
+    else:
+        candidates = Internship.objects(id__nin=excluded) if excluded else Internship.objects
+        ranker = InternshipRanker(i.to_dict() for i in candidates)
+        shortlist = [internship for internship, _ in ranker.top_k(build_profile(preferences, resume_analysis), SHORTLIST_SIZE)]
+        catalog_size = len(ranker)
+
+    return {
+        "preferences": preferences,
+        "resume_analysis": resume_analysis,
+        "applied_status": [
+            {"internshipId": str(row['internship']), "status": LEGACY_STATUS[row['status']]} for row in applications
+        ],
+        "shortlist": shortlist,
+        "catalog_size": catalog_size,
+    }
+
+
+def build_recommendation_request(context):
+    """
+    Builds the Gemini request for context['shortlist'] with a compact,
+    token-budgeted prompt (services.prompt_builder). Returns (payload, id_map,
+    prompt_stats): id_map turns the model's listing numbers back into ids and
+    prompt_stats reports the estimated prompt tokens sent and saved.
+    """
+    user_query, id_map, prompt_stats = build_recommendation_prompt(context)
+    record_prompt_tokens(prompt_stats['estimatedTokens'], prompt_stats['tokensSaved'])
+
+    payload = {
+        "contents": [{"parts": [{"text": user_query}]}],
+        "systemInstruction": {"parts": [{"text": system_prompt}]},
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": RECOMMENDATION_SCHEMA,
+            "temperature": 0.2
+        }
+    }
+    return payload, id_map, prompt_stats
+
+
+def generate_recommendations(context):
+    """
+    Asks Gemini to pick from context['shortlist']. Returns (recommendations,
+    prompt_stats): the parsed response with internship ids restored and
+    server-side appliedStatus, and the prompt statistics.
+    """
+    payload, id_map, prompt_stats = build_recommendation_request(context)
+    recommendations = decode_recommendations(gemini_client.generate_json(payload), id_map)
+    # Application state is tracked server-side (/api/applications), not echoed by the model
+    recommendations['appliedStatus'] = context['applied_status']
+    return recommendations, prompt_stats
+
+
+def _lookup_recommendations(user_id):
+    """
+    Returns (inputs, cache_key, precomputed, cached) for the user: cached is a
+    result that can be served as is (from this worker's cache or the fresh
+    precomputed row), otherwise None.
+    """
+    try:
+        inputs = recommendation_cache.user_inputs(user_id)
+        cache_key = recommendation_cache.key_for(user_id, inputs)
+        # The key embeds the catalog version (read once for both)
+        precomputed = get_fresh(user_id, inputs, cache_key[3] if cache_key else None)
+    except Exception as e:
+        logging.warning(f"Recommendation cache key lookup failed for user {user_id}: {e}")
+        inputs, cache_key, precomputed = None, None, None
+    cached = recommendation_cache.get(cache_key)
+    if cached is None and precomputed and precomputed.get('recommendations'):
+        cached = precomputed['recommendations']
+        recommendation_cache.set(cache_key, cached)
+    return inputs, cache_key, precomputed, cached
+
+
+def _load_context(user_id, precomputed):
+    """fetch_all_context(), using the precomputed shortlist when the row is fresh."""
+    candidate_ids = [c['internship'] for c in precomputed['candidates']] if precomputed else None
+    context = fetch_all_context(user_id, candidate_ids=candidate_ids)
+    logging.info(f"Shortlisted {len(context['shortlist'])} of {context['catalog_size']} "
+                 f"{'precomputed candidates' if precomputed else 'internships'} for user {user_id}")
+    return context
+
+
+def _remember_recommendations(user_id, inputs, cache_key, precomputed, recommendations, prompt_stats):
+    logging.info(f"Recommendation prompt for user {user_id}: {prompt_stats['estimatedTokens']} estimated tokens, "
+                 f"{prompt_stats['tokensSaved']} saved by compact encoding")
+    recommendation_cache.set(cache_key, recommendations)
+    if precomputed:
+        save_recommendations(user_id, inputs, precomputed['catalog_version'], recommendations)
+
+
+def _generate_and_remember(user_id, inputs, cache_key, precomputed, context):
+    """
+    generation_pool task: generates and caches the recommendations, even after
+    the request has fallen back. Returns {"data": ..., "prompt": prompt stats}.
+    """
+    try:
+        recommendations, prompt_stats = generate_recommendations(context)
+    except Exception as e:
+        logging.error(f"Recommendation generation for user {user_id} failed: {e}", exc_info=True)
+        raise
+    _remember_recommendations(user_id, inputs, cache_key, precomputed, recommendations, prompt_stats)
+    return {"data": recommendations, "prompt": prompt_stats}
+
+
 def get_recommendations():
     """
     POST /api/allocation/recommend: Sends comprehensive user data to Gemini for analysis
     and returns personalized recommendations and prep material.
+
+    Served, in order, from: this worker's recommendation cache; the nightly
+    precomputed row when it is fresh (its stored Gemini output, or its shortlist
+    so the catalog is not ranked); a live ranking of the full catalog.
+
+    If Gemini has not answered within RECOMMENDATION_DEADLINE seconds of the
+    request (or fails), a deterministic local ranking is returned instead with
+    "degraded": true; the Gemini call keeps running and its answer is cached
+    for the user's next request.
     """
+    started = time.monotonic()
     data = request.get_json()
     user_id = data.get('userId')
-    applied_status = data.get('appliedStatus', [])
 
     if not user_id:
         return jsonify({"status": "error", "message": "Missing userId in request."}), 400
-    if not GEMINI_API_KEY:
+    if not gemini_client.is_configured:
         return jsonify({"status": "error", "message": "Server configuration error: Gemini API Key missing."}), 500
 
+    # 0. Serve a cached result when nothing the recommendation depends on has changed
+    inputs, cache_key, precomputed, cached = _lookup_recommendations(user_id)
+    if cached is not None:
+        return jsonify({
+            "status": "success",
+            "message": "Recommendations generated by Intern_india AI Assistant.",
+            "cached": True,
+            "data": cached
+        }), 200
+
     try:
-        # 1. Fetch all necessary data from MongoDB
-        context = fetch_all_context(user_id)
-        
+        # 1. Fetch all necessary data from MongoDB (the shortlist comes precomputed when fresh)
+        context = _load_context(user_id, precomputed)
+
     except DoesNotExist:
         return jsonify({"status": "error", "message": "User ID or linked profile data not found in the database."}), 404
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error preparing context data: {e}"}), 500
 
-    # 2. Construct User Prompt
-    user_query = f"""
-    --- USER PROFILE ---
-    Preferences: {json.dumps(context['preferences'])}
-    Resume Analysis (If Available): {json.dumps(context['resume_analysis'] or "No analysis available. Base matching on preferences.")}
-    Current Applied Status: {json.dumps(applied_status)}
-    
-    --- AVAILABLE INTERNSHIPS ---
-    {json.dumps(context['all_internships'])}
-    
-    Please provide the 3 best recommendations and return the 'appliedStatus' list in the required JSON format.
-    """
-    
-    payload = {
-        "contents": [{"parts": [{"text": user_query}]}],
-        "systemInstruction": {"parts": [{"text": system_prompt}]},
-        "generationConfig": {
-            "responseMimeType": "application/json",
-            "responseSchema": RECOMMENDATION_SCHEMA,
-            "temperature": 0.2
-        }
-    }
+    # 2. Call Gemini API (or join an identical call already in flight), waiting at most until the deadline
+    flight_key = "|".join(str(part) for part in cache_key) if cache_key else None
+    future = recommendation_flight.submit(
+        flight_key, generation_pool,
+        lambda: _generate_and_remember(user_id, inputs, cache_key, precomputed, context)
+    )
+    try:
+        generated = future.result(timeout=max(0.0, RECOMMENDATION_DEADLINE - (time.monotonic() - started)))
+        return jsonify({
+            "status": "success",
+            "message": "Recommendations generated by Intern_india AI Assistant.",
+            "cached": False,
+            "prompt": generated['prompt'],
+            "data": generated['data']
+        }), 200
+
+    except FuturesTimeout:
+        reason = 'deadline'
+    except requests.exceptions.RequestException:
+        reason = 'gemini_error'
+    except Exception:
+        reason = 'invalid_response'
+
+    # 3. Degraded answer: local ranking now, Gemini's (if it still arrives) on the next request
+    logging.warning(f"Serving local fallback recommendations to user {user_id} ({reason})")
+    record_recommendation_fallback(reason)
+    fallback = local_recommendations(context)
+    fallback['appliedStatus'] = context['applied_status']
+    return jsonify({
+        "status": "success",
+        "message": "AI recommendations are taking longer than usual; showing the best local matches.",
+        "cached": False,
+        "degraded": True,
+        "degradedReason": reason,
+        "data": fallback
+    }), 200
+
+
+def _sse(event, data):
+    """One Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_recommendations():
+    """
+    POST /api/allocation/recommend/stream: Same request and sources as
+    /recommend, answered as a text/event-stream. Gemini's streaming API is
+    parsed incrementally, so each recommendation is pushed as soon as the model
+    has finished writing it instead of after the whole response.
+
+    Events:
+        - meta: {"cached": bool, "prompt": prompt stats (generated results only)}
+        - recommendation: one recommendation (internshipId, matchScore, reasoning, preparationMaterials)
+        - done: the complete result, as "data" of /recommend
+        - error: {"message": ...}; the stream ends after it
+    Validation and lookup failures are returned as plain JSON errors before the stream starts.
+    """
+    data = request.get_json()
+    user_id = data.get('userId')
+
+    if not user_id:
+        return jsonify({"status": "error", "message": "Missing userId in request."}), 400
+    if not gemini_client.is_configured:
+        return jsonify({"status": "error", "message": "Server configuration error: Gemini API Key missing."}), 500
+
+    inputs, cache_key, precomputed, cached = _lookup_recommendations(user_id)
+
+    if cached is not None:
+        def events():
+            yield _sse('meta', {"cached": True})
+            for recommendation in cached.get('recommendations') or []:
+                yield _sse('recommendation', recommendation)
+            yield _sse('done', cached)
+    else:
+        try:
+            context = _load_context(user_id, precomputed)
+            payload, id_map, prompt_stats = build_recommendation_request(context)
+        except DoesNotExist:
+            return jsonify({"status": "error", "message": "User ID or linked profile data not found in the database."}), 404
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Error preparing context data: {e}"}), 500
+
+        def events():
+            yield _sse('meta', {"cached": False, "prompt": prompt_stats})
+            parser = JsonArrayStreamParser('recommendations')
+            try:
+                for text in gemini_client.stream_generate_content(payload):
+                    for recommendation in parser.feed(text):
+                        if decode_recommendation(recommendation, id_map) is not None:
+                            yield _sse('recommendation', recommendation)
+
+                final_recommendations = decode_recommendations(parser.result(), id_map)
+                final_recommendations['appliedStatus'] = context['applied_status']
+                _remember_recommendations(user_id, inputs, cache_key, precomputed, final_recommendations, prompt_stats)
+                yield _sse('done', final_recommendations)
+
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Gemini streaming request failed: {e}", exc_info=True)
+                yield _sse('error', {"message": "Failed to communicate with the Gemini API."})
+            except Exception as e:
+                logging.error(f"Error processing Gemini stream: {e}", exc_info=True)
+                yield _sse('error', {"message": "Failed to parse AI response."})
+
+    # X-Accel-Buffering stops nginx from holding events back until the response ends
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# --- Global Allocation ---
+
+def run_allocation_job(payload):
+    """JobRunner handler: one global allocation run; the run statistics become the job result."""
+    return run_allocation(k=payload.get('candidates', ALLOCATION_CANDIDATES),
+                          min_score=payload.get('minScore', ALLOCATION_MIN_SCORE))
+
+
+# A run scores every user against every listing, so only one runs at a time across all workers
+allocation_jobs = JobRunner('allocation', run_allocation_job, max_workers=1, max_pending=1,
+                            lease_seconds=3600, max_attempts=2, exclusive=True)
+
+
+def start_allocation_run():
+    """
+    POST /api/allocation/run: Starts a global, capacity-constrained allocation of
+    users to internship seats in the background and returns 202 with a job id
+    to poll at GET /api/allocation/jobs/<job_id>.
+
+    Request Body (JSON, optional):
+        - candidates (int): Candidate internships kept per user (default ALLOCATION_CANDIDATES)
+        - minScore (float): Minimum match score of an assignment (default ALLOCATION_MIN_SCORE)
+    """
+    # silent: the body is optional, but when present it must be a JSON object
+    data = request.get_json(silent=True)
+    data = {} if data is None else data
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Request body must be a JSON object."}), 400
+    candidates = data.get('candidates', ALLOCATION_CANDIDATES)
+    min_score = data.get('minScore', ALLOCATION_MIN_SCORE)
+    if not isinstance(candidates, int) or not 1 <= candidates <= 200:
+        return jsonify({"status": "error", "message": "candidates must be an integer between 1 and 200."}), 400
+    if not isinstance(min_score, (int, float)) or not 0 <= min_score <= 1:
+        return jsonify({"status": "error", "message": "minScore must be a number between 0 and 1."}), 400
 
-    # 3. Call Gemini API
     try:
-        response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", 
-                               headers={'Content-Type': 'application/json'}, 
-                               data=json.dumps(payload))
-        response.raise_for_status()
+        job = allocation_jobs.submit({"candidates": candidates, "minScore": min_score})
+    except JobQueueFull:
+        return jsonify({"status": "error", "message": "An allocation run is already in progress."}), 409
+    except Exception as e:
+        logging.error(f"Failed to start allocation run: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
+
+    return jsonify({
+        "status": "accepted",
+        "message": "Allocation run started.",
+        "job_id": str(job.id),
+        "status_url": f"/api/allocation/jobs/{job.id}"
+    }), 202
+
+
+def get_allocation_job(job_id):
+    """GET /api/allocation/jobs/<job_id>: Status of an allocation run job and its statistics once done."""
+    try:
+        job = allocation_jobs.get(ObjectId(job_id))
+    except Exception:
+        return jsonify({"status": "error", "message": "Invalid job ID format."}), 400
+
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job with ID {job_id} not found."}), 404
 
-        gemini_result = response.json()
-        json_string = gemini_result['candidates'][0]['content']['parts'][0]['text']
-        final_recommendations = json.loads(json_string)
+    return jsonify({"status": "success", "job": job.to_dict()}), 200
+
+
+def get_user_allocation(user_id):
+    """
+    GET /api/allocation/users/<user_id>: The internship assigned to the user by the
+    latest completed allocation run (null when the user was left unassigned).
+    """
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"status": "error", "message": "Invalid user ID format."}), 400
+
+    try:
+        run = latest_run()
+        if run is None:
+            return jsonify({"status": "error", "message": "No allocation run has completed yet."}), 404
+
+        row = Allocation.objects(run=run.id, user=ObjectId(user_id)).as_pymongo().first()
+        allocation = None
+        if row is not None:
+            internship = Internship.objects(id=row['internship']).first()
+            allocation = {
+                "internship_id": str(row['internship']),
+                "score": row.get('score'),
+                "internship": internship.to_dict() if internship else None
+            }
 
         return jsonify({
             "status": "success",
-            "message": "Recommendations generated by Intern_india AI Assistant.",
-            "data": final_recommendations
+            "run": serialize(run),
+            "allocation": allocation
         }), 200
 
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Gemini API Request Failed: {e}", exc_info=True)
-        return jsonify({"status": "error", "message": "Failed to communicate with the Gemini API."}), 503
     except Exception as e:
-        logging.error(f"Error processing Gemini response: {e}", exc_info=True)
-        return jsonify({"status": "error", "message": "Failed to parse AI response."}), 500
+        logging.error(f"Failed to load allocation for user {user_id}: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
@@ -1,37 +1,53 @@
-from flask import jsonify
+from flask import jsonify, request
 import logging
 from datetime import datetime
 
+from services.analytics import get_rollup, refresh_rollup, TOP_SKILLS
+
 logging.basicConfig(level=logging.INFO)
 
+
+def _format_rollup(rollup):
+    """Shapes the rollup document into the public analytics payload."""
+    return {
+        "system_overview": {
+            "total_users": rollup.total_users,
+            "total_listings": rollup.total_listings,
+            "total_active_listings": rollup.total_active_listings,
+            "total_applications_tracked": rollup.total_applications_tracked
+        },
+        "top_skills_required": rollup.skill_counts[:TOP_SKILLS],
+        "sector_distribution": {row['sector']: row['count'] for row in rollup.sector_distribution},
+        "computed_at": rollup.computed_at.isoformat() if rollup.computed_at else None,
+        "data_retrieved_at": datetime.utcnow().isoformat()
+    }
+
+
 def get_analytics():
     """
-    Returns dummy analytics data. 
-    In a real app, this would perform complex aggregation queries on MongoDB.
+    Returns system analytics from the materialized rollup document.
+    The rollup is built by Mongo aggregation pipelines and refreshed
+    incrementally in the background once it is older than ANALYTICS_REFRESH_SECONDS.
     GET /api/analytics
     """
     try:
-        # Dummy data simulating aggregation
-        analytics_data = {
-            "system_overview": {
-                "total_users": 1540,
-                "total_active_listings": 85,
-                "total_applications_tracked": 7890
-            },
-            "top_skills_required": [
-                {"skill": "Python", "count": 350},
-                {"skill": "SQL", "count": 280},
-                {"skill": "React", "count": 150},
-                {"skill": "AWS", "count": 110}
-            ],
-            "sector_distribution": {
-                "FinTech": 45, "HealthTech": 30, "E-commerce": 25, "AI/ML": 15
-            },
-            "data_retrieved_at": datetime.utcnow().isoformat()
-        }
-        
-        return jsonify({"status": "success", "data": analytics_data}), 200
+        return jsonify({"status": "success", "data": _format_rollup(get_rollup())}), 200
 
     except Exception as e:
         logging.error(f"Error generating analytics data: {e}", exc_info=True)
         return jsonify({"status": "error", "message": "Failed to retrieve system analytics."}), 500
+
+
+def refresh_analytics():
+    """
+    Recomputes the analytics rollup on demand and returns the new figures.
+    Pass ?full=1 to rebuild from scratch instead of incrementally.
+    POST /api/analytics/refresh
+    """
+    try:
+        rollup = refresh_rollup(full=request.args.get('full') in ('1', 'true'))
+        return jsonify({"status": "success", "data": _format_rollup(rollup)}), 200
+
+    except Exception as e:
+        logging.error(f"Error refreshing analytics data: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "Failed to refresh system analytics."}), 500
@@ -0,0 +1,104 @@
+from flask import request, jsonify
+from bson import ObjectId
+from models import User, Internship, Application
+from serialization import serialize_rows
+from services.applications import set_application_status
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+# Page size of GET /api/applications/<user_id>
+MAX_LIST_SIZE = 500
+
+
+def _change_status(status):
+    """Shared body of the apply/save/dismiss endpoints."""
+    # silent: malformed JSON or a non-object body gets the same 400 as missing fields
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    user_id = data.get('userId')
+    internship_id = data.get('internshipId')
+
+    if not all([user_id, internship_id]):
+        return jsonify({"status": "error", "message": "Missing required fields: userId and internshipId."}), 400
+    if not ObjectId.is_valid(user_id) or not ObjectId.is_valid(internship_id):
+        return jsonify({"status": "error", "message": "Invalid userId or internshipId format."}), 400
+
+    try:
+        if not User.objects(id=ObjectId(user_id)).only('id').as_pymongo().first():
+            return jsonify({"status": "error", "message": f"User with ID {user_id} not found."}), 404
+        if not Internship.objects(id=ObjectId(internship_id)).only('id').as_pymongo().first():
+            return jsonify({"status": "error", "message": f"Internship with ID {internship_id} not found."}), 404
+
+        previous_status = set_application_status(user_id, internship_id, status)
+
+        logging.info(f"User {user_id} {status} internship {internship_id} (was {previous_status})")
+        return jsonify({
+            "status": "success",
+            "message": f"Internship marked as {status}.",
+            "application": {"userId": user_id, "internshipId": internship_id, "status": status},
+            "previous_status": previous_status
+        }), 201 if previous_status is None else 200
+
+    except Exception as e:
+        logging.error(f"Failed to mark internship {internship_id} as {status} for user {user_id}: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
+
+
+def apply_to_internship():
+    """POST /api/applications/apply: Records an application and increments the listing's applicants_count."""
+    return _change_status('applied')
+
+
+def save_internship():
+    """POST /api/applications/save: Saves an internship for later."""
+    return _change_status('saved')
+
+
+def dismiss_internship():
+    """POST /api/applications/dismiss: Hides an internship from the user's recommendations."""
+    return _change_status('dismissed')
+
+
+def get_user_applications(user_id):
+    """
+    GET /api/applications/<user_id>: Lists the user's applications, newest first.
+
+    ?status=applied|saved|dismissed restricts the list (served from the
+    (user, status, -updated_at) index). Listing details are attached with one
+    $in query over the page instead of a lookup per application.
+    """
+    status = request.args.get('status')
+    if status and status not in Application.STATUSES:
+        return jsonify({"status": "error", "message": f"status must be one of {', '.join(Application.STATUSES)}."}), 400
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"status": "error", "message": "Invalid user ID format."}), 400
+
+    try:
+        limit = min(int(request.args.get('limit', MAX_LIST_SIZE)), MAX_LIST_SIZE)
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer."}), 400
+
+    try:
+        query = Application.objects(user=ObjectId(user_id))
+        if status:
+            query = query.filter(status=status)
+        rows = list(query.order_by('-updated_at').limit(limit).as_pymongo())
+
+        listing_rows = Internship.objects(id__in=[row['internship'] for row in rows]).as_pymongo()
+        listings = {listing['id']: listing for listing in serialize_rows(Internship, listing_rows)}
+
+        applications = []
+        for application in serialize_rows(Application, rows):
+            application['internship'] = listings.get(application['internship_id'])
+            applications.append(application)
+
+        return jsonify({
+            "status": "success",
+            "count": len(applications),
+            "data": applications
+        }), 200
+
+    except Exception as e:
+        logging.error(f"Failed to list applications for user {user_id}: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
@@ -1,11 +1,21 @@
-from flask import request, jsonify
-from mongoengine.errors import ValidationError, DoesNotExist, OperationError
+from flask import request, jsonify, Response, stream_with_context
+from mongoengine.errors import ValidationError, DoesNotExist
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
+import base64
+import json
 import logging
 
 # Import models
-from models import User, Preferences, Internship
+from models import User, Preferences, Internship, ResumeAnalysis
+from serialization import encoder_for
+from services.internship_index import internship_index
+from services.search_index import search_index
+from services.semantic_index import semantic_index, profile_fields
+from services.applications import EXCLUDED_FROM_RANKING, user_application_rows
+from services.recommendation_cache import recommendation_cache, bump_catalog_version
 
 # Configure logging
 logging.basicConfig(
@@ -14,9 +24,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of rows accepted by the bulk preferences import
+BULK_PREFERENCES_MAX = 10000
+
+
+def validate_preference_changes(data):
+    """
+    Extracts the preference fields present in data.
+
+    Returns (changes, error): changes maps Preferences field names to their new
+    values; error is a (message, field) tuple when a field has the wrong type.
+    """
+    changes = {}
+    for field, label in (('skills', 'Skills'), ('interests', 'Interests')):
+        if field in data:
+            value = data[field]
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                return None, (f"{label} must be a list of strings.", field)
+            changes[field] = value
+
+    if 'location' in data:
+        if not isinstance(data['location'], str):
+            return None, ("Location must be a string.", 'location')
+        changes['location'] = data['location']
+
+    return changes, None
+
+
 def set_user_preferences():
     """
     Endpoint to set or update user preferences including skills, interests, and location.
+
+    Only the fields present in the request are written, with a single atomic
+    find_one_and_update on the user's Preferences document, so concurrent edits
+    of different fields no longer overwrite each other.
     
     Request Body (JSON):
         - userId (str): Required. The ID of the user
@@ -48,69 +89,49 @@ def set_user_preferences():
             "optional_fields": ["skills", "interests", "location"]
         }), 400
 
+    if not ObjectId.is_valid(user_id):
+        logger.error(f"User lookup failed for ID {user_id}: invalid ObjectId")
+        return jsonify({
+            "status": "error",
+            "message": f"User with ID {user_id} not found"
+        }), 404
+
+    changes, error = validate_preference_changes(data)
+    if error:
+        message, field = error
+        return jsonify({
+            "status": "error",
+            "message": message,
+            "field": field
+        }), 400
+
     try:
-        # Validate user exists and get user object
-        try:
-            user = User.objects.get(id=ObjectId(user_id))
-        except Exception as e:
-            logger.error(f"User lookup failed for ID {user_id}: {str(e)}")
-            raise DoesNotExist(f"User with ID {user_id} not found")
-
-        # Get existing preferences (created during user registration)
-        try:
-            preferences = Preferences.objects.get(user=user)
-        except DoesNotExist:
+        collection = Preferences._get_collection()
+        query = {'user': ObjectId(user_id)}
+
+        # One round trip: apply only the changed fields (or just read when nothing changed)
+        if changes:
+            row = collection.find_one_and_update(
+                query,
+                {'$set': {**changes, 'updated_at': datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+        else:
+            row = collection.find_one(query)
+
+        if row is None:
             logger.error(f"Preferences not found for user {user_id}")
-            raise DoesNotExist("User preferences not found. Please ensure the user is properly registered.")
+            raise DoesNotExist(f"Preferences not found for user {user_id}. Please ensure the user is properly registered.")
 
-        # Update fields if provided in the request
-        update_fields = []
-        
-        if 'skills' in data:
-            if not isinstance(data['skills'], list):
-                return jsonify({
-                    "status": "error",
-                    "message": "Skills must be a list of strings.",
-                    "field": "skills"
-                }), 400
-            preferences.skills = data['skills']
-            update_fields.append('skills')
-            
-        if 'interests' in data:
-            if not isinstance(data['interests'], list):
-                return jsonify({
-                    "status": "error",
-                    "message": "Interests must be a list of strings.",
-                    "field": "interests"
-                }), 400
-            preferences.interests = data['interests']
-            update_fields.append('interests')
-            
-        if 'location' in data:
-            if not isinstance(data['location'], str):
-                return jsonify({
-                    "status": "error",
-                    "message": "Location must be a string.",
-                    "field": "location"
-                }), 400
-            preferences.location = data['location']
-            update_fields.append('location')
-        
-        # Only update if there are changes
-        if update_fields:
-            preferences.updated_at = datetime.utcnow()
-            try:
-                preferences.save()
-                logger.info(f"Successfully updated preferences for user {user_id}. Updated fields: {', '.join(update_fields)}")
-            except (ValidationError, OperationError) as e:
-                logger.error(f"Failed to save preferences for user {user_id}: {str(e)}")
-                raise Exception("Failed to save preferences due to a database error.")
+        if changes:
+            recommendation_cache.invalidate_user(user_id)
+            logger.info(f"Successfully updated preferences for user {user_id}. Updated fields: {', '.join(changes)}")
         
         return jsonify({
             "status": "success",
             "message": "Preferences updated successfully.",
-            "updated_fields": update_fields,
-            "preferences": preferences.to_dict()
+            "updated_fields": list(changes),
+            "preferences": encoder_for(Preferences).from_row(row)
         }), 200
 
     except DoesNotExist as e:
@@ -120,16 +141,530 @@ def set_user_preferences():
             "message": str(e)
         }), 404
         
+    except Exception as e:
+        logger.critical(f"Unexpected error in set_user_preferences: {str(e)}", exc_info=True)
+        return jsonify({
+            "status": "error",
+            "message": "An unexpected server error occurred.",
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
+
+def bulk_set_user_preferences():
+    """
+    Endpoint to apply many preference updates (e.g. from an import) at once.
+
+    Request Body (JSON):
+        - updates (list): Required. Up to BULK_PREFERENCES_MAX objects shaped like
+          the set_user_preferences body ({userId, skills?, interests?, location?})
+
+    Every row is validated first, the existence of all targeted Preferences is
+    checked with one $in query, and all valid rows are applied with a single
+    unordered bulk_write of $set updates.
+
+    Returns:
+        JSON response with per-row results and matched/modified counts
+    """
+    if not request.is_json:
+        logger.warning("Invalid request: Content-Type must be application/json")
+        return jsonify({
+            "status": "error",
+            "message": "Content-Type must be application/json"
+        }), 400
+
+    # silent: malformed JSON or a non-object body gets the same 400 as a missing list
+    body = request.get_json(silent=True)
+    updates = body.get('updates') if isinstance(body, dict) else None
+    if not isinstance(updates, list) or not updates:
+        return jsonify({
+            "status": "error",
+            "message": "updates must be a non-empty list of preference objects.",
+            "field": "updates"
+        }), 400
+    if len(updates) > BULK_PREFERENCES_MAX:
+        return jsonify({
+            "status": "error",
+            "message": f"At most {BULK_PREFERENCES_MAX} updates per request.",
+            "field": "updates"
+        }), 400
+
+    # 1. Validate every row without touching the database
+    results, valid = [], []
+    for index, row in enumerate(updates):
+        user_id = row.get('userId') if isinstance(row, dict) else None
+        result = {"index": index, "userId": user_id}
+        results.append(result)
+        if not user_id or not ObjectId.is_valid(user_id):
+            result.update(status="error", message="A valid userId is required.")
+            continue
+        changes, error = validate_preference_changes(row)
+        if error:
+            result.update(status="error", message=error[0], field=error[1])
+        elif not changes:
+            result.update(status="skipped", message="No preference fields to update.")
+        else:
+            valid.append((index, ObjectId(user_id), changes))
+
+    try:
+        collection = Preferences._get_collection()
+
+        # 2. One query to find which users actually have a Preferences document
+        existing = {row['user'] for row in collection.find(
+            {'user': {'$in': list({oid for _, oid, _ in valid})}}, {'user': 1})}
+
+        # 3. One bulk_write for all applicable rows
+        now = datetime.utcnow()
+        operations, applied = [], []
+        for index, oid, changes in valid:
+            if oid not in existing:
+                results[index].update(status="error", message="Preferences not found for this user.")
+                continue
+            operations.append(UpdateOne({'user': oid}, {'$set': {**changes, 'updated_at': now}}))
+            applied.append(index)
+
+        matched = modified = 0
+        failed = {}
+        if operations:
+            try:
+                outcome = collection.bulk_write(operations, ordered=False)
+                matched, modified = outcome.matched_count, outcome.modified_count
+            except BulkWriteError as e:
+                matched, modified = e.details.get('nMatched', 0), e.details.get('nModified', 0)
+                failed = {err['index']: err.get('errmsg') for err in e.details.get('writeErrors', [])}
+
+        for position, index in enumerate(applied):
+            if position in failed:
+                results[index].update(status="error", message=f"Database error: {failed[position]}")
+            else:
+                results[index].update(status="success")
+                recommendation_cache.invalidate_user(results[index]['userId'])
+
+        succeeded = sum(1 for r in results if r['status'] == 'success')
+        logger.info(f"Bulk preferences import: {succeeded}/{len(updates)} applied ({modified} modified).")
+        return jsonify({
+            "status": "success" if succeeded == len(updates) else "partial",
+            "message": f"Applied {succeeded} of {len(updates)} preference updates.",
+            "matched": matched,
+            "modified": modified,
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.critical(f"Unexpected error in bulk_set_user_preferences: {str(e)}", exc_info=True)
+        return jsonify({
+            "status": "error",
+            "message": "An unexpected server error occurred.",
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
+
+# Listing endpoint tuning
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+# Full-text search paging limits
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_OFFSET = 1000
+SEARCH_MAX_QUERY_LENGTH = 200
+MATCH_DEFAULT_LIMIT = 10
+MATCH_MAX_LIMIT = 100
+LISTING_FIELDS = Internship.to_dict_fields
+
+
+def _parse_date_arg(name):
+    """Parses an optional ISO-8601 date query parameter; raises ValueError with the field name."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO-8601 date (e.g. 2024-05-01).")
+
+
+def _fields_arg():
+    """
+    Parses the optional fields= projection (comma-separated; id is always returned).
+    Returns (fields, None), or (None, 400 response) when it names unknown fields.
+    """
+    if not request.args.get('fields'):
+        return LISTING_FIELDS, None
+    fields = tuple(f.strip() for f in request.args['fields'].split(',') if f.strip() and f.strip() != 'id')
+    unknown = [f for f in fields if f not in LISTING_FIELDS]
+    if unknown:
+        return None, (jsonify({
+            "status": "error",
+            "message": f"Unknown fields: {', '.join(unknown)}.",
+            "allowed_fields": ['id'] + list(LISTING_FIELDS)
+        }), 400)
+    return fields, None
+
+
+def encode_cursor(row):
+    """Opaque keyset cursor pointing just after the given raw internship row."""
+    raw = json.dumps([row['posted_date'].isoformat(), str(row['_id'])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; returns (posted_date, ObjectId) or raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        posted_date, internship_id = json.loads(raw)
+        return datetime.fromisoformat(posted_date), ObjectId(internship_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor.")
+
+
+def _iter_internship_rows(ids, after, fields, limit):
+    """
+    Yields raw pymongo rows in (posted_date, _id) descending order.
+
+    ids is the ordered id list from the filter index, or None for the whole
+    catalog (served by the compound index on posted_date/_id). Nothing is
+    hydrated through MongoEngine and at most STREAM_BATCH_SIZE rows are held
+    at once, so memory stays flat however large the result is.
+    """
+    collection = Internship._get_collection()
+    projection = {field: 1 for field in fields}
+    projection['posted_date'] = 1  # always needed to build the next cursor
+
+    if ids is None:
+        query = {}
+        if after:
+            posted_date, internship_id = after
+            query = {'$or': [
+                {'posted_date': {'$lt': posted_date}},
+                {'posted_date': posted_date, '_id': {'$lt': internship_id}}
+            ]}
+        cursor = collection.find(query, projection).sort([('posted_date', -1), ('_id', -1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        yield from cursor.batch_size(STREAM_BATCH_SIZE)
+        return
+
+    if limit:
+        ids = ids[:limit]
+    for start in range(0, len(ids), STREAM_BATCH_SIZE):
+        chunk = ids[start:start + STREAM_BATCH_SIZE]
+        by_id = {row['_id']: row for row in collection.find({'_id': {'$in': chunk}}, projection)}
+        for internship_id in chunk:
+            if internship_id in by_id:
+                yield by_id[internship_id]
+
+
+def get_all_internships():
+    """
+    Endpoint to list internships, optionally filtered, paginated and streamed.
+
+    Query Parameters (all optional):
+        - skills (str): Comma-separated skills; may also be repeated
+        - skills_match (str): 'any' (default) or 'all'
+        - location (str): Location or city; may be repeated to accept several
+        - posted_after (str): ISO-8601 date, inclusive lower bound on posted_date
+        - posted_before (str): ISO-8601 date, inclusive upper bound on posted_date
+        - fields (str): Comma-separated subset of listing fields to return ('id' is always included)
+        - limit (int): Page size (max 500); enables keyset pagination
+        - cursor (str): Opaque 'next_cursor' from a previous page
+        - format (str): 'ndjson' streams one JSON document per line instead of a single payload
+
+    Filtered requests are answered from the in-process inverted index, so they
+    only fetch the matching documents instead of scanning the collection.
+    Results are ordered newest first by (posted_date, id).
+
+    Returns:
+        JSON response with status, count, internships and (when paginated) next_cursor,
+        or an application/x-ndjson stream when format=ndjson
+    """
+    skills = [s.strip() for raw in request.args.getlist('skills') for s in raw.split(',') if s.strip()]
+    locations = [l.strip() for l in request.args.getlist('location') if l.strip()]
+    skills_match = request.args.get('skills_match', 'any').lower()
+    stream = request.args.get('format', 'json').lower() == 'ndjson'
+
+    if skills_match not in ('any', 'all'):
+        return jsonify({
+            "status": "error",
+            "message": "skills_match must be either 'any' or 'all'.",
+            "field": "skills_match"
+        }), 400
+
+    fields, error = _fields_arg()
+    if error:
+        return error
+
+    try:
+        posted_after = _parse_date_arg('posted_after')
+        posted_before = _parse_date_arg('posted_before')
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        paginated = after is not None or 'limit' in request.args
+        limit = None
+        if paginated:
+            limit = request.args.get('limit', DEFAULT_PAGE_SIZE)
+            limit = int(limit) if str(limit).isdigit() else 0
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}.")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        ids = None
+        if skills or locations or posted_after or posted_before:
+            ids = internship_index.query(
+                skills=skills,
+                match_all=skills_match == 'all',
+                locations=locations,
+                posted_after=posted_after,
+                posted_before=posted_before,
+                before=after
+            )
+
+        to_listing = encoder_for(Internship, fields).from_row
+
+        if stream:
+            def generate():
+                for row in _iter_internship_rows(ids, after, fields, limit):
+                    yield json.dumps(to_listing(row)) + '\n'
+
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(_iter_internship_rows(ids, after, fields, limit + 1 if limit else None))
+        body = {"status": "success"}
+        if paginated:
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            body["next_cursor"] = encode_cursor(rows[-1]) if has_more else None
+
+        body["internships"] = [to_listing(row) for row in rows]
+        body["count"] = len(rows)
+        return jsonify(body), 200
+
+    except Exception as e:
+        logger.critical(f"Unexpected error in get_all_internships: {str(e)}", exc_info=True)
+        return jsonify({
+            "status": "error",
+            "message": "An unexpected server error occurred.",
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
+
+def _int_arg(name, default, low, high):
+    """Parses an optional integer query parameter within [low, high]; raises ValueError naming it."""
+    value = request.args.get(name, default)
+    if not str(value).isdigit() or not low <= int(value) <= high:
+        raise ValueError(f"{name} must be an integer between {low} and {high}.")
+    return int(value)
+
+
+def search_internships():
+    """
+    Endpoint for full-text search over internship title, company, location and skills.
+
+    Query Parameters:
+        - q (str): Required search text; terms match by prefix and tolerate one typo
+        - limit (int): Page size (default 20, max 100)
+        - offset (int): Results to skip (max 1000)
+        - fields (str): Comma-separated subset of listing fields to return ('id' is always included)
+
+    Served from the in-process BM25 index (services.search_index); only the
+    returned page is fetched from MongoDB.
+
+    Returns:
+        JSON response with status, query, total (matching listings), count and
+        internships ordered by descending relevance, each with its score
+    """
+    query = (request.args.get('q') or "").strip()
+    if not query:
+        return jsonify({"status": "error", "message": "Missing search text: q.", "field": "q"}), 400
+    if len(query) > SEARCH_MAX_QUERY_LENGTH:
+        return jsonify({
+            "status": "error",
+            "message": f"q must be at most {SEARCH_MAX_QUERY_LENGTH} characters.",
+            "field": "q"
+        }), 400
+
+    fields, error = _fields_arg()
+    if error:
+        return error
+
+    try:
+        limit = _int_arg('limit', SEARCH_DEFAULT_LIMIT, 1, SEARCH_MAX_LIMIT)
+        offset = _int_arg('offset', 0, 0, SEARCH_MAX_OFFSET)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        total, hits = search_index.search(query, limit=limit, offset=offset)
+
+        to_listing = encoder_for(Internship, fields).from_row
+        projection = {field: 1 for field in fields}
+        rows = {row['_id']: row for row in Internship._get_collection().find(
+            {'_id': {'$in': [internship_id for internship_id, _ in hits]}}, projection)}
+
+        internships = []
+        for internship_id, score in hits:
+            if internship_id in rows:
+                internships.append({**to_listing(rows[internship_id]), "score": score})
+
+        return jsonify({
+            "status": "success",
+            "query": query,
+            "total": total,
+            "count": len(internships),
+            "internships": internships
+        }), 200
+
+    except Exception as e:
+        logger.critical(f"Unexpected error in search_internships: {str(e)}", exc_info=True)
+        return jsonify({
+            "status": "error",
+            "message": "An unexpected server error occurred.",
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
+
+def match_internships(user_id):
+    """
+    Endpoint for local semantic matching of a user's profile against every listing.
+
+    Query Parameters:
+        - limit (int): Matches to return (default 10, max 100)
+
+    The user's resume (raw text and extracted skills) and preferences (skills,
+    interests) are compared with each internship as hashed TF-IDF vectors in
+    the shared memory-mapped matrix (services.semantic_index), so related skills
+    match without exact strings and without a Gemini call. Internships the user
+    applied to or dismissed are left out.
+
+    Returns:
+        JSON response with status, userId, count and internships ordered by
+        descending similarity (cosine, 0-1)
+    """
+    if not ObjectId.is_valid(user_id):
+        return jsonify({"status": "error", "message": "Invalid user ID format."}), 400
+
+    try:
+        limit = _int_arg('limit', MATCH_DEFAULT_LIMIT, 1, MATCH_MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        user_oid = ObjectId(user_id)
+        if not User.objects(id=user_oid).count():
+            return jsonify({"status": "error", "message": f"User with ID {user_id} not found."}), 404
+
+        preferences = Preferences.objects(user=user_oid).first()
+        resume = ResumeAnalysis.objects(user=user_oid).only('raw_text', 'skills_extracted').as_pymongo().first()
+        excluded = [row['internship'] for row in user_application_rows(user_oid) if row['status'] in EXCLUDED_FROM_RANKING]
+
+        hits = semantic_index.top_k(profile_fields(preferences.to_dict() if preferences else None, resume),
+                                    k=limit, exclude=excluded)
+
+        to_listing = encoder_for(Internship, LISTING_FIELDS).from_row
+        rows = {row['_id']: row for row in Internship._get_collection().find(
+            {'_id': {'$in': [internship_id for internship_id, _ in hits]}}, {field: 1 for field in LISTING_FIELDS})}
+        internships = [
+            {**to_listing(rows[internship_id]), "similarity": similarity}
+            for internship_id, similarity in hits if internship_id in rows
+        ]
+
+        return jsonify({
+            "status": "success",
+            "userId": user_id,
+            "count": len(internships),
+            "internships": internships
+        }), 200
+
+    except Exception as e:
+        logger.critical(f"Unexpected error in match_internships: {str(e)}", exc_info=True)
+        return jsonify({
+            "status": "error",
+            "message": "An unexpected server error occurred.",
+            "request_id": request.headers.get('X-Request-ID', 'none')
+        }), 500
+
+def create_internship():
+    """
+    Admin endpoint to create a new internship listing.
+
+    Request Body (JSON):
+        - title (str): Required
+        - company (str): Required
+        - location (str): Required
+        - skills_required (list, optional): List of required skills
+        - link (str, optional): Application URL
+        - capacity (int, optional): Seats available to the allocation run (default 1)
+
+    Returns:
+        JSON response with status, message, and the created internship
+    """
+    if not request.is_json:
+        logger.warning("Invalid request: Content-Type must be application/json")
+        return jsonify({
+            "status": "error",
+            "message": "Content-Type must be application/json"
+        }), 400
+
+    data = request.get_json()
+    missing = [field for field in ('title', 'company', 'location') if not data.get(field)]
+    if missing:
+        return jsonify({
+            "status": "error",
+            "message": f"Missing required fields: {', '.join(missing)}.",
+            "required_fields": ["title", "company", "location"],
+            "optional_fields": ["skills_required", "link", "capacity"]
+        }), 400
+
+    skills_required = data.get('skills_required', [])
+    if not isinstance(skills_required, list):
+        return jsonify({
+            "status": "error",
+            "message": "skills_required must be a list of strings.",
+            "field": "skills_required"
+        }), 400
+
+    capacity = data.get('capacity', 1)
+    if not isinstance(capacity, int) or isinstance(capacity, bool) or capacity < 0:
+        return jsonify({
+            "status": "error",
+            "message": "capacity must be a non-negative integer.",
+            "field": "capacity"
+        }), 400
+
+    try:
+        internship = Internship(
+            title=data['title'],
+            company=data['company'],
+            location=data['location'],
+            skills_required=skills_required,
+            link=data.get('link'),
+            capacity=capacity
+        ).save()
+
+        # Keep the filter, search and similarity indexes current without rebuilding them, and retire cached recommendations
+        internship_index.add(internship)
+        search_index.add(internship)
+        semantic_index.add(internship)
+        bump_catalog_version()
+
+        logger.info(f"Internship created: {internship.id} ({internship.title} @ {internship.company})")
+        return jsonify({
+            "status": "success",
+            "message": "Internship created successfully.",
+            "internship": internship.to_dict()
+        }), 201
+
     except ValidationError as e:
-        logger.error(f"Validation error in preferences update: {str(e)}")
+        logger.error(f"Validation error creating internship: {str(e)}")
         return jsonify({
             "status": "error",
             "message": "Invalid data format in request.",
             "details": str(e)
         }), 400
-        
+
     except Exception as e:
-        logger.critical(f"Unexpected error in set_user_preferences: {str(e)}", exc_info=True)
+        logger.critical(f"Unexpected error in create_internship: {str(e)}", exc_info=True)
         return jsonify({
             "status": "error",
             "message": "An unexpected server error occurred.",
@@ -1,17 +1,27 @@
 from flask import request, jsonify
 from mongoengine.errors import DoesNotExist, ValidationError
 from models import User, ResumeAnalysis
+from services.resume_cache import resume_cache
+from services.recommendation_cache import recommendation_cache
+from services.gemini_client import gemini_client
+from services.singleflight import SingleFlight
+from services.jobs import JobRunner, JobQueueFull
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import requests
-import json
 import os
+import time
 import logging
+from datetime import datetime
 from bson.objectid import ObjectId
 
 logging.basicConfig(level=logging.INFO)
 
-# Configuration
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent"
+# Bulk analysis limits
+BULK_MAX_ITEMS = int(os.getenv('RESUME_BULK_MAX_ITEMS', 1000))
+BULK_CONCURRENCY = int(os.getenv('RESUME_BULK_CONCURRENCY', 8))
+BULK_MAX_CONCURRENCY = 32
 
 # JSON Schema for Structured Output
 RESUME_ANALYSIS_SCHEMA = {
@@ -25,10 +35,89 @@ RESUME_ANALYSIS_SCHEMA = {
 }
 
 
+def request_gemini_analysis(resume_text):
+    """Calls Gemini for a structured analysis of resume_text and returns the parsed JSON."""
+    system_prompt = (
+        "You are a professional resume analyst for an internship allocation platform. "
+        "Extract critical information, generate a summary, and calculate a market readiness score. "
+        "You MUST respond ONLY with the requested JSON schema."
+    )
+    prompt = f"Analyze the following resume text:\n\n---\n{resume_text}"
+    
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "systemInstruction": {"parts": [{"text": system_prompt}]},
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": RESUME_ANALYSIS_SCHEMA,
+        }
+    }
+
+    return gemini_client.generate_json(payload)
+
+
+# Identical resumes analyzed concurrently (double submits, retries) share one Gemini call
+resume_flight = SingleFlight('resume_analysis')
+
+
+def obtain_analysis(resume_text):
+    """
+    Returns (analysis_data, cached): a stored analysis of identical text, or a
+    fresh Gemini one. Concurrent requests for the same normalized text wait on
+    a single Gemini call (resume_flight).
+    """
+    cache_key = resume_cache.key_for(resume_text, model=gemini_client.model)
+    analysis_data = resume_cache.get(cache_key)
+    if analysis_data is not None:
+        return analysis_data, True
+
+    def analyze():
+        analysis = request_gemini_analysis(resume_text)
+        resume_cache.put(cache_key, analysis)
+        return analysis
+
+    return resume_flight.do(cache_key, analyze), False
+
+
+def store_analysis(user, resume_text, analysis_data):
+    """Upserts the user's ResumeAnalysis and retires their cached recommendations."""
+    # Use modify(upsert=True) to either create a new document or update the existing one for this user
+    analysis = ResumeAnalysis.objects(user=user).modify(
+        upsert=True,
+        new=True,
+        set__raw_text=resume_text,
+        set__summary=analysis_data.get('summary'),
+        set__skills_extracted=analysis_data.get('skills_extracted'),
+        set__market_readiness_score=analysis_data.get('market_readiness_score'),
+        set__analysis_date=datetime.utcnow()
+    )
+    recommendation_cache.invalidate_user(user.id)
+    return analysis
+
+
+def run_resume_analysis_job(payload):
+    """Background job handler for POST /api/resume/analyze?async=1."""
+    user = User.objects.get(id=ObjectId(payload['userId']))
+    analysis_data, cached = obtain_analysis(payload['resumeText'])
+    analysis = store_analysis(user, payload['resumeText'], analysis_data)
+    logging.info(f"Resume analysis job saved/updated for user: {payload['userId']} (cache {'hit' if cached else 'miss'})")
+    return {"cached": cached, "analysis": analysis.to_dict()}
+
+
+resume_jobs = JobRunner(
+    'resume_analysis',
+    run_resume_analysis_job,
+    max_workers=int(os.getenv('RESUME_JOB_WORKERS', 4)),
+    max_pending=int(os.getenv('RESUME_JOB_MAX_PENDING', 200))
+)
+
+
 def analyze_resume():
     """
     POST /api/resume/analyze: Sends resume text to the Gemini API for analysis.
     Stores the structured result in the ResumeAnalysis collection.
+    With ?async=1 the analysis runs on a background worker pool and the endpoint
+    returns 202 with a job id to poll at GET /api/resume/jobs/<job_id>.
     """
     data = request.get_json()
     user_id = data.get('userId')
@@ -36,7 +125,7 @@ def analyze_resume():
 
     if not all([user_id, resume_text]):
         return jsonify({"status": "error", "message": "Missing required fields: userId and resumeText."}), 400
-    if not GEMINI_API_KEY:
+    if not gemini_client.is_configured:
         return jsonify({"status": "error", "message": "Server configuration error: Gemini API Key missing."}), 500
 
     try:
@@ -47,40 +136,28 @@ def analyze_resume():
     except Exception:
         return jsonify({"status": "error", "message": "Invalid user ID format."}), 400
 
-    # 2. Construct Gemini API Request Payload
-    system_prompt = (
-        "You are a professional resume analyst for an internship allocation platform. "
-        "Extract critical information, generate a summary, and calculate a market readiness score. "
-        "You MUST respond ONLY with the requested JSON schema."
-    )
-    prompt = f"Analyze the following resume text:\n\n---\n{resume_text}"
-    
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "systemInstruction": {"parts": [{"text": system_prompt}]},
-        "generationConfig": {
-            "responseMimeType": "application/json",
-            "responseSchema": RESUME_ANALYSIS_SCHEMA,
-        }
-    }
+    # 2. Hand the work to the background pool when the client asked for it
+    if request.args.get('async') in ('1', 'true'):
+        try:
+            job = resume_jobs.submit({"userId": user_id, "resumeText": resume_text})
+        except JobQueueFull:
+            return jsonify({"status": "error", "message": "Resume analysis queue is full. Please retry shortly."}), 503
+        except Exception as e:
+            logging.error(f"Failed to enqueue resume analysis for user {user_id}: {e}", exc_info=True)
+            return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
 
-    headers = {'Content-Type': 'application/json'}
-    
-    # 3. Call Gemini API
-    try:
-        response = requests.post(f"{GEMINI_API_URL}?key={GEMINI_API_KEY}", 
-                                 headers=headers, 
-                                 data=json.dumps(payload))
-        response.raise_for_status()
-        
-        gemini_result = response.json()
-        
-        # Safely extract the structured JSON string and parse it
-        json_string = gemini_result['candidates'][0]['content']['parts'][0]['text']
-        analysis_data = json.loads(json_string)
+        return jsonify({
+            "status": "accepted",
+            "message": "Resume analysis queued.",
+            "job_id": str(job.id),
+            "status_url": f"/api/resume/jobs/{job.id}"
+        }), 202
 
+    # 3. Reuse a previous analysis of identical text, otherwise ask Gemini
+    try:
+        analysis_data, cached = obtain_analysis(resume_text)
     except requests.exceptions.RequestException as e:
-        logging.error(f"Gemini API Request Failed: {e.response.status_code if e.response else 'No Response'}")
+        logging.error(f"Gemini API Request Failed: {e.response.status_code if e.response is not None else 'No Response'}")
         return jsonify({"status": "error", "message": "Failed to communicate with the Gemini API."}), 503
     except Exception as e:
         logging.error(f"Error processing Gemini response: {e}")
@@ -88,23 +165,169 @@ def analyze_resume():
 
     # 4. Save Analysis Result to MongoDB (upsert/replace existing)
     try:
-        # Use modify(upsert=True) to either create a new document or update the existing one for this user
-        analysis = ResumeAnalysis.objects(user=user).modify(
-            upsert=True,
-            new=True,
-            set__raw_text=resume_text,
-            set__summary=analysis_data.get('summary'),
-            set__skills_extracted=analysis_data.get('skills_extracted'),
-            set__market_readiness_score=analysis_data.get('market_readiness_score')
-        )
-
-        logging.info(f"Resume analysis saved/updated for user: {user_id}")
+        analysis = store_analysis(user, resume_text, analysis_data)
+
+        logging.info(f"Resume analysis saved/updated for user: {user_id} (cache {'hit' if cached else 'miss'})")
         return jsonify({
             "status": "success",
             "message": "Resume analyzed and saved.",
+            "cached": cached,
             "analysis": analysis.to_dict()
         }), 201
 
     except Exception as e:
         logging.error(f"Unexpected error saving analysis: {e}", exc_info=True)
         return jsonify({"status": "error", "message": "An unexpected server error occurred during save."}), 500
+
+
+def analyze_resumes_bulk(items, concurrency=None):
+    """
+    Analyzes many (userId, resumeText) pairs in one pass:
+    one $in query validates every user, Gemini calls fan out over a bounded
+    thread pool, and all successful results are written with a single
+    unordered bulk_write of upserts. Returns (results, summary), with one
+    result per input item in the original order.
+    """
+    started = time.monotonic()
+    results = [{"index": i, "userId": item.get('userId') if isinstance(item, dict) else None} for i, item in enumerate(items)]
+    pending = {}  # index -> (user ObjectId, resume_text)
+    seen_users = set()
+
+    # 1. Validate the shape of every item and all users with a single query
+    for result, item in zip(results, items):
+        user_id = result['userId']
+        resume_text = item.get('resumeText') if isinstance(item, dict) else None
+        if not user_id or not resume_text:
+            result.update(status="error", message="Missing required fields: userId and resumeText.")
+        elif not ObjectId.is_valid(user_id):
+            result.update(status="error", message="Invalid user ID format.")
+        elif user_id in seen_users:
+            result.update(status="error", message="Duplicate userId in batch.")
+        else:
+            seen_users.add(user_id)
+            pending[result['index']] = (ObjectId(user_id), resume_text)
+
+    existing = {row['_id'] for row in User.objects(
+        id__in=[oid for oid, _ in pending.values()]).only('id').as_pymongo()}
+    for index, (oid, _) in list(pending.items()):
+        if oid not in existing:
+            results[index].update(status="error", message=f"User with ID {oid} not found.")
+            del pending[index]
+
+    # 2. Fan out the Gemini calls (the shared client still caps in-flight calls per process)
+    analyses = {}
+    with ThreadPoolExecutor(max_workers=concurrency or BULK_CONCURRENCY) as pool:
+        futures = {pool.submit(obtain_analysis, text): index for index, (_, text) in pending.items()}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                analyses[index] = future.result()
+            except requests.exceptions.RequestException as e:
+                results[index].update(status="error", message=f"Failed to communicate with the Gemini API: {e}")
+            except Exception as e:
+                results[index].update(status="error", message=f"Failed to parse AI response: {e}")
+
+    # 3. Persist every analysis with one bulk_write of upserts
+    now = datetime.utcnow()
+    operations, written = [], []
+    for index, (analysis_data, cached) in analyses.items():
+        oid, resume_text = pending[index]
+        operations.append(UpdateOne({'user': oid}, {'$set': {
+            'raw_text': resume_text,
+            'summary': analysis_data.get('summary'),
+            'skills_extracted': analysis_data.get('skills_extracted') or [],
+            'market_readiness_score': analysis_data.get('market_readiness_score'),
+            'analysis_date': now
+        }}, upsert=True))
+        written.append((index, cached))
+
+    if operations:
+        try:
+            ResumeAnalysis._get_collection().bulk_write(operations, ordered=False)
+            for index, cached in written:
+                results[index].update(status="success", cached=cached)
+                recommendation_cache.invalidate_user(results[index]['userId'])
+        except BulkWriteError as e:
+            failed = {err['index']: err.get('errmsg') for err in e.details.get('writeErrors', [])}
+            for position, (index, cached) in enumerate(written):
+                if position in failed:
+                    results[index].update(status="error", message=f"Failed to save analysis: {failed[position]}")
+                else:
+                    results[index].update(status="success", cached=cached)
+                    recommendation_cache.invalidate_user(results[index]['userId'])
+
+    elapsed = time.monotonic() - started
+    succeeded = sum(1 for r in results if r.get('status') == 'success')
+    summary = {
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "llm_calls": sum(1 for _, cached in analyses.values() if not cached),
+        "elapsed_seconds": round(elapsed, 3),
+        "items_per_second": round(len(items) / elapsed, 2) if elapsed > 0 else None
+    }
+    return results, summary
+
+
+def analyze_resumes_bulk_endpoint():
+    """
+    POST /api/resume/analyze/bulk: Analyzes many resumes in one request.
+
+    Request Body (JSON):
+        - items (list): Required. [{"userId": str, "resumeText": str}, ...], at most BULK_MAX_ITEMS
+        - concurrency (int, optional): Parallel Gemini calls (default BULK_CONCURRENCY)
+
+    Returns per-item success/failure plus throughput figures.
+    """
+    # silent: malformed JSON or a non-object body gets the same 400 as a missing list
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"status": "error", "message": "items must be a non-empty list of {userId, resumeText} objects."}), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"status": "error", "message": f"At most {BULK_MAX_ITEMS} items per request."}), 400
+    if not gemini_client.is_configured:
+        return jsonify({"status": "error", "message": "Server configuration error: Gemini API Key missing."}), 500
+
+    concurrency = data.get('concurrency', BULK_CONCURRENCY)
+    if not isinstance(concurrency, int) or not 1 <= concurrency <= BULK_MAX_CONCURRENCY:
+        return jsonify({"status": "error", "message": f"concurrency must be an integer between 1 and {BULK_MAX_CONCURRENCY}."}), 400
+
+    try:
+        results, summary = analyze_resumes_bulk(items, concurrency=concurrency)
+    except Exception as e:
+        logging.error(f"Unexpected error during bulk resume analysis: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
+
+    logging.info(f"Bulk resume analysis: {summary}")
+    return jsonify({
+        "status": "success" if summary['failed'] == 0 else "partial",
+        "summary": summary,
+        "results": results
+    }), 200
+
+
+def get_resume_job(job_id):
+    """
+    GET /api/resume/jobs/<job_id>: Status of an asynchronous resume analysis
+    (queued, running, done or failed) and its result once done.
+    """
+    try:
+        job = resume_jobs.get(ObjectId(job_id))
+    except Exception:
+        return jsonify({"status": "error", "message": "Invalid job ID format."}), 400
+
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job with ID {job_id} not found."}), 404
+
+    return jsonify({"status": "success", "job": job.to_dict()}), 200
+
+
+def get_resume_cache_stats():
+    """
+    GET /api/resume/cache-stats: Hit/miss counters of the resume analysis cache
+    and request coalescing for this worker process, to measure how many Gemini
+    calls they save.
+    """
+    return jsonify({"status": "success", "data": {**resume_cache.stats(), "singleflight": resume_flight.stats()}}), 200
@@ -1,10 +1,19 @@
 from flask import request, jsonify
 from mongoengine.errors import NotUniqueError, ValidationError, DoesNotExist
 from models import User, Preferences
+from services.passwords import hash_password, hash_passwords
+from bson import ObjectId
+from datetime import datetime
+from pymongo.errors import BulkWriteError
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 
+# Bulk registration limits
+BULK_REGISTER_MAX = 5000
+BULK_INSERT_CHUNK = 1000
+
 def register_user():
     """
     Handles user registration. Requires name, email, and password.
@@ -19,8 +28,8 @@ def register_user():
     password = data.get('password')
 
     try:
-        # 1. Create the User
-        user = User(name=name, email=email, password=password)
+        # 1. Create the User (the password is hashed off-thread in the hashing process pool)
+        user = User(name=name, email=email, password=hash_password(password))
         user.save()
 
         # 2. Create the initial Preferences document
@@ -48,3 +57,128 @@ def register_user():
     except Exception as e:
         logging.error(f"Unexpected error during registration: {e}", exc_info=True)
         return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
+
+
+def register_users_bulk(rows, chunk_size=BULK_INSERT_CHUNK):
+    """
+    Registers many users at once and returns (results, summary).
+
+    Rows are validated and checked for duplicate emails (within the batch and,
+    with one $in query, against existing users). Passwords are hashed in
+    parallel in the hashing process pool, then users and their default
+    Preferences are written with chunked unordered insert_many calls; a user
+    whose Preferences insert fails is removed again and reported per row.
+    """
+    started = time.monotonic()
+    results = []
+    candidates = []  # (index, name, email, password)
+    seen = set()
+
+    # 1. Validate rows and detect duplicates inside the batch
+    for index, row in enumerate(rows):
+        result = {"index": index, "email": row.get('email') if isinstance(row, dict) else None}
+        results.append(result)
+        if not isinstance(row, dict) or not all(row.get(k) for k in ('name', 'email', 'password')):
+            result.update(status="error", message="Missing required fields: name, email, and password.")
+        elif not all(isinstance(row[k], str) for k in ('name', 'email', 'password')):
+            result.update(status="error", message="name, email, and password must be strings.")
+        elif row['email'] in seen:
+            result.update(status="error", message="Duplicate email in batch.")
+        else:
+            seen.add(row['email'])
+            candidates.append((index, row['name'], row['email'], row['password']))
+
+    # 2. One query for emails that are already registered
+    users = User._get_collection()
+    taken = {u['email'] for u in users.find({'email': {'$in': [c[2] for c in candidates]}}, {'email': 1})}
+    fresh = []
+    for candidate in candidates:
+        if candidate[2] in taken:
+            results[candidate[0]].update(status="error", message="User with this email already exists.")
+        else:
+            fresh.append(candidate)
+
+    # 3. Hash every password across the process pool
+    hash_started = time.monotonic()
+    hashes = hash_passwords(c[3] for c in fresh)
+    hash_seconds = time.monotonic() - hash_started
+
+    # 4. Chunked inserts: users first, then Preferences for the users that made it in
+    now = datetime.utcnow()
+    for start in range(0, len(fresh), chunk_size):
+        chunk = fresh[start:start + chunk_size]
+        docs = [{'_id': ObjectId(), 'name': name, 'email': email, 'password': password_hash}
+                for (_, name, email, _), password_hash in zip(chunk, hashes[start:start + chunk_size])]
+        failed = {}
+        try:
+            users.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Typically a concurrent registration of the same email (duplicate key 11000)
+            failed = {err['index']: err for err in e.details.get('writeErrors', [])}
+
+        inserted = []
+        for position, ((index, _, _, _), doc) in enumerate(zip(chunk, docs)):
+            if position in failed:
+                duplicate = failed[position].get('code') == 11000
+                results[index].update(status="error", message="User with this email already exists." if duplicate
+                                      else f"Database error: {failed[position].get('errmsg')}")
+            else:
+                results[index].update(status="success", user_id=str(doc['_id']))
+                inserted.append((index, doc['_id']))
+
+        if inserted:
+            failed = {}
+            try:
+                Preferences._get_collection().insert_many([
+                    {'user': user_oid, 'skills': [], 'interests': [], 'location': 'Remote', 'updated_at': now}
+                    for _, user_oid in inserted
+                ], ordered=False)
+            except BulkWriteError as e:
+                failed = {err['index']: err for err in e.details.get('writeErrors', [])}
+            if failed:
+                # A user without Preferences cannot get recommendations; remove it so the row can be retried
+                users.delete_many({'_id': {'$in': [inserted[position][1] for position in failed]}})
+                for position, err in failed.items():
+                    index = inserted[position][0]
+                    results[index] = {"index": index, "email": results[index]['email'], "status": "error",
+                                      "message": f"Database error creating preferences: {err.get('errmsg')}"}
+
+    elapsed = time.monotonic() - started
+    created = sum(1 for r in results if r.get('status') == 'success')
+    summary = {
+        "total": len(rows),
+        "created": created,
+        "failed": len(rows) - created,
+        "elapsed_seconds": round(elapsed, 3),
+        "hashing_seconds": round(hash_seconds, 3),
+        "users_per_second": round(created / elapsed, 2) if elapsed > 0 else None
+    }
+    return results, summary
+
+
+def register_users_bulk_endpoint():
+    """
+    Registers many users in one request (e.g. campus onboarding).
+    Body: {"users": [{"name", "email", "password"}, ...]} with at most BULK_REGISTER_MAX rows.
+    Each user gets a default Preferences document; duplicates are reported per row.
+    """
+    # silent: malformed JSON or a non-object body (e.g. the bare user list) gets the same 400 as a missing list
+    data = request.get_json(silent=True)
+    rows = data.get('users') if isinstance(data, dict) else None
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"status": "error", "message": "users must be a non-empty list of {name, email, password} objects."}), 400
+    if len(rows) > BULK_REGISTER_MAX:
+        return jsonify({"status": "error", "message": f"At most {BULK_REGISTER_MAX} users per request."}), 400
+
+    try:
+        results, summary = register_users_bulk(rows)
+    except Exception as e:
+        logging.error(f"Unexpected error during bulk registration: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": "An unexpected server error occurred."}), 500
+
+    logging.info(f"Bulk registration: {summary}")
+    return jsonify({
+        "status": "success" if summary['failed'] == 0 else "partial",
+        "summary": summary,
+        "results": results
+    }), 201 if summary['created'] else 200
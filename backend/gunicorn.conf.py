@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration: gunicorn "app:create_app()" (picked up automatically from backend/).
+
+Enables prometheus_client multiprocess mode so GET /metrics on any worker
+reports the sum over all workers.
+"""
+import os
+import shutil
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Must be set before the workers import prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(os.getenv('TMPDIR', '/tmp'), 'internx_prometheus'))
+
+
+def on_starting(server):
+    # Samples left over from a previous run would otherwise be summed in
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
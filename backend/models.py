@@ -1,24 +1,33 @@
-from mongoengine import Document, StringField, ListField, ReferenceField, DateTimeField, IntField, CASCADE
+from mongoengine import Document, StringField, ListField, ReferenceField, DateTimeField, IntField, FloatField, DictField, CASCADE
 from datetime import datetime
 
+from serialization import encoder_for, serialize
+
 # --- Utility Functions (for easy JSON serialization) ---
 
 def serialize_document(doc):
-    """Converts a MongoEngine document into a Python dictionary."""
-    data = doc.to_mongo().to_dict()
-    # Convert MongoDB ObjectId to string for JSON compatibility
-    data['id'] = str(data.pop('_id'))
-    
-    # Handle ReferenceFields
-    for field_name, field in doc._fields.items():
-        if isinstance(field, ReferenceField) and data.get(field_name):
-            data[field_name] = str(data[field_name])
-
-    return data
+    """Converts a MongoEngine document into a Python dictionary (all fields, references as id strings)."""
+    fields = [name for name in doc._fields_ordered if name != 'id']
+    return encoder_for(type(doc), fields, reference_suffix='').from_document(doc)
 
 
 # --- Core Models ---
 
+class User(Document):
+    """Core user model."""
+    name = StringField(required=True)
+    email = StringField(required=True, unique=True)
+    # Stores a werkzeug password hash (see services/passwords.py), never the plaintext
+    password = StringField(required=True)
+    
+    meta = {'collection': 'users'}
+    to_dict_fields = ('name', 'email')
+    
+    def to_dict(self):
+        """Custom dictionary representation for serialization."""
+        return serialize(self)
+
+
 class Preferences(Document):
     """User preferences used for AI matching and filtering."""
     # CASCADE ensures this is deleted if the User is deleted
@@ -29,35 +38,11 @@ class Preferences(Document):
     updated_at = DateTimeField(default=datetime.utcnow)
 
     meta = {'collection': 'preferences'}
+    to_dict_fields = ('user', 'skills', 'interests', 'location', 'updated_at')
     
     def to_dict(self):
-        """Custom dictionary representation for serialization."""
-        return {
-            "id": str(self.id),
-            "user_id": str(self.user.id),
-            "skills": self.skills,
-            "interests": self.interests,
-            "location": self.location,
-            "updated_at": self.updated_at.isoformat()
-        }
-
-
-class User(Document):
-    """Core user model."""
-    name = StringField(required=True)
-    email = StringField(required=True, unique=True)
-    # NOTE: In a real application, the password should be hashed (e.g., using Flask-Bcrypt)
-    password = StringField(required=True)
-    
-    meta = {'collection': 'users'}
-    
-    def to_dict(self):
-        """Custom dictionary representation for serialization."""
-        return {
-            "id": str(self.id),
-            "name": self.name,
-            "email": self.email,
-        }
+        """Custom dictionary representation for serialization (the user is not dereferenced)."""
+        return serialize(self)
 
 
 class Internship(Document):
@@ -68,22 +53,16 @@ class Internship(Document):
     skills_required = ListField(StringField(), default=list)
     link = StringField()
     applicants_count = IntField(default=0)
+    capacity = IntField(default=1, min_value=0) # Seats available to the global allocation run
     posted_date = DateTimeField(default=datetime.utcnow)
     
-    meta = {'collection': 'internships'}
+    # Compound index backing keyset pagination on (posted_date, _id)
+    meta = {'collection': 'internships', 'indexes': [('-posted_date', '-_id')]}
+    to_dict_fields = ('title', 'company', 'location', 'skills_required', 'link', 'applicants_count', 'capacity', 'posted_date')
 
     def to_dict(self):
         """Custom dictionary representation for serialization."""
-        return {
-            "id": str(self.id),
-            "title": self.title,
-            "company": self.company,
-            "location": self.location,
-            "skills_required": self.skills_required,
-            "link": self.link,
-            "applicants_count": self.applicants_count,
-            "posted_date": self.posted_date.isoformat()
-        }
+        return serialize(self)
 
 
 class ResumeAnalysis(Document):
@@ -97,14 +76,179 @@ class ResumeAnalysis(Document):
     analysis_date = DateTimeField(default=datetime.utcnow)
     
     meta = {'collection': 'resume_analysis'}
+    to_dict_fields = ('user', 'summary', 'skills_extracted', 'market_readiness_score', 'analysis_date')
+
+    def to_dict(self):
+        """Custom dictionary representation for serialization (the user is not dereferenced)."""
+        return serialize(self)
+
+
+class Application(Document):
+    """A user's action on an internship: applied to it, saved it for later, or dismissed it."""
+    STATUSES = ('applied', 'saved', 'dismissed')
+
+    user = ReferenceField(User, required=True, reverse_delete_rule=CASCADE)
+    internship = ReferenceField(Internship, required=True, reverse_delete_rule=CASCADE)
+    status = StringField(required=True, choices=STATUSES)
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    # One row per (user, internship); per-user lists are served newest first, optionally by status
+    meta = {
+        'collection': 'applications',
+        'indexes': [
+            {'fields': ['user', 'internship'], 'unique': True},
+            ('user', 'status', '-updated_at'),
+            ('user', '-updated_at'),
+        ]
+    }
+    to_dict_fields = ('user', 'internship', 'status', 'created_at', 'updated_at')
+
+    def to_dict(self):
+        """Custom dictionary representation for serialization (references are not dereferenced)."""
+        return serialize(self)
+
+
+class AllocationRun(Document):
+    """One global allocation run; its assignments live in the allocations collection."""
+    status = StringField(default='running', choices=('running', 'done', 'failed'))
+    params = DictField()
+    stats = DictField()
+    error = StringField()
+    started_at = DateTimeField(default=datetime.utcnow)
+    finished_at = DateTimeField()
+
+    meta = {'collection': 'allocation_runs', 'indexes': [('status', '-finished_at')]}
+    to_dict_fields = ('status', 'params', 'stats', 'error', 'started_at', 'finished_at')
 
     def to_dict(self):
         """Custom dictionary representation for serialization."""
+        return serialize(self)
+
+
+class Allocation(Document):
+    """A seat assigned to a user by an AllocationRun."""
+    run = ReferenceField(AllocationRun, required=True, reverse_delete_rule=CASCADE)
+    user = ReferenceField(User, required=True, reverse_delete_rule=CASCADE)
+    internship = ReferenceField(Internship, required=True, reverse_delete_rule=CASCADE)
+    score = FloatField()
+
+    meta = {'collection': 'allocations', 'indexes': [('run', 'user'), ('run', 'internship')]}
+    to_dict_fields = ('run', 'user', 'internship', 'score')
+
+    def to_dict(self):
+        """Custom dictionary representation for serialization (references are not dereferenced)."""
+        return serialize(self)
+
+
+class PrecomputedRecommendation(Document):
+    """Materialized top-N candidate internships (and optionally Gemini's picks) for one user."""
+    user = ReferenceField(User, required=True, unique=True, reverse_delete_rule=CASCADE)
+    candidates = ListField(DictField(), default=list) # [{internship, score}], best first
+    recommendations = DictField() # Gemini output generated from these candidates, if any
+    # Inputs the row was computed from; it is stale as soon as any of them changes
+    preferences_updated_at = DateTimeField()
+    analysis_date = DateTimeField()
+    application_updated_at = DateTimeField()
+    catalog_version = IntField() # Counter 'catalog_version' when the catalog was loaded
+    computed_at = DateTimeField()
+    generated_at = DateTimeField()
+
+    meta = {'collection': 'precomputed_recommendations'}
+
+
+class FlightLease(Document):
+    """Cross-worker single-flight lease: one worker computes key, the others wait for its result."""
+    key = StringField(primary_key=True)
+    owner = StringField(required=True) # token of the call holding the lease
+    status = StringField(default='running', choices=('running', 'done', 'failed'))
+    result = DictField()
+    expires_at = DateTimeField(required=True) # lease deadline while running, result retention once done
+
+    meta = {
+        'collection': 'flight_leases',
+        'indexes': [{'fields': ['expires_at'], 'expireAfterSeconds': 0}]
+    }
+
+
+class ResumeAnalysisCache(Document):
+    """Gemini resume analyses keyed by a content hash of the normalized resume text."""
+    content_hash = StringField(required=True, unique=True)
+    summary = StringField()
+    skills_extracted = ListField(StringField(), default=list)
+    market_readiness_score = IntField()
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    # Entries expire after 30 days so analyses eventually reflect model updates
+    meta = {
+        'collection': 'resume_analysis_cache',
+        'indexes': [{'fields': ['created_at'], 'expireAfterSeconds': 30 * 24 * 3600}]
+    }
+
+    def to_analysis(self):
+        """The cached fields in the same shape as the parsed Gemini response."""
         return {
-            "id": str(self.id),
-            "user_id": str(self.user.id),
             "summary": self.summary,
             "skills_extracted": self.skills_extracted,
-            "market_readiness_score": self.market_readiness_score,
-            "analysis_date": self.analysis_date.isoformat()
-        }
\ No newline at end of file
+            "market_readiness_score": self.market_readiness_score
+        }
+
+
+class Counter(Document):
+    """Named, atomically incremented counters (e.g. the internship catalog version)."""
+    name = StringField(required=True, unique=True)
+    value = IntField(default=0)
+
+    meta = {'collection': 'counters'}
+
+
+class Job(Document):
+    """Background job persisted in Mongo so it survives worker restarts."""
+    kind = StringField(required=True) # e.g. 'resume_analysis'
+    status = StringField(default='queued', choices=('queued', 'running', 'done', 'failed'))
+    payload = DictField()
+    result = DictField()
+    error = StringField()
+    attempts = IntField(default=0)
+    locked_until = DateTimeField() # lease held by the worker currently running the job
+    # Set to the kind while an exclusive job is queued or running; the unique index admits one per kind
+    exclusive_key = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'jobs', 'indexes': [
+        ('kind', 'status', 'locked_until'),
+        {'fields': ['exclusive_key'], 'unique': True, 'sparse': True}
+    ]}
+
+    def to_dict(self):
+        """Custom dictionary representation for serialization (the payload is not echoed back)."""
+        return {
+            "id": str(self.id),
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result or None,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat()
+        }
+
+
+class AnalyticsRollup(Document):
+    """Materialized system analytics; a single document read by GET /api/analytics."""
+    key = StringField(required=True, unique=True, default='global')
+    total_users = IntField(default=0)
+    total_listings = IntField(default=0)
+    total_active_listings = IntField(default=0)
+    total_applications_tracked = IntField(default=0)
+    skill_counts = ListField(DictField(), default=list) # [{"skill": str, "count": int}], all skills
+    sector_distribution = ListField(DictField(), default=list) # [{"sector": str, "count": int}]
+    watermarks = DictField() # {'settled_before': _id}: users/internships below it are folded into the settled_* fields
+    settled_users = IntField(default=0)
+    settled_listings = IntField(default=0)
+    settled_skill_counts = ListField(DictField(), default=list)
+    refreshing_until = DateTimeField() # lease so only one worker refreshes at a time
+    computed_at = DateTimeField()
+
+    meta = {'collection': 'analytics_rollup'}
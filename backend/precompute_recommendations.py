@@ -0,0 +1,101 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from mongoengine import connect
+
+# Ensure environment variables are loaded for MONGO_URI
+load_dotenv()
+
+# Per-process state, set up once by _init_worker
+_catalog = None
+
+
+def _init_worker(mongo_uri):
+    """Worker process initializer: its own MongoDB connection and one compiled internship catalog."""
+    global _catalog
+    connect(host=mongo_uri)
+    from services.allocation import load_catalog
+    _catalog = load_catalog()
+
+
+def _generate(row):
+    """Generates and stores Gemini recommendations for one freshly precomputed row."""
+    from controllers.allocation_controller import fetch_all_context, generate_recommendations
+    from services.precompute import save_recommendations
+
+    context = fetch_all_context(row['user'], candidate_ids=[c['internship'] for c in row['candidates']])
+    inputs = (row['preferences_updated_at'], row['analysis_date'], row['application_updated_at'])
+    recommendations, _ = generate_recommendations(context)
+    save_recommendations(row['user'], inputs, row['catalog_version'], recommendations)
+
+
+def _process_chunk(user_ids, top_n, generate, concurrency):
+    """Computes (and optionally generates) one chunk of users; returns (users, generated, failed)."""
+    from services.precompute import precompute_chunk
+
+    rows = precompute_chunk(user_ids, catalog=_catalog, top_n=top_n)
+    generated = failed = 0
+    if generate:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in as_completed([pool.submit(_generate, row) for row in rows]):
+                try:
+                    future.result()
+                    generated += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Generation failed: {e}", file=sys.stderr)
+    return len(rows), generated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute every user's top-N candidate internships (nightly batch) "
+                    "into the precomputed_recommendations collection.")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="Users per task")
+    parser.add_argument('--top-n', type=int, default=None,
+                        help="Candidates stored per user (default RECOMMENDATION_PRECOMPUTE_TOP_N or 25)")
+    parser.add_argument('--generate', action='store_true',
+                        help="Also call Gemini for each user, so /recommend can answer without a round trip")
+    parser.add_argument('--concurrency', type=int, default=4, help="Gemini calls in flight per process with --generate")
+    args = parser.parse_args()
+
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return 1
+    connect(host=MONGO_URI)
+
+    # Import after connecting, as seed.py does
+    from models import Preferences
+    from services.precompute import PRECOMPUTE_TOP_N
+
+    top_n = args.top_n or PRECOMPUTE_TOP_N
+    user_ids = [str(u) for u in Preferences.objects.scalar('user').no_dereference()]
+    chunks = [user_ids[i:i + args.chunk_size] for i in range(0, len(user_ids), args.chunk_size)]
+    print(f"Precomputing top-{top_n} candidates for {len(user_ids)} users in {len(chunks)} chunks "
+          f"on {args.processes} processes{' (with Gemini generation)' if args.generate else ''}...")
+
+    started = time.monotonic()
+    totals = {"users": 0, "generated": 0, "generation_failed": 0}
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(MONGO_URI,)) as pool:
+        futures = [pool.submit(_process_chunk, chunk, top_n, args.generate, args.concurrency) for chunk in chunks]
+        for future in as_completed(futures):
+            users, generated, failed = future.result()
+            totals["users"] += users
+            totals["generated"] += generated
+            totals["generation_failed"] += failed
+
+    totals["seconds"] = round(time.monotonic() - started, 2)
+    print(json.dumps(totals, indent=2))
+    return 0 if totals["generation_failed"] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,11 @@
 from flask import Blueprint
-from controllers.allocation_controller import get_recommendations
+from controllers.allocation_controller import (
+    get_recommendations,
+    stream_recommendations,
+    start_allocation_run,
+    get_allocation_job,
+    get_user_allocation
+)
 
 # Blueprint for the AI Allocation Assistant endpoints
 # Base path: /api/allocation
@@ -9,3 +15,19 @@ allocation_bp = Blueprint('allocation', __name__, url_prefix='/api/allocation')
 # Triggers the Gemini API to provide personalized internship recommendations,
 # suitability scores, and interview preparation questions.
 allocation_bp.route('/recommend', methods=['POST'])(get_recommendations)
+
+# POST /api/allocation/recommend/stream
+# Same as /recommend, streamed as Server-Sent Events: one event per recommendation as Gemini writes it.
+allocation_bp.route('/recommend/stream', methods=['POST'])(stream_recommendations)
+
+# POST /api/allocation/run
+# Starts a global capacity-constrained allocation of users to internship seats (async, 202).
+allocation_bp.route('/run', methods=['POST'])(start_allocation_run)
+
+# GET /api/allocation/jobs/<job_id>
+# Status and statistics of an allocation run.
+allocation_bp.route('/jobs/<job_id>', methods=['GET'])(get_allocation_job)
+
+# GET /api/allocation/users/<user_id>
+# The user's seat from the latest completed allocation run.
+allocation_bp.route('/users/<user_id>', methods=['GET'])(get_user_allocation)
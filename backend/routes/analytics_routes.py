@@ -1,11 +1,16 @@
 from flask import Blueprint
-from controllers.analytics_controller import get_analytics
+from controllers.analytics_controller import get_analytics, refresh_analytics
 
 # Blueprint for system analytics and aggregated data
 # Base path: /api/analytics
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
 # GET /api/analytics
-# Returns general system metrics (e.g., total users, top skills, internship count).
+# Returns general system metrics (e.g., total users, top skills, internship count)
+# from the precomputed rollup document.
 analytics_bp.route('/', methods=['GET'])(get_analytics)
 
+# POST /api/analytics/refresh
+# Refreshes the analytics rollup on demand (incremental; ?full=1 rebuilds it).
+analytics_bp.route('/refresh', methods=['POST'])(refresh_analytics)
+
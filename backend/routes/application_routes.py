@@ -0,0 +1,27 @@
+from flask import Blueprint
+from controllers.application_controller import (
+    apply_to_internship,
+    save_internship,
+    dismiss_internship,
+    get_user_applications
+)
+
+# Blueprint for tracking what users do with internships (apply / save / dismiss)
+# Base path: /api/applications
+application_bp = Blueprint('application', __name__, url_prefix='/api/applications')
+
+# POST /api/applications/apply
+# Marks an internship as applied to; atomically increments its applicants_count.
+application_bp.route('/apply', methods=['POST'])(apply_to_internship)
+
+# POST /api/applications/save
+# Saves an internship for later.
+application_bp.route('/save', methods=['POST'])(save_internship)
+
+# POST /api/applications/dismiss
+# Dismisses an internship; it is no longer recommended to the user.
+application_bp.route('/dismiss', methods=['POST'])(dismiss_internship)
+
+# GET /api/applications/<user_id>
+# Lists the user's applications, newest first (?status= filters, e.g. applied).
+application_bp.route('/<user_id>', methods=['GET'])(get_user_applications)
@@ -2,7 +2,10 @@ from flask import Blueprint
 from controllers.internship_controller import (
     create_internship,
     get_all_internships,
-    set_user_preferences
+    search_internships,
+    match_internships,
+    set_user_preferences,
+    bulk_set_user_preferences
 )
 
 # Blueprint for Internship Listings and User Preferences
@@ -10,9 +13,18 @@ from controllers.internship_controller import (
 internship_bp = Blueprint('internship', __name__, url_prefix='/api/internships')
 
 # GET /api/internships
-# Retrieves a list of all available internships.
+# Retrieves internships; optional skills/location/posted-date filters are served
+# from the in-process inverted index.
 internship_bp.route('/', methods=['GET'])(get_all_internships)
 
+# GET /api/internships/search?q=
+# Full-text (BM25, prefix and typo tolerant) search over title, company, location and skills.
+internship_bp.route('/search', methods=['GET'])(search_internships)
+
+# GET /api/internships/matches/<user_id>
+# Listings most similar to the user's resume and preferences (local TF-IDF cosine, no Gemini call).
+internship_bp.route('/matches/<user_id>', methods=['GET'])(match_internships)
+
 # POST /api/internships
 # Admin/Manual endpoint to create a new internship listing.
 internship_bp.route('/', methods=['POST'])(create_internship)
@@ -20,3 +32,7 @@ internship_bp.route('/', methods=['POST'])(create_internship)
 # POST /api/internships/preferences
 # Sets or updates the user's skills, interests, and location preferences.
 internship_bp.route('/preferences', methods=['POST'])(set_user_preferences)
+
+# POST /api/internships/preferences/bulk
+# Applies many preference updates (e.g. an import) in a single bulk write.
+internship_bp.route('/preferences/bulk', methods=['POST'])(bulk_set_user_preferences)
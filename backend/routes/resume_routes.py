@@ -2,7 +2,12 @@
 
 
 from flask import Blueprint
-from controllers.resume_controller import analyze_resume
+from controllers.resume_controller import (
+    analyze_resume,
+    analyze_resumes_bulk_endpoint,
+    get_resume_job,
+    get_resume_cache_stats
+)
 
 # Blueprint for Resume Analysis endpoints
 # Base path: /api/resume
@@ -11,3 +16,15 @@ resume_bp = Blueprint('resume', __name__, url_prefix='/api/resume')
 # POST /api/resume/analyze
 # Submits resume text for Gemini analysis, which extracts structured data and scores.
 resume_bp.route('/analyze', methods=['POST'])(analyze_resume)
+
+# POST /api/resume/analyze/bulk
+# Analyzes many (userId, resumeText) pairs with bounded Gemini fan-out and one bulk upsert.
+resume_bp.route('/analyze/bulk', methods=['POST'])(analyze_resumes_bulk_endpoint)
+
+# GET /api/resume/jobs/<job_id>
+# Polls the status/result of an analysis submitted with POST /api/resume/analyze?async=1.
+resume_bp.route('/jobs/<job_id>', methods=['GET'])(get_resume_job)
+
+# GET /api/resume/cache-stats
+# Reports resume analysis cache hits/misses for this worker process.
+resume_bp.route('/cache-stats', methods=['GET'])(get_resume_cache_stats)
@@ -1,5 +1,5 @@
 from flask import Blueprint
-from controllers.user_controller import register_user
+from controllers.user_controller import register_user, register_users_bulk_endpoint
 
 # Blueprint for User endpoints (Authentication and Profile creation)
 # Base path: /api/users
@@ -9,5 +9,9 @@ user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 # Registers a new user and automatically creates a default Preferences document.
 user_bp.route('/register', methods=['POST'])(register_user)
 
+# POST /api/users/register/bulk
+# Registers many users at once (chunked inserts, passwords hashed in a process pool).
+user_bp.route('/register/bulk', methods=['POST'])(register_users_bulk_endpoint)
+
 # NOTE: In a production app, you would add /login and /profile routes here.
 
@@ -0,0 +1,38 @@
+import argparse
+import json
+import os
+import sys
+from dotenv import load_dotenv
+from mongoengine import connect
+
+# Ensure environment variables are loaded for MONGO_URI
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Global capacity-constrained allocation of users to internship seats.")
+    parser.add_argument('--candidates', type=int, default=None,
+                        help="Candidate internships kept per user (default ALLOCATION_CANDIDATES or 20)")
+    parser.add_argument('--min-score', type=float, default=None,
+                        help="Minimum match score of an assignment (default ALLOCATION_MIN_SCORE or 0.05)")
+    args = parser.parse_args()
+
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return 1
+    connect(host=MONGO_URI)
+
+    # Import after connecting, as seed.py does
+    from services.allocation import ALLOCATION_CANDIDATES, ALLOCATION_MIN_SCORE, run_allocation
+
+    candidates = args.candidates if args.candidates is not None else ALLOCATION_CANDIDATES
+    min_score = args.min_score if args.min_score is not None else ALLOCATION_MIN_SCORE
+    print(f"Running allocation (candidates={candidates}, min_score={min_score})...")
+    stats = run_allocation(k=candidates, min_score=min_score)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
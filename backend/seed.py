@@ -1,6 +1,9 @@
+import argparse
 import os
 import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from mongoengine import connect, get_db
@@ -67,20 +70,18 @@ def seed_database():
 
     # Import models locally after connecting
     from models import User, Internship, Preferences, ResumeAnalysis
+    from werkzeug.security import generate_password_hash
 
     # 1. Clean up existing data (IMPORTANT: Use with caution in production)
     print("1. Cleaning up existing collections...")
-    User.drop_collection()
-    Internship.drop_collection()
-    Preferences.drop_collection()
-    ResumeAnalysis.drop_collection()
+    _drop_seeded_data()
     print("   Cleanup complete.")
 
     # 2. Insert Users and create initial Preferences
     print("2. Creating sample users and preferences...")
     for user_data in SAMPLE_USERS:
-        # Create User
-        user = User(**user_data).save()
+        # Create User (the password field only ever holds the hash)
+        user = User(**{**user_data, 'password': generate_password_hash(user_data['password'])}).save()
         
         # Create initial Preferences linked to the User
         Preferences(
@@ -97,6 +98,7 @@ def seed_database():
     for internship_data in SAMPLE_INTERNSHIPS:
         # Add random applicants count and posted date for realistic data
         internship_data['applicants_count'] = random.randint(5, 50)
+        internship_data['capacity'] = random.randint(1, 5)
         days_ago = random.randint(1, 60)
         internship_data['posted_date'] = datetime.utcnow() - timedelta(days=days_ago)
         Internship(**internship_data).save()
@@ -120,6 +122,254 @@ def seed_database():
 
     print("\n✅ Database Seeding Complete!")
 
+# --- Synthetic Data Generator ---
+# Produces production-scale datasets with a fixed random seed. Each chunk gets
+# its own RNG derived from (seed, kind, absolute position of its first document),
+# so the generated content does not depend on how many worker processes are used
+# and --append continues the dataset instead of repeating it.
+
+# Base sizes for --scale 1
+BASE_USERS = 10_000
+BASE_INTERNSHIPS = 1_000
+RESUME_ANALYSIS_RATIO = 0.4
+SYNTHETIC_PASSWORD = "password123"
+
+# Role archetypes: (title, skill pool); skills earlier in a pool are more common
+ROLES = [
+    ("Python Backend Developer", ["Python", "Flask", "Django", "REST APIs", "MongoDB", "PostgreSQL", "Docker", "Redis", "Celery"]),
+    ("Data Science", ["Python", "Pandas", "SQL", "Machine Learning", "NumPy", "Statistics", "Scikit-learn", "Tableau"]),
+    ("Frontend Development", ["JavaScript", "React", "HTML", "CSS", "TypeScript", "Tailwind CSS", "Redux", "Next.js"]),
+    ("Cloud Engineering", ["AWS", "Linux", "Docker", "Kubernetes", "Terraform", "Python", "CI/CD", "Azure"]),
+    ("Machine Learning", ["Python", "Machine Learning", "PyTorch", "TensorFlow", "Deep Learning", "NLP", "SQL"]),
+    ("Mobile App Development", ["Kotlin", "Java", "Android", "Flutter", "Swift", "Firebase", "REST APIs"]),
+    ("UX/UI Design", ["Figma", "UX/UI", "Prototyping", "User Research", "Adobe XD", "HTML", "CSS"]),
+    ("Business Analyst", ["Excel", "SQL", "Power BI", "Communication", "Tableau", "Statistics"]),
+    ("Java Backend Developer", ["Java", "Spring Boot", "SQL", "Microservices", "REST APIs", "Kafka", "Docker"]),
+    ("Cybersecurity", ["Networking", "Linux", "Python", "Security", "Cryptography", "Wireshark"]),
+]
+ROLE_WEIGHTS = [18, 15, 16, 9, 10, 8, 7, 7, 6, 4]
+
+LOCATIONS = ["Remote", "Bengaluru, KA", "Delhi, DL", "Mumbai, MH", "Hyderabad, TS", "Pune, MH",
+             "Chennai, TN", "Gurugram, HR", "Noida, UP", "Kolkata, WB", "Ahmedabad, GJ", "Jaipur, RJ"]
+LOCATION_WEIGHTS = [28, 16, 11, 10, 9, 7, 6, 5, 3, 2, 2, 1]
+
+SECTORS = ["FinTech", "AI/ML", "E-commerce", "HealthTech", "EdTech", "Design", "Gaming",
+           "Logistics", "Cybersecurity", "AgriTech", "CleanTech", "Media"]
+SECTOR_WEIGHTS = [16, 15, 12, 10, 9, 7, 6, 6, 5, 5, 5, 4]
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Rohan", "Saanvi", "Arjun",
+               "Priya", "Rahul", "Sneha", "Vikram", "Meera", "Karan", "Neha", "Aditi", "Siddharth", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Singh", "Iyer", "Reddy", "Gupta", "Nair", "Mehta", "Das",
+              "Khan", "Joshi", "Rao", "Bose", "Kulkarni", "Chopra", "Menon", "Agarwal", "Pillai", "Sinha"]
+COMPANY_PREFIXES = ["Tech", "Data", "Cloud", "Fin", "Health", "Edu", "Smart", "Green", "Quantum", "Pixel", "Nova", "Bright"]
+COMPANY_SUFFIXES = ["Fusion", "Labs", "Works", "Systems", "Nine", "Flow", "Soft", "Logic", "Hub", "Minds", "Stack", "Wave"]
+
+
+def _chunk_rng(seed, kind, start):
+    return random.Random(f"{seed}:{kind}:{start}")
+
+
+def _pick_skills(rng, pool, low, high):
+    """Samples skills from a role pool, favouring the pool's first (most common) entries."""
+    count = min(len(pool), rng.randint(low, high))
+    weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+    picked = []
+    while len(picked) < count:
+        skill = rng.choices(pool, weights)[0]
+        if skill not in picked:
+            picked.append(skill)
+    return picked
+
+
+def build_user_docs(rng, seed, start, count, password_hash, now=None):
+    """
+    Builds raw documents for users [start, start + count): returns
+    (users, preferences, resume_analyses) ready for insert_many.
+    """
+    from bson import ObjectId
+
+    now = now or datetime.utcnow()
+    users, preferences, analyses = [], [], []
+
+    for i in range(start, start + count):
+        user_id = ObjectId()
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        role, pool = rng.choices(ROLES, ROLE_WEIGHTS)[0]
+        skills = _pick_skills(rng, pool, 2, 6)
+        users.append({'_id': user_id, 'name': f"{first} {last}",
+                      'email': f"{first.lower()}.{last.lower()}.{seed}.{i}@synthetic.internx.dev",
+                      'password': password_hash})
+        preferences.append({
+            'user': user_id,
+            'skills': skills,
+            'interests': list(dict.fromkeys(rng.choices(SECTORS, SECTOR_WEIGHTS, k=rng.randint(1, 3)))),
+            'location': rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0],
+            'updated_at': now - timedelta(days=rng.randint(0, 180))
+        })
+        if rng.random() < RESUME_ANALYSIS_RATIO:
+            extracted = list(dict.fromkeys(skills + _pick_skills(rng, pool, 1, 3)))
+            analyses.append({
+                'user': user_id,
+                'raw_text': f"{first} {last} is a student interested in {role.lower()} roles, "
+                            f"with project experience in {', '.join(extracted)}.",
+                'summary': f"Aspiring {role.lower()} intern skilled in {', '.join(extracted[:3])}.",
+                'skills_extracted': extracted,
+                'market_readiness_score': max(1, min(100, int(rng.gauss(65, 15)))),
+                'analysis_date': now - timedelta(days=rng.randint(0, 90))
+            })
+
+    return users, preferences, analyses
+
+
+def build_internship_docs(rng, seed, start, count, now=None):
+    """Builds raw documents for internships [start, start + count)."""
+    now = now or datetime.utcnow()
+    internships = []
+
+    for i in range(start, start + count):
+        role, pool = rng.choices(ROLES, ROLE_WEIGHTS)[0]
+        company = rng.choice(COMPANY_PREFIXES) + rng.choice(COMPANY_SUFFIXES)
+        sector = rng.choices(SECTORS, SECTOR_WEIGHTS)[0]
+        title = f"{role} Intern" + (f" ({sector})" if rng.random() < 0.3 else "")
+        internships.append({
+            'title': title,
+            'company': company,
+            'location': rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0],
+            'skills_required': _pick_skills(rng, pool, 3, 6),
+            'link': f"https://{company.lower()}.example.com/jobs/{seed}-{i}",
+            'applicants_count': int(rng.lognormvariate(3, 1)),
+            # Mostly small cohorts (median ~5 seats) with a long tail of large programmes
+            'capacity': max(1, int(rng.lognormvariate(1.6, 0.8))),
+            # Skewed towards recent postings
+            'posted_date': now - timedelta(days=int(rng.expovariate(1 / 20.0)) % 120, minutes=rng.randint(0, 1439))
+        })
+
+    return internships
+
+
+def _connect_worker_db(mongo_uri, db_name):
+    from pymongo import MongoClient
+    client = MongoClient(mongo_uri)
+    return client[db_name] if db_name else client.get_default_database()
+
+
+def _drop_seeded_data():
+    """
+    Drops users, internships, preferences and resume analyses together with the
+    documents computed from or pointing at them (applications, allocation runs,
+    precomputed recommendations, analytics, in-flight results).
+    """
+    from models import (
+        Allocation, AllocationRun, AnalyticsRollup, Application, FlightLease, Internship, Preferences,
+        PrecomputedRecommendation, ResumeAnalysis, User
+    )
+
+    for model in (User, Internship, Preferences, ResumeAnalysis, Application, AllocationRun, Allocation,
+                  PrecomputedRecommendation, AnalyticsRollup, FlightLease):
+        model.drop_collection()
+
+
+def _generate_user_chunk(mongo_uri, db_name, seed, start, count, password_hash):
+    """Worker: inserts users [start, start + count) with their Preferences and some ResumeAnalysis docs."""
+    db = _connect_worker_db(mongo_uri, db_name)
+    users, preferences, analyses = build_user_docs(_chunk_rng(seed, 'users', start), seed, start, count, password_hash)
+    db.users.insert_many(users, ordered=False)
+    db.preferences.insert_many(preferences, ordered=False)
+    if analyses:
+        db.resume_analysis.insert_many(analyses, ordered=False)
+    return len(users), len(analyses)
+
+
+def _generate_internship_chunk(mongo_uri, db_name, seed, start, count):
+    """Worker: inserts internships [start, start + count)."""
+    db = _connect_worker_db(mongo_uri, db_name)
+    internships = build_internship_docs(_chunk_rng(seed, 'internships', start), seed, start, count)
+    db.internships.insert_many(internships, ordered=False)
+    return len(internships)
+
+
+def generate_synthetic(scale=1.0, seed=42, workers=None, chunk_size=5000, append=False):
+    """
+    Generates scale * (BASE_USERS users, BASE_INTERNSHIPS internships) plus
+    Preferences and ResumeAnalysis documents, inserting chunks of chunk_size
+    documents with insert_many from a pool of worker processes. With
+    append=True existing data is kept and numbering continues after it.
+    """
+    MONGO_URI = os.getenv('MONGO_URI')
+    if not MONGO_URI:
+        print("ERROR: MONGO_URI not found in .env file. Cannot connect to database.")
+        return
+
+    connect(host=MONGO_URI)
+    from models import User, Internship, Preferences, ResumeAnalysis, Counter
+    from werkzeug.security import generate_password_hash
+
+    db_name = get_db().name
+    if not append:
+        print("1. Cleaning up existing collections...")
+        _drop_seeded_data()
+    else:
+        print("1. Append mode: keeping existing data.")
+
+    # Make sure unique/compound indexes exist before the bulk load
+    for model in (User, Internship, Preferences, ResumeAnalysis):
+        model.ensure_indexes()
+
+    n_users, n_internships = int(BASE_USERS * scale), int(BASE_INTERNSHIPS * scale)
+    user_offset = User.objects.count() if append else 0
+    internship_offset = Internship.objects.count() if append else 0
+    # One hash shared by every synthetic account keeps generation I/O-bound
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+
+    print(f"2. Generating {n_users} users and {n_internships} internships "
+          f"(seed={seed}, workers={workers or os.cpu_count()}, chunk={chunk_size})...")
+    started = time.monotonic()
+    totals = {"users": 0, "resume_analyses": 0, "internships": 0}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start in range(0, n_users, chunk_size):
+            futures.append(pool.submit(_generate_user_chunk, MONGO_URI, db_name, seed,
+                                       user_offset + start, min(chunk_size, n_users - start), password_hash))
+        for start in range(0, n_internships, chunk_size):
+            futures.append(pool.submit(_generate_internship_chunk, MONGO_URI, db_name, seed,
+                                       internship_offset + start, min(chunk_size, n_internships - start)))
+
+        for future in as_completed(futures):
+            result = future.result()
+            if isinstance(result, tuple):
+                totals["users"] += result[0]
+                totals["resume_analyses"] += result[1]
+            else:
+                totals["internships"] += result
+
+    # Cached recommendations were computed against the old catalog
+    Counter.objects(name='catalog_version').update_one(upsert=True, inc__value=1)
+
+    elapsed = time.monotonic() - started
+    documents = totals["users"] * 2 + totals["resume_analyses"] + totals["internships"]
+    print(f"   Inserted {totals['users']} users (+ preferences), {totals['resume_analyses']} resume analyses, "
+          f"{totals['internships']} internships in {elapsed:.1f}s ({documents / max(elapsed, 1e-9):.0f} docs/s).")
+    print("\n✅ Synthetic Data Generation Complete!")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the InternX database.")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Generate a large synthetic dataset instead of the small sample data")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f"Scale factor: {BASE_USERS} users and {BASE_INTERNSHIPS} internships per unit")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (same seed => same data)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Documents per insert_many batch")
+    parser.add_argument('--append', action='store_true', help="Add to the existing dataset instead of dropping it")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    seed_database()
+    args = parse_args()
+    if args.synthetic:
+        generate_synthetic(scale=args.scale, seed=args.seed, workers=args.workers,
+                           chunk_size=args.chunk_size, append=args.append)
+    else:
+        seed_database()
     
\ No newline at end of file
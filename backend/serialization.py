@@ -0,0 +1,142 @@
+from datetime import date, datetime
+
+from bson import DBRef, ObjectId
+from flask.json.provider import DefaultJSONProvider
+from mongoengine import Document
+from mongoengine.fields import DateTimeField, ObjectIdField, ReferenceField
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is used otherwise
+    orjson = None
+
+# --- Field encoders ---
+
+def _identity(value):
+    return value
+
+
+def _encode_datetime(value):
+    return value.isoformat() if value is not None else None
+
+
+def _encode_object_id(value):
+    return str(value) if value is not None else None
+
+
+def _encode_reference(value):
+    """
+    Reads the referenced id without dereferencing: _data holds an ObjectId or
+    DBRef until the attribute is accessed, or the Document if one was assigned.
+    """
+    if value is None:
+        return None
+    if isinstance(value, Document):
+        return str(value.pk)
+    if isinstance(value, DBRef):
+        return str(value.id)
+    return str(value)
+
+
+def _encoder_for_field(field):
+    if isinstance(field, DateTimeField):
+        return _encode_datetime
+    if isinstance(field, ReferenceField):
+        return _encode_reference
+    if isinstance(field, ObjectIdField):
+        return _encode_object_id
+    return _identity
+
+
+class ModelEncoder:
+    """
+    Precompiled serializer for one model and field selection.
+
+    The (output key, attribute name, db field name, encoder) plan is built once
+    from the model's _fields, so serializing a document is a single pass over
+    a short list with no isinstance checks, no to_mongo() round trip and no
+    ReferenceField dereference.
+    """
+
+    def __init__(self, model, fields, reference_suffix='_id'):
+        self.model = model
+        self.plan = []
+        for name in fields:
+            field = model._fields[name]
+            output = name + reference_suffix if isinstance(field, ReferenceField) else name
+            self.plan.append((output, name, field.db_field, _encoder_for_field(field)))
+
+    def from_document(self, doc):
+        data = doc._data
+        result = {"id": str(data.get('id'))}
+        for output, name, _, encode in self.plan:
+            result[output] = encode(data.get(name))
+        return result
+
+    def from_row(self, row):
+        """Serializes a raw pymongo row (as_pymongo() / collection.find()) into the same shape."""
+        result = {"id": str(row['_id'])}
+        for output, _, db_field, encode in self.plan:
+            result[output] = encode(row.get(db_field))
+        return result
+
+
+_ENCODERS = {}
+
+
+def encoder_for(model, fields=None, reference_suffix='_id'):
+    """Returns the cached encoder for model; fields defaults to model.to_dict_fields."""
+    fields = tuple(fields) if fields is not None else model.to_dict_fields
+    key = (model, fields, reference_suffix)
+    encoder = _ENCODERS.get(key)
+    if encoder is None:
+        encoder = _ENCODERS[key] = ModelEncoder(model, fields, reference_suffix)
+    return encoder
+
+
+def serialize(doc):
+    """Public dictionary representation of a document (what to_dict() returns)."""
+    return encoder_for(type(doc)).from_document(doc)
+
+
+def serialize_rows(model, rows, fields=None):
+    """Lazily serializes raw pymongo rows of model, optionally restricted to fields."""
+    encode = encoder_for(model, fields).from_row
+    return (encode(row) for row in rows)
+
+
+# --- Flask JSON provider ---
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider registered in create_app: uses orjson when it is installed,
+    and understands ObjectId/datetime either way. Keys are not sorted.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
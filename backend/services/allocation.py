@@ -0,0 +1,276 @@
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+from models import Allocation, AllocationRun, Application, Internship, Preferences, ResumeAnalysis
+from services.ranker import (
+    INTEREST_WEIGHT, LOCATION_WEIGHT, SKILL_WEIGHT, build_profile, location_matches, normalize_skill, tokenize
+)
+from services.recommendation_cache import catalog_version
+
+# Candidate internships kept per user (edges of the sparse score matrix)
+ALLOCATION_CANDIDATES = int(os.getenv('ALLOCATION_CANDIDATES', 20))
+# Pairs scoring below this are never assigned
+ALLOCATION_MIN_SCORE = float(os.getenv('ALLOCATION_MIN_SCORE', 0.05))
+# Users scored per dense block (block x internships float32 scores in memory at once)
+SCORE_BLOCK_USERS = int(os.getenv('ALLOCATION_SCORE_BLOCK', 2048))
+WRITE_CHUNK = 5000
+# Completed runs kept (older runs and their allocations are deleted)
+KEEP_RUNS = int(os.getenv('ALLOCATION_KEEP_RUNS', 3))
+
+logger = logging.getLogger(__name__)
+
+
+def _csr(rows_of_terms, vocab, normalize):
+    """Binary (or 1/sqrt(len)-normalized) CSR matrix with one row per list of vocabulary terms."""
+    indptr, indices, data = [0], [], []
+    for terms in rows_of_terms:
+        columns = sorted({vocab[t] for t in terms if t in vocab})
+        indices.extend(columns)
+        weight = 1.0 / np.sqrt(len(terms)) if normalize and terms else 1.0
+        data.extend([weight] * len(columns))
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(vocab))
+    )
+
+
+class InternshipCatalog:
+    """
+    The internship side of the score matrix: normalized skill vectors, title /
+    company / skill token sets and location ids, compiled once per run with the
+    same features and weights as services.ranker.InternshipRanker. version is
+    the catalog version the rows were read at (None when unknown).
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.ids = []
+        skills, tokens, locations, capacity = [], [], [], []
+        for row in rows:
+            row_skills = sorted(set(normalize_skill(s) for s in row.get('skills_required') or []))
+            text = " ".join([row.get('title') or "", row.get('company') or ""] + row_skills)
+            self.ids.append(row['_id'])
+            skills.append(row_skills)
+            tokens.append(set(tokenize(text)))
+            locations.append((row.get('location') or "").strip().lower())
+            # Listings stored before capacity existed have one seat, like the model default
+            capacity.append(max(0, int(row.get('capacity', 1) or 0)))
+
+        self.skill_vocab = {s: i for i, s in enumerate(sorted({s for row in skills for s in row}))}
+        self.token_vocab = {t: i for i, t in enumerate(sorted({t for row in tokens for t in row}))}
+        self.location_vocab = {l: i for i, l in enumerate(dict.fromkeys(locations))}
+        self.capacity = np.asarray(capacity, dtype=np.int64)
+        self.index = {internship_id: i for i, internship_id in enumerate(self.ids)}
+
+        # Transposed once so each block is a single sparse (users x vocab) @ (vocab x internships) product
+        self.skills_t = _csr(skills, self.skill_vocab, normalize=True).T.tocsr()
+        self.tokens_t = _csr(tokens, self.token_vocab, normalize=False).T.tocsr()
+        self.location_ids = np.asarray([self.location_vocab[l] for l in locations], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_catalog():
+    # Read before the listings: a listing created meanwhile leaves the catalog marked as older
+    version = catalog_version()
+    rows = Internship.objects.only('id', 'title', 'company', 'location', 'skills_required', 'capacity').as_pymongo()
+    return InternshipCatalog(rows, version=version)
+
+
+def load_profiles():
+    """Returns (user_ids, profiles) for every user with Preferences, merged with their ResumeAnalysis."""
+    analyses = {
+        row['user']: row
+        for row in ResumeAnalysis.objects.only('user', 'skills_extracted').as_pymongo()
+    }
+    user_ids, profiles = [], []
+    for row in Preferences.objects.only('user', 'skills', 'interests', 'location').as_pymongo():
+        user_ids.append(row['user'])
+        profiles.append(build_profile(row, analyses.get(row['user'])))
+    return user_ids, profiles
+
+
+def load_dismissed(user_index, catalog):
+    """{user position: [internship positions]} the users dismissed; those pairs are never scored."""
+    dismissed = {}
+    for row in Application.objects(status='dismissed').only('user', 'internship').as_pymongo():
+        u, i = user_index.get(row['user']), catalog.index.get(row['internship'])
+        if u is not None and i is not None:
+            dismissed.setdefault(u, []).append(i)
+    return dismissed
+
+
+def candidate_scores(profiles, catalog, k=ALLOCATION_CANDIDATES, min_score=ALLOCATION_MIN_SCORE, excluded=None,
+                     require_capacity=True):
+    """
+    Scores every user against every internship in dense blocks of
+    SCORE_BLOCK_USERS rows and keeps each user's top k pairs scoring at least
+    min_score; excluded maps a user position to internship positions never to
+    return for that user. Listings without seats are skipped unless
+    require_capacity is False (recommendations rank every listing, like
+    services.ranker.InternshipRanker). Returns the sparse score matrix as COO
+    arrays (users, internships, scores).
+    """
+    n, m = len(profiles), len(catalog)
+    k = min(k, m)
+    if n == 0 or k == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    excluded = excluded or {}
+    user_locations = {}
+    user_location_ids = np.asarray(
+        [user_locations.setdefault(p['location'], len(user_locations)) for p in profiles], dtype=np.int32
+    )
+    # Location match resolved once per (user location, internship location) pair
+    location_table = np.array(
+        [[location_matches(u, l) for l in catalog.location_vocab] for u in user_locations], dtype=np.float32
+    ).reshape(len(user_locations), len(catalog.location_vocab))
+    unavailable = catalog.capacity <= 0 if require_capacity else np.zeros(m, dtype=bool)
+
+    out_users, out_internships, out_scores = [], [], []
+    for start in range(0, n, SCORE_BLOCK_USERS):
+        block = profiles[start:start + SCORE_BLOCK_USERS]
+        user_skills = _csr([sorted(p['skills']) for p in block], catalog.skill_vocab, normalize=True)
+        user_tokens = _csr([p['interest_tokens'] for p in block], catalog.token_vocab, normalize=False)
+
+        scores = SKILL_WEIGHT * (user_skills @ catalog.skills_t).toarray()
+        scores += INTEREST_WEIGHT * ((user_tokens @ catalog.tokens_t).toarray() > 0)
+        scores += LOCATION_WEIGHT * location_table[user_location_ids[start:start + len(block)]][:, catalog.location_ids]
+        scores[:, unavailable] = -1.0
+        for offset in range(len(block)):
+            if start + offset in excluded:
+                scores[offset, excluded[start + offset]] = -1.0
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        keep = top_scores >= min_score
+        rows = np.broadcast_to(np.arange(start, start + len(block))[:, None], top.shape)
+        out_users.append(rows[keep])
+        out_internships.append(top[keep])
+        out_scores.append(top_scores[keep].astype(np.float32))
+
+    return np.concatenate(out_users), np.concatenate(out_internships), np.concatenate(out_scores)
+
+
+def solve_assignment(users, internships, scores, capacity, n_users):
+    """
+    Maximum-total-score assignment of users to internship seats over the sparse
+    candidate edges; every user gets at most one seat, internship i at most
+    capacity[i]. Returns an array with each user's internship position or -1.
+
+    Internship i is expanded into min(capacity[i], candidate degree) seat columns,
+    and each user gets a private "unassigned" column, so a full matching of the
+    user rows always exists. Edge cost is 2 - score (unassigned costs 2), which
+    scipy's sparse LAPJV solver (min_weight_full_bipartite_matching) minimizes
+    exactly, i.e. the total score is maximized.
+    """
+    assignment = np.full(n_users, -1, dtype=np.int64)
+    if n_users == 0:
+        return assignment
+
+    degree = np.bincount(internships, minlength=len(capacity))
+    seats = np.minimum(capacity, degree)
+    seat_offset = np.concatenate([[0], np.cumsum(seats)])
+    total_seats = int(seat_offset[-1])
+
+    # One edge per (user, seat of a candidate internship)
+    repeats = seats[internships]
+    edge_users = np.repeat(users, repeats)
+    edge_rank = np.arange(int(repeats.sum())) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    edge_seats = np.repeat(seat_offset[internships], repeats) + edge_rank
+    edge_costs = np.repeat(2.0 - scores.astype(np.float64), repeats)
+
+    rows = np.concatenate([edge_users, np.arange(n_users)])
+    columns = np.concatenate([edge_seats, total_seats + np.arange(n_users)])
+    costs = np.concatenate([edge_costs, np.full(n_users, 2.0)])
+    graph = sparse.csr_matrix((costs, (rows, columns)), shape=(n_users, total_seats + n_users))
+
+    matched_rows, matched_columns = min_weight_full_bipartite_matching(graph)
+    real = matched_columns < total_seats
+    seat_owner = np.repeat(np.arange(len(capacity)), seats)
+    assignment[matched_rows[real]] = seat_owner[matched_columns[real]]
+    return assignment
+
+
+def _prune_old_runs(keep=KEEP_RUNS):
+    stale = AllocationRun.objects(status__in=('done', 'failed')).order_by('-started_at').skip(keep).scalar('id')
+    stale = list(stale)
+    if stale:
+        Allocation._get_collection().delete_many({'run': {'$in': stale}})
+        AllocationRun._get_collection().delete_many({'_id': {'$in': stale}})
+
+
+def run_allocation(k=ALLOCATION_CANDIDATES, min_score=ALLOCATION_MIN_SCORE):
+    """
+    Runs a global allocation over all users with Preferences and all internships,
+    streams the assignments into the allocations collection in chunks and
+    returns the run statistics (including run_id).
+    """
+    run = AllocationRun(params={"candidates_per_user": k, "min_score": min_score}).save()
+    timings = {}
+    try:
+        started = time.monotonic()
+        catalog = load_catalog()
+        user_ids, profiles = load_profiles()
+        dismissed = load_dismissed({user_id: i for i, user_id in enumerate(user_ids)}, catalog)
+        timings['load_seconds'] = round(time.monotonic() - started, 3)
+
+        started = time.monotonic()
+        users, internships, scores = candidate_scores(profiles, catalog, k=k, min_score=min_score, excluded=dismissed)
+        timings['score_seconds'] = round(time.monotonic() - started, 3)
+
+        started = time.monotonic()
+        assignment = solve_assignment(users, internships, scores, catalog.capacity, len(user_ids))
+        timings['solve_seconds'] = round(time.monotonic() - started, 3)
+
+        # Score of each assigned pair, looked up from the candidate edges
+        edge_score = dict(zip(zip(users.tolist(), internships.tolist()), scores.tolist()))
+        started = time.monotonic()
+        assigned = np.flatnonzero(assignment >= 0)
+        total_score = 0.0
+        collection = Allocation._get_collection()
+        for chunk_start in range(0, len(assigned), WRITE_CHUNK):
+            documents = []
+            for u in assigned[chunk_start:chunk_start + WRITE_CHUNK].tolist():
+                i = int(assignment[u])
+                score = edge_score[(u, i)]
+                total_score += score
+                documents.append({'run': run.id, 'user': user_ids[u], 'internship': catalog.ids[i],
+                                  'score': round(score, 4)})
+            collection.insert_many(documents, ordered=False)
+        timings['write_seconds'] = round(time.monotonic() - started, 3)
+
+        stats = {
+            "run_id": str(run.id),
+            "users": len(user_ids),
+            "internships": len(catalog),
+            "seats": int(catalog.capacity.sum()),
+            "candidate_edges": int(len(users)),
+            "assigned": int(len(assigned)),
+            "unassigned": int(len(user_ids) - len(assigned)),
+            "total_score": round(total_score, 4),
+            "mean_score": round(total_score / len(assigned), 4) if len(assigned) else 0.0,
+            **timings,
+        }
+        run.modify(set__status='done', set__stats=stats, set__finished_at=datetime.utcnow())
+        logger.info(f"Allocation run {run.id}: {stats}")
+        _prune_old_runs()
+        return stats
+
+    except Exception as e:
+        run.modify(set__status='failed', set__error=str(e), set__finished_at=datetime.utcnow())
+        raise
+
+
+def latest_run():
+    """The most recent completed AllocationRun, or None."""
+    return AllocationRun.objects(status='done').order_by('-finished_at').first()
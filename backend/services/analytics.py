@@ -0,0 +1,192 @@
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from models import AnalyticsRollup, Internship, Preferences, User
+from services.catch_up import settled_before
+
+ROLLUP_KEY = 'global'
+REFRESH_INTERVAL = timedelta(seconds=int(os.getenv('ANALYTICS_REFRESH_SECONDS', 300)))
+ACTIVE_LISTING_DAYS = int(os.getenv('ANALYTICS_ACTIVE_LISTING_DAYS', 90))
+TOP_SKILLS = 10
+REFRESH_LEASE = timedelta(minutes=5)
+
+
+def _id_range(low, high):
+    """Match stage selecting documents with low <= _id < high (either bound optional)."""
+    bounds = {}
+    if low is not None:
+        bounds['$gte'] = low
+    if high is not None:
+        bounds['$lt'] = high
+    return {'_id': bounds} if bounds else {}
+
+
+def _count_range(model, low, high):
+    rows = list(model._get_collection().aggregate([
+        {'$match': _id_range(low, high)},
+        {'$group': {'_id': None, 'count': {'$sum': 1}}}
+    ]))
+    return rows[0]['count'] if rows else 0
+
+
+def _skill_counts_range(low, high):
+    """Skill frequencies over internships with an _id in [low, high) ($unwind + $group)."""
+    pipeline = [
+        {'$match': _id_range(low, high)},
+        {'$unwind': '$skills_required'},
+        {'$group': {'_id': '$skills_required', 'count': {'$sum': 1}}}
+    ]
+    return {row['_id']: row['count'] for row in Internship._get_collection().aggregate(pipeline)}
+
+
+def _merge_counts(*counts):
+    merged = {}
+    for part in counts:
+        for skill, count in part.items():
+            merged[skill] = merged.get(skill, 0) + count
+    return merged
+
+
+def _skill_rows(counts):
+    return [{"skill": s, "count": c} for s, c in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+
+def _sector_distribution():
+    """Interest/sector frequencies across all Preferences (mutable, so recomputed every refresh)."""
+    pipeline = [
+        {'$unwind': '$interests'},
+        {'$group': {'_id': '$interests', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1, '_id': 1}}
+    ]
+    return [{"sector": row['_id'], "count": row['count']} for row in Preferences._get_collection().aggregate(pipeline)]
+
+
+def _listing_activity():
+    """Active listings (posted in the last ACTIVE_LISTING_DAYS) and total tracked applications."""
+    since = datetime.utcnow() - timedelta(days=ACTIVE_LISTING_DAYS)
+    rows = list(Internship._get_collection().aggregate([
+        {'$group': {
+            '_id': None,
+            'active': {'$sum': {'$cond': [{'$gte': ['$posted_date', since]}, 1, 0]}},
+            'applications': {'$sum': {'$ifNull': ['$applicants_count', 0]}}
+        }}
+    ]))
+    return (rows[0]['active'], rows[0]['applications']) if rows else (0, 0)
+
+
+def _acquire_lease():
+    """Atomically marks the rollup as being refreshed; returns it, or None if another worker holds the lease."""
+    now = datetime.utcnow()
+    AnalyticsRollup.objects(key=ROLLUP_KEY).update_one(upsert=True, set_on_insert__watermarks={})
+    return AnalyticsRollup.objects(key=ROLLUP_KEY).filter(
+        __raw__={'$or': [{'refreshing_until': None}, {'refreshing_until': {'$lt': now}}]}
+    ).modify(new=True, set__refreshing_until=now + REFRESH_LEASE)
+
+
+def _compute(rollup, full):
+    """
+    The rollup fields as of now. Users and internships with an _id below the
+    stored settled_before boundary are already counted in the settled_* fields;
+    the range up to the new boundary (see services.catch_up.settled_before) is
+    folded into them, and the unsettled tail above it is counted afresh each
+    time, so a late insert with a smaller _id is never skipped.
+    """
+    watermarks = dict(rollup.watermarks or {}) if rollup else {}
+    # Rollups written before the settled boundary existed are rebuilt once
+    full = full or 'settled_before' not in watermarks
+    previous = None if full else watermarks['settled_before']
+    boundary = settled_before()
+    if previous is not None and previous > boundary:
+        boundary = previous
+
+    settled_users = (0 if full else rollup.settled_users) + _count_range(User, previous, boundary)
+    settled_listings = (0 if full else rollup.settled_listings) + _count_range(Internship, previous, boundary)
+    settled_skills = _merge_counts(
+        {} if full else {row['skill']: row['count'] for row in rollup.settled_skill_counts},
+        _skill_counts_range(previous, boundary)
+    )
+
+    active, applications = _listing_activity()
+    return {
+        'total_users': settled_users + _count_range(User, boundary, None),
+        'total_listings': settled_listings + _count_range(Internship, boundary, None),
+        'total_active_listings': active,
+        'total_applications_tracked': applications,
+        'skill_counts': _skill_rows(_merge_counts(settled_skills, _skill_counts_range(boundary, None))),
+        'sector_distribution': _sector_distribution(),
+        'settled_users': settled_users,
+        'settled_listings': settled_listings,
+        'settled_skill_counts': _skill_rows(settled_skills),
+        'watermarks': {'settled_before': boundary},
+        'computed_at': datetime.utcnow(),
+    }
+
+
+def refresh_rollup(full=False):
+    """
+    Brings the rollup document up to date and returns it.
+
+    Append-only data (users, internships and their skills) is folded in
+    incrementally (see _compute), so a refresh only scans documents inserted
+    since the previous one. Mutable data (interests, applicant counts, the
+    active-listing window) is re-aggregated each time. full=True discards the
+    settled counts and rebuilds everything.
+
+    When another worker holds the refresh lease its rollup is returned as is,
+    unless none has ever been computed: the figures are then computed inline
+    (and left for the lease holder to store) rather than served as zeros.
+    """
+    rollup = _acquire_lease()
+    if rollup is None:
+        current = AnalyticsRollup.objects(key=ROLLUP_KEY).first()
+        if current is not None and current.computed_at is not None:
+            logging.info("Analytics refresh skipped: another worker is refreshing.")
+            return current
+        return AnalyticsRollup(key=ROLLUP_KEY, **_compute(None, full=True))
+
+    try:
+        fields = _compute(rollup, full)
+        rollup.modify(unset__refreshing_until=True, **{f"set__{name}": value for name, value in fields.items()})
+        logging.info(f"Analytics rollup refreshed ({fields['total_users']} users, {fields['total_listings']} listings).")
+        return rollup
+    except Exception:
+        AnalyticsRollup.objects(key=ROLLUP_KEY).update_one(unset__refreshing_until=True)
+        raise
+
+
+def refresh_in_background():
+    """Fire-and-forget refresh used when a reader finds the rollup stale."""
+    def run():
+        try:
+            refresh_rollup()
+        except Exception as e:
+            logging.error(f"Background analytics refresh failed: {e}", exc_info=True)
+
+    threading.Thread(target=run, name='analytics-refresh', daemon=True).start()
+
+
+def get_rollup():
+    """
+    Returns the precomputed rollup. The first call ever computes it inline;
+    afterwards a stale rollup is served as-is while a background refresh runs.
+    """
+    rollup = AnalyticsRollup.objects(key=ROLLUP_KEY).first()
+    if rollup is None or rollup.computed_at is None:
+        return refresh_rollup()
+    if datetime.utcnow() - rollup.computed_at > REFRESH_INTERVAL:
+        refresh_in_background()
+    return rollup
+
+
+if __name__ == '__main__':
+    # Scheduled refresh entry point, e.g. from cron: python -m services.analytics [--full]
+    from dotenv import load_dotenv
+    from mongoengine import connect
+
+    load_dotenv()
+    connect(host=os.getenv('MONGO_URI'))
+    result = refresh_rollup(full='--full' in sys.argv)
+    print(f"Analytics rollup refreshed at {result.computed_at.isoformat() if result and result.computed_at else 'n/a'}")
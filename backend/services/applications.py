@@ -0,0 +1,65 @@
+import logging
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from models import Application, Internship
+from services.recommendation_cache import recommendation_cache
+
+# Internships the user already acted on that should never be recommended again
+EXCLUDED_FROM_RANKING = ('applied', 'dismissed')
+
+# Application.status -> status enum of the recommendation response's appliedStatus list
+LEGACY_STATUS = {'applied': 'applied', 'saved': 'saved_for_later', 'dismissed': 'not_interested'}
+
+
+def set_application_status(user_id, internship_id, status):
+    """
+    Records the user's status for an internship and returns the previous status (or None).
+
+    The Application row is upserted with one find_one_and_update that returns the
+    document as it was before, so exactly one of several concurrent requests sees
+    the transition into (or out of) 'applied' and adjusts Internship.applicants_count
+    with a single $inc.
+    """
+    user_oid, internship_oid = ObjectId(user_id), ObjectId(internship_id)
+    now = datetime.utcnow()
+    collection = Application._get_collection()
+
+    for attempt in range(2):
+        try:
+            previous = collection.find_one_and_update(
+                {'user': user_oid, 'internship': internship_oid},
+                {'$set': {'status': status, 'updated_at': now}, '$setOnInsert': {'created_at': now}},
+                projection={'status': 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            break
+        except DuplicateKeyError:
+            # Two first-time upserts raced on the unique (user, internship) index; retry as an update
+            if attempt:
+                raise
+
+    previous_status = previous.get('status') if previous else None
+    delta = (status == 'applied') - (previous_status == 'applied')
+    if delta:
+        Internship._get_collection().update_one({'_id': internship_oid}, {'$inc': {'applicants_count': delta}})
+        logging.info(f"applicants_count {delta:+d} for internship {internship_id}")
+
+    if previous_status != status:
+        recommendation_cache.invalidate_user(user_id)
+    return previous_status
+
+
+def user_application_rows(user_id):
+    """Every (internship, status, updated_at) row of the user, from the (user, -updated_at) index."""
+    return list(
+        Application.objects(user=ObjectId(user_id))
+        .only('internship', 'status', 'updated_at')
+        .order_by('-updated_at')
+        .as_pymongo()
+    )
+
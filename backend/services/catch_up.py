@@ -0,0 +1,31 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+# ObjectIds only order inserts by their whole-second, client-side timestamp: ids made by other
+# processes in the same second (or by a host whose clock is behind) can sort below an id already
+# seen. Catch-up reads therefore start this far before the newest id seen and de-duplicate.
+CATCH_UP_OVERLAP = timedelta(seconds=int(os.getenv('CATCH_UP_OVERLAP_SECONDS', 120)))
+
+
+def overlap_start(last_id):
+    """Lowest _id a catch-up query after last_id must read again (None: read everything)."""
+    if last_id is None:
+        return None
+    return ObjectId.from_datetime(ObjectId(last_id).generation_time - CATCH_UP_OVERLAP)
+
+
+def catch_up_filter(last_id):
+    """Raw query selecting the documents inserted after last_id, plus the overlap window before it."""
+    start = overlap_start(last_id)
+    return {'_id': {'$gte': start}} if start is not None else {}
+
+
+def settled_before(now=None):
+    """
+    _id boundary below which no more inserts are expected (older than the overlap
+    window), for aggregates that fold ranges in once and cannot de-duplicate.
+    """
+    now = now or datetime.now(timezone.utc)
+    return ObjectId.from_datetime(now - CATCH_UP_OVERLAP)
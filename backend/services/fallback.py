@@ -0,0 +1,40 @@
+from services.ranker import build_profile, normalize_skill
+
+# Recommendations returned by the local fallback, like the Gemini response
+FALLBACK_COUNT = 3
+
+
+def local_recommendations(context, count=FALLBACK_COUNT):
+    """
+    Deterministic stand-in for the Gemini response, computed from a
+    fetch_all_context() result: the shortlist is re-ordered by the fraction of
+    each listing's skills_required the user has (Preferences plus resume skills),
+    ties keeping the local ranker's order, and the top count are returned in
+    the same shape as the model's recommendations. Missing skills become the
+    preparation material.
+    """
+    user_skills = build_profile(context['preferences'], context['resume_analysis'])['skills']
+
+    scored = []
+    for position, internship in enumerate(context['shortlist']):
+        required = {normalize_skill(s): s for s in internship.get('skills_required') or []}
+        matched = [name for skill, name in required.items() if skill in user_skills]
+        missing = [name for skill, name in required.items() if skill not in user_skills]
+        overlap = len(matched) / len(required) if required else 0.0
+        scored.append((-overlap, position, internship, matched, missing))
+    scored.sort(key=lambda row: (row[0], row[1]))
+
+    recommendations = []
+    for negative_overlap, _, internship, matched, missing in scored[:count]:
+        if matched:
+            reasoning = f"You already have {len(matched)} of the {len(matched) + len(missing)} skills this role asks for: {', '.join(matched)}."
+        else:
+            reasoning = "Closest match to your preferences among the available listings."
+        recommendations.append({
+            "internshipId": internship['id'],
+            "matchScore": round(-negative_overlap * 100, 1),
+            "reasoning": reasoning,
+            "preparationMaterials": [f"Build a small project using {skill}" for skill in missing[:3]]
+                                    or [f"Prepare to walk through your work with {', '.join(matched[:2]) or 'your core skills'}"],
+        })
+    return {"recommendations": recommendations}
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import record_gemini_call
+
+# Configuration
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', "gemini-2.5-flash")
+
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', 30))  # overall deadline per call, seconds
+GEMINI_CONNECT_TIMEOUT = float(os.getenv('GEMINI_CONNECT_TIMEOUT', 3))
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', 3))
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', 8))  # in-flight calls per process
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class GeminiOverloaded(requests.exceptions.RequestException):
+    """Raised when no concurrency slot frees up before the call's deadline."""
+
+
+class LatencyRecorder:
+    """Keeps the most recent call latencies and outcome counters for percentile reporting."""
+
+    def __init__(self, window=1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+
+    def record(self, seconds, ok, retries=0):
+        with self._lock:
+            self._samples.append(seconds)
+            self.calls += 1
+            self.retries += retries
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def stats(self):
+        p50, p99 = self.percentile(50), self.percentile(99)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client shared by every controller.
+
+    - one pooled keep-alive requests.Session, so TLS handshakes are reused
+    - an overall deadline per call (connect + read + retries + queueing)
+    - jittered exponential backoff on 429/5xx and connection errors, honouring Retry-After
+    - a semaphore capping in-flight calls, so a slow upstream cannot pin every worker thread
+    Failures surface as requests.exceptions.RequestException subclasses.
+    """
+
+    def __init__(self, api_key=GEMINI_API_KEY, base_url=GEMINI_BASE_URL, model=GEMINI_MODEL,
+                 timeout=GEMINI_TIMEOUT, max_retries=GEMINI_MAX_RETRIES, max_concurrency=GEMINI_MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.latency = LatencyRecorder()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Key travels as a header so it never shows up in logged URLs
+        self.session.headers.update({'Content-Type': 'application/json', 'x-goog-api-key': api_key or ''})
+
+    @property
+    def is_configured(self):
+        return bool(self.api_key)
+
+    def url_for(self, model=None, method='generateContent'):
+        return f"{self.base_url}/models/{model or self.model}:{method}"
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter: uniform in [0, 0.5 * 2^attempt], capped at 8s
+        return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+    def _acquire_slot(self, model, started, deadline):
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self.latency.record(time.monotonic() - started, ok=False)
+            record_gemini_call(model, time.monotonic() - started, 'overloaded')
+            raise GeminiOverloaded("Too many concurrent Gemini calls in this worker.")
+
+    def _post(self, url, payload, deadline, stream=False):
+        """
+        POSTs payload with retries until a non-retryable response arrives and
+        returns (response, retries); raises the last error once retries or the
+        deadline run out. With stream=True only the response headers are read.
+        """
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout("Gemini call exceeded its deadline.")
+            response = None
+            try:
+                response = self.session.post(
+                    url,
+                    data=json.dumps(payload),
+                    timeout=(min(GEMINI_CONNECT_TIMEOUT, remaining), remaining),
+                    stream=stream
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response, attempt
+                error = requests.exceptions.HTTPError(f"Gemini returned {response.status_code}", response=response)
+                response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+
+            delay = self._backoff(attempt, response)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                raise error
+            attempt += 1
+            logging.warning(f"Gemini call failed ({error}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def generate_content(self, payload, model=None, timeout=None):
+        """POSTs payload to :generateContent and returns the decoded response body."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        started = time.monotonic()
+        model = model or self.model
+        self._acquire_slot(model, started, deadline)
+
+        retries = 0
+        try:
+            response, retries = self._post(self.url_for(model), payload, deadline)
+            body = response.json()
+            self.latency.record(time.monotonic() - started, ok=True, retries=retries)
+            record_gemini_call(model, time.monotonic() - started, 'ok', body.get('usageMetadata'))
+            return body
+        except Exception:
+            self.latency.record(time.monotonic() - started, ok=False, retries=retries)
+            record_gemini_call(model, time.monotonic() - started, 'error')
+            raise
+        finally:
+            self._slots.release()
+
+    def stream_generate_content(self, payload, model=None, timeout=None):
+        """
+        POSTs payload to :streamGenerateContent?alt=sse and yields the text of each
+        response chunk as it arrives. Retries only happen before the first byte;
+        the overall deadline still bounds the whole stream. The concurrency slot
+        is held until the generator is exhausted or closed.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        started = time.monotonic()
+        model = model or self.model
+        self._acquire_slot(model, started, deadline)
+
+        retries, usage, outcome = 0, None, 'error'
+        try:
+            response, retries = self._post(
+                self.url_for(model, 'streamGenerateContent') + '?alt=sse', payload, deadline, stream=True
+            )
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout("Gemini stream exceeded its deadline.")
+                    if not line or not line.startswith('data:'):
+                        continue
+                    chunk = json.loads(line[len('data:'):])
+                    usage = chunk.get('usageMetadata') or usage
+                    for candidate in chunk.get('candidates') or []:
+                        for part in (candidate.get('content') or {}).get('parts') or []:
+                            if part.get('text'):
+                                yield part['text']
+            outcome = 'ok'
+        except GeneratorExit:
+            # The consumer stopped reading (e.g. the client disconnected)
+            outcome = 'cancelled'
+            raise
+        finally:
+            self._slots.release()
+            self.latency.record(time.monotonic() - started, ok=outcome == 'ok', retries=retries)
+            record_gemini_call(model, time.monotonic() - started, outcome, usage)
+
+    def generate_json(self, payload, model=None, timeout=None):
+        """Calls generate_content and parses the JSON text of the first candidate."""
+        gemini_result = self.generate_content(payload, model=model, timeout=timeout)
+        json_string = gemini_result['candidates'][0]['content']['parts'][0]['text']
+        return json.loads(json_string)
+
+    def stats(self):
+        return {"model": self.model, **self.latency.stats()}
+
+
+# Shared instance used by all controllers
+gemini_client = GeminiClient()
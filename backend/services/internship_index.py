@@ -0,0 +1,146 @@
+import bisect
+import logging
+import threading
+from datetime import datetime
+
+from services.catch_up import catch_up_filter
+from services.ranker import normalize_skill
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_location(location):
+    """Canonical location key, e.g. ' New York, NY ' -> 'new york, ny'."""
+    return " ".join(str(location).lower().split())
+
+
+def _location_keys(location):
+    """A listing is reachable by its full location and by its leading city ('new york')."""
+    full = normalize_location(location)
+    keys = {full}
+    city = full.split(',')[0].strip()
+    if city:
+        keys.add(city)
+    return keys
+
+
+class InternshipIndex:
+    """
+    In-process inverted index over the internship catalog.
+
+    Posting lists map a normalized skill / location to the set of internship ids
+    carrying it, and parallel posted_date / id lists kept sorted with bisect
+    answer date-window queries. The index is loaded lazily on first use and then kept
+    current incrementally: create_internship calls add(), and every query first
+    pulls the listings with an _id in the catch-up window (from shortly before
+    the highest one seen), so inserts made by other worker processes are picked
+    up with a single indexed query.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._by_skill = {}
+        self._by_location = {}
+        self._dates = []
+        self._date_ids = []
+        self._posted = {}
+        self._last_id = None
+
+    def __len__(self):
+        return len(self._posted)
+
+    def _add_locked(self, internship_id, skills, location, posted_date, insert_date=True):
+        if internship_id in self._posted:
+            return
+        posted_date = posted_date or datetime.min
+        self._posted[internship_id] = posted_date
+        for skill in set(normalize_skill(s) for s in skills or []):
+            self._by_skill.setdefault(skill, set()).add(internship_id)
+        for key in _location_keys(location or ""):
+            self._by_location.setdefault(key, set()).add(internship_id)
+        if insert_date:
+            pos = bisect.bisect_right(self._dates, posted_date)
+            self._dates.insert(pos, posted_date)
+            self._date_ids.insert(pos, internship_id)
+        if self._last_id is None or internship_id > self._last_id:
+            self._last_id = internship_id
+
+    def add(self, internship):
+        """Indexes a single Internship document (called right after it is saved)."""
+        with self._lock:
+            if self._loaded:
+                self._add_locked(internship.id, internship.skills_required, internship.location, internship.posted_date)
+
+    def _sync(self):
+        """
+        Loads the catalog on first use, afterwards only the listings in the
+        catch-up window (see services.catch_up), skipping those already indexed.
+        """
+        from models import Internship
+
+        with self._lock:
+            query = Internship.objects.only('id', 'skills_required', 'location', 'posted_date')
+            if not self._loaded:
+                # One sort of the date list instead of an insort per listing
+                for row in query.as_pymongo():
+                    self._add_locked(row['_id'], row.get('skills_required'), row.get('location'),
+                                     row.get('posted_date'), insert_date=False)
+                pairs = sorted(self._posted.items(), key=lambda item: (item[1], item[0]))
+                self._date_ids = [internship_id for internship_id, _ in pairs]
+                self._dates = [posted for _, posted in pairs]
+                self._loaded = True
+                logger.info(f"Internship index built with {len(self._posted)} listings.")
+                return
+            for row in query.filter(__raw__=catch_up_filter(self._last_id)).as_pymongo():
+                self._add_locked(row['_id'], row.get('skills_required'), row.get('location'), row.get('posted_date'))
+
+    def query(self, skills=None, match_all=False, locations=None, posted_after=None, posted_before=None, before=None):
+        """
+        Returns the ids of matching internships, newest first.
+
+        skills: any (default) or all (match_all=True) of the given skills must be required.
+        locations: the listing must be in one of the given locations (full string or city).
+        posted_after / posted_before: inclusive posted_date window.
+        before: optional (posted_date, id) keyset; only strictly older listings are returned.
+        """
+        self._sync()
+        with self._lock:
+            candidates = None
+
+            if skills:
+                postings = [self._by_skill.get(normalize_skill(s), set()) for s in skills]
+                if match_all:
+                    postings.sort(key=len)
+                    candidates = set(postings[0]).intersection(*postings[1:])
+                else:
+                    candidates = set().union(*postings)
+
+            if locations:
+                located = set().union(*(self._by_location.get(normalize_location(l), set()) for l in locations))
+                candidates = located if candidates is None else candidates & located
+
+            if posted_after or posted_before:
+                if candidates is not None and len(candidates) < len(self._dates) // 4:
+                    # Small candidate set: check dates per hit instead of slicing the date list
+                    candidates = {
+                        i for i in candidates
+                        if (not posted_after or self._posted[i] >= posted_after)
+                        and (not posted_before or self._posted[i] <= posted_before)
+                    }
+                else:
+                    lo = bisect.bisect_left(self._dates, posted_after) if posted_after else 0
+                    hi = bisect.bisect_right(self._dates, posted_before) if posted_before else len(self._dates)
+                    window = set(self._date_ids[lo:hi])
+                    candidates = window if candidates is None else candidates & window
+
+            if candidates is None:
+                candidates = self._posted.keys()
+            if before:
+                candidates = [i for i in candidates if (self._posted[i], i) < before]
+
+            return sorted(candidates, key=lambda i: (self._posted[i], i), reverse=True)
+
+
+# Process-wide index shared by the internship controller
+internship_index = InternshipIndex()
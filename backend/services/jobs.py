@@ -0,0 +1,164 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from mongoengine.errors import NotUniqueError
+
+from models import Job
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when a runner already has max_pending jobs waiting in this process,
+    or, for an exclusive runner, a job of its kind is queued or running anywhere.
+    """
+
+
+class JobRunner:
+    """
+    Bounded background worker pool for one kind of Mongo-persisted job.
+
+    submit() stores the job as 'queued' and hands its id to a thread pool. A
+    worker claims it with an atomic find-and-modify that sets a lease
+    (locked_until), runs handler(payload) and stores the result or error.
+    Jobs left 'queued', or 'running' with an expired lease, by a worker that
+    died are picked up again by recover(), which runs once per process.
+
+    With exclusive=True at most one job of the kind is queued or running across
+    all worker processes: the job holds exclusive_key (unique index) until it
+    finishes, so a concurrent submit() fails atomically with JobQueueFull.
+    """
+
+    def __init__(self, kind, handler, max_workers=4, max_pending=100, lease_seconds=300, max_attempts=3,
+                 exclusive=False):
+        self.kind = kind
+        self.exclusive = exclusive
+        self.handler = handler
+        self.max_pending = max_pending
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"job-{kind}")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._recovered = False
+
+    def _dispatch(self, job_id):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending '{self.kind}' jobs.")
+            self._pending += 1
+        self._pool.submit(self._run, job_id)
+
+    def submit(self, payload):
+        """Persists a new job and schedules it; returns the Job document."""
+        self.recover()
+        job = self._insert(payload)
+        try:
+            self._dispatch(job.id)
+        except JobQueueFull:
+            job.delete()
+            raise
+        return job
+
+    def _insert(self, payload):
+        if not self.exclusive:
+            return Job(kind=self.kind, payload=payload).save()
+        for _ in range(2):
+            try:
+                return Job(kind=self.kind, payload=payload, exclusive_key=self.kind).save(force_insert=True)
+            except NotUniqueError:
+                if not self._release_dead_holder():
+                    break
+        raise JobQueueFull(f"A '{self.kind}' job is already queued or running.")
+
+    def _release_dead_holder(self):
+        """
+        Frees exclusive_key from a holder whose worker died: it is failed once
+        its attempts are used up (True, the insert can be retried), otherwise
+        re-dispatched here so it resumes (False).
+        """
+        holder = Job.objects(exclusive_key=self.kind).first()
+        if holder is None:
+            return True
+        now = datetime.utcnow()
+        if holder.status == 'running' and holder.locked_until and holder.locked_until < now:
+            if holder.attempts >= self.max_attempts:
+                released = Job.objects(id=holder.id, status='running', locked_until__lt=now).update_one(
+                    set__status='failed', set__error="Worker died while running the job; attempts exhausted.",
+                    unset__locked_until=True, unset__exclusive_key=True, set__updated_at=now
+                )
+                return bool(released)
+            self._try_dispatch(holder.id)
+        elif holder.status == 'queued':
+            self._try_dispatch(holder.id)
+        return False
+
+    def _try_dispatch(self, job_id):
+        try:
+            self._dispatch(job_id)
+        except JobQueueFull:
+            pass
+
+    def get(self, job_id):
+        self.recover()
+        return Job.objects(id=job_id, kind=self.kind).first()
+
+    def _claim(self, job_id):
+        now = datetime.utcnow()
+        claimable = Job.objects(id=job_id, kind=self.kind).filter(
+            __raw__={'$or': [{'status': 'queued'}, {'status': 'running', 'locked_until': {'$lt': now}}]}
+        )
+        return claimable.modify(
+            new=True,
+            set__status='running',
+            set__locked_until=now + self.lease,
+            set__updated_at=now,
+            inc__attempts=1
+        )
+
+    def _run(self, job_id):
+        try:
+            job = self._claim(job_id)
+            if job is None:
+                return  # finished or currently leased by another worker
+            try:
+                result = self.handler(job.payload)
+                job.modify(set__status='done', set__result=result or {}, unset__locked_until=True,
+                           unset__exclusive_key=True, set__updated_at=datetime.utcnow())
+            except Exception as e:
+                logging.error(f"Job {job_id} ({self.kind}) failed on attempt {job.attempts}: {e}", exc_info=True)
+                job.modify(set__status='failed', set__error=str(e), unset__locked_until=True,
+                           unset__exclusive_key=True, set__updated_at=datetime.utcnow())
+        except Exception as e:
+            logging.error(f"Job {job_id} ({self.kind}) could not be processed: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def recover(self):
+        """Re-dispatches jobs orphaned by a previous worker process (runs once per process)."""
+        if self._recovered:
+            return
+        self._recovered = True
+        try:
+            Job.objects(kind=self.kind, status='running', attempts__gte=self.max_attempts,
+                        locked_until__lt=datetime.utcnow()).update(
+                set__status='failed', set__error="Worker died while running the job; attempts exhausted.",
+                unset__locked_until=True, unset__exclusive_key=True, set__updated_at=datetime.utcnow()
+            )
+            orphaned = Job.objects(kind=self.kind, attempts__lt=self.max_attempts).filter(
+                __raw__={'$or': [{'status': 'queued'},
+                                 {'status': 'running', 'locked_until': {'$lt': datetime.utcnow()}}]}
+            ).only('id')
+            count = 0
+            for job in orphaned:
+                try:
+                    self._dispatch(job.id)
+                    count += 1
+                except JobQueueFull:
+                    break
+            if count:
+                logging.info(f"Recovered {count} orphaned '{self.kind}' jobs.")
+        except Exception as e:
+            logging.error(f"Job recovery for '{self.kind}' failed: {e}", exc_info=True)
@@ -0,0 +1,67 @@
+import json
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON object of the form
+    {"<key>": [{...}, {...}, ...], ...}: feed() it text chunks as they arrive and
+    it returns every element of the key's array that has been completed so far,
+    long before the whole document can be passed to json.loads.
+
+    Only string, escape and nesting state is tracked; each completed element is
+    decoded with json.loads on its own slice, so malformed elements still raise.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_key = None
+        self._array_depth = None  # nesting depth inside the target array, once it has opened
+        self._item_start = None
+        self.done = False  # the target array has been closed
+
+    def feed(self, text):
+        """Appends a chunk and returns the list of array elements completed by it."""
+        self.buffer += text
+        items = []
+        buffer = self.buffer
+        for i in range(self._position, len(buffer)):
+            c = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == '\\':
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buffer[self._string_start + 1:i]
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in '{[':
+                self._depth += 1
+                if (c == '[' and self._depth == 2 and self._array_depth is None and not self.done
+                        and self._last_key == self.key):
+                    self._array_depth = self._depth
+                elif c == '{' and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = i
+            elif c in '}]':
+                if c == '}' and self._item_start is not None and self._depth == self._array_depth + 1:
+                    items.append(json.loads(buffer[self._item_start:i + 1]))
+                    self._item_start = None
+                elif c == ']' and self._array_depth is not None and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self.done = True
+                self._depth -= 1
+        self._position = len(buffer)
+        return items
+
+    def result(self):
+        """json.loads of everything fed so far (call once the stream has ended)."""
+        return json.loads(self.buffer)
@@ -0,0 +1,172 @@
+import logging
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from pymongo import monitoring
+
+from services.query_monitor import _IGNORED_COMMANDS
+
+# Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py): every worker then
+# writes its samples to mmap'd files there and /metrics sums them across workers.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+GEMINI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Requests matching no route share one label value, so probing URLs cannot blow up cardinality
+UNMATCHED_ROUTE = '<unmatched>'
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = Counter(
+    'internx_http_requests_total', 'HTTP requests served.',
+    ['method', 'blueprint', 'route', 'status'])
+HTTP_LATENCY = Histogram(
+    'internx_http_request_duration_seconds', 'HTTP request latency.',
+    ['method', 'blueprint', 'route'], buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge(
+    'internx_http_requests_in_flight', 'HTTP requests currently being served.',
+    ['method', 'blueprint', 'route'], multiprocess_mode='livesum')
+
+GEMINI_CALLS = Counter(
+    'internx_gemini_calls_total', 'Gemini API calls by outcome.',
+    ['model', 'outcome'])
+GEMINI_LATENCY = Histogram(
+    'internx_gemini_call_duration_seconds', 'Gemini call latency, including retries and queueing.',
+    ['model', 'outcome'], buckets=GEMINI_BUCKETS)
+GEMINI_TOKENS = Counter(
+    'internx_gemini_tokens_total', 'Gemini token usage reported in usageMetadata.',
+    ['model', 'kind'])
+RECOMMENDATION_FALLBACKS = Counter(
+    'internx_recommendation_fallbacks_total', 'Recommendations answered with the local fallback ranking.',
+    ['reason'])
+FLIGHT_REQUESTS = Counter(
+    'internx_singleflight_requests_total',
+    'Single-flight outcomes: upstream calls made, and requests served by another in-flight call.',
+    ['flight', 'role'])
+PROMPT_TOKENS = Counter(
+    'internx_prompt_tokens_total', 'Locally estimated recommendation prompt tokens, sent and saved by compact encoding.',
+    ['kind'])
+
+MONGO_COMMANDS = Counter(
+    'internx_mongo_commands_total', 'MongoDB commands issued.',
+    ['command', 'outcome'])
+MONGO_LATENCY = Histogram(
+    'internx_mongo_command_duration_seconds', 'MongoDB command round-trip time.',
+    ['command'], buckets=MONGO_BUCKETS)
+
+# usageMetadata field -> token kind label
+_USAGE_FIELDS = {
+    'promptTokenCount': 'prompt',
+    'candidatesTokenCount': 'candidates',
+    'thoughtsTokenCount': 'thoughts',
+    'cachedContentTokenCount': 'cached',
+}
+
+
+def record_gemini_call(model, seconds, outcome, usage=None):
+    """Records one Gemini call; usage is the response's usageMetadata, if any."""
+    GEMINI_CALLS.labels(model, outcome).inc()
+    GEMINI_LATENCY.labels(model, outcome).observe(seconds)
+    for field, kind in _USAGE_FIELDS.items():
+        count = (usage or {}).get(field)
+        if count:
+            GEMINI_TOKENS.labels(model, kind).inc(count)
+
+
+def record_prompt_tokens(sent, saved):
+    """Records one compact recommendation prompt (see services.prompt_builder)."""
+    PROMPT_TOKENS.labels('sent').inc(sent)
+    PROMPT_TOKENS.labels('saved').inc(max(saved, 0))
+
+
+def record_flight(flight, role):
+    """Counts one single-flight call: role is upstream, coalesced or other_worker."""
+    FLIGHT_REQUESTS.labels(flight, role).inc()
+
+
+def record_recommendation_fallback(reason):
+    """Counts one degraded /recommend answer: reason is deadline, gemini_error or invalid_response."""
+    RECOMMENDATION_FALLBACKS.labels(reason).inc()
+
+
+class _MongoMetricsListener(monitoring.CommandListener):
+    """pymongo command listener timing every command issued by this process."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in _IGNORED_COMMANDS:
+            MONGO_COMMANDS.labels(event.command_name, 'ok').inc()
+            MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        if event.command_name not in _IGNORED_COMMANDS:
+            MONGO_COMMANDS.labels(event.command_name, 'error').inc()
+            MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+
+_mongo_listener_registered = False
+
+
+def _route_labels():
+    rule = request.url_rule
+    return request.method, request.blueprint or '', rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def render_metrics():
+    """Prometheus text exposition of this process, or of all workers in multiprocess mode."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def init_metrics(app):
+    """
+    Wires Prometheus instrumentation into the app: per-route request counts by
+    status, latency histograms and in-flight gauges, MongoDB command timings,
+    and a GET /metrics endpoint. Like init_query_monitoring, call this before
+    connecting so the command listener is attached to the client.
+    """
+    global _mongo_listener_registered
+    if not _mongo_listener_registered:
+        monitoring.register(_MongoMetricsListener())
+        _mongo_listener_registered = True
+
+    @app.before_request
+    def _start_request_metrics():
+        if request.path == '/metrics':
+            return
+        g._metrics_labels = _route_labels()
+        g._metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.labels(*g._metrics_labels).inc()
+
+    @app.teardown_request
+    def _finish_request_metrics(exc=None):
+        labels = g.pop('_metrics_labels', None)
+        if labels is None:
+            return
+        HTTP_IN_FLIGHT.labels(*labels).dec()
+        HTTP_LATENCY.labels(*labels).observe(time.perf_counter() - g.pop('_metrics_started'))
+        status = g.pop('_metrics_status', 500 if exc is not None else 200)
+        HTTP_REQUESTS.labels(*labels, str(status)).inc()
+
+    @app.after_request
+    def _capture_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+    if MULTIPROC_DIR:
+        logger.info(f"Prometheus multiprocess mode, sample files in {MULTIPROC_DIR}")
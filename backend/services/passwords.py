@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+# Hashing is CPU-bound, so it runs in worker processes instead of request threads
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 30))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Lazily starts the hashing pool (spawned, so it is safe to create from a threaded server)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def hash_password(password):
+    """Hashes one password in the process pool and returns the werkzeug hash string."""
+    return _get_pool().submit(generate_password_hash, password, PASSWORD_HASH_METHOD).result(timeout=PASSWORD_HASH_TIMEOUT)
+
+
+def hash_passwords(passwords):
+    """Hashes many passwords in parallel across the pool, preserving order."""
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+    methods = [PASSWORD_HASH_METHOD] * len(passwords)
+    return list(_get_pool().map(generate_password_hash, passwords, methods, chunksize=chunksize))
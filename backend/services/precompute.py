@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from models import Application, Preferences, PrecomputedRecommendation, ResumeAnalysis
+from services.allocation import candidate_scores, load_catalog
+from services.applications import EXCLUDED_FROM_RANKING
+from services.ranker import build_profile
+
+# Candidates materialized per user (matches the live shortlist size by default)
+PRECOMPUTE_TOP_N = int(os.getenv('RECOMMENDATION_PRECOMPUTE_TOP_N', os.getenv('RECOMMENDATION_SHORTLIST_SIZE', 25)))
+# A nightly run stays servable for a day plus slack for a late batch
+PRECOMPUTE_MAX_AGE = timedelta(hours=int(os.getenv('RECOMMENDATION_PRECOMPUTE_MAX_AGE_HOURS', 26)))
+
+
+def _latest_application_changes(user_oids):
+    """{user: updated_at of their latest Application change} for the given users."""
+    pipeline = [
+        {'$match': {'user': {'$in': user_oids}}},
+        {'$group': {'_id': '$user', 'updated_at': {'$max': '$updated_at'}}}
+    ]
+    return {row['_id']: row['updated_at'] for row in Application._get_collection().aggregate(pipeline)}
+
+
+def compute_candidates(user_ids, catalog, top_n=PRECOMPUTE_TOP_N):
+    """
+    Scores a chunk of users against the catalog with the vectorized allocation
+    scorer and returns one PrecomputedRecommendation row per user with
+    Preferences: their top_n candidates (applied and dismissed listings
+    excluded; listings without seats are ranked, as in the live path) and the
+    input timestamps and catalog version the result was computed from.
+    """
+    user_oids = [ObjectId(u) for u in user_ids]
+    preferences = list(
+        Preferences.objects(user__in=user_oids).only('user', 'skills', 'interests', 'location', 'updated_at').as_pymongo()
+    )
+    analyses = {
+        row['user']: row
+        for row in ResumeAnalysis.objects(user__in=user_oids).only('user', 'skills_extracted', 'analysis_date').as_pymongo()
+    }
+    latest_changes = _latest_application_changes(user_oids)
+
+    positions = {row['user']: i for i, row in enumerate(preferences)}
+    excluded = {}
+    for row in Application.objects(user__in=user_oids, status__in=EXCLUDED_FROM_RANKING).only('user', 'internship').as_pymongo():
+        position, column = positions.get(row['user']), catalog.index.get(row['internship'])
+        if position is not None and column is not None:
+            excluded.setdefault(position, []).append(column)
+
+    profiles = [build_profile(row, analyses.get(row['user'])) for row in preferences]
+    users, internships, scores = candidate_scores(
+        profiles, catalog, k=top_n, min_score=0.0, excluded=excluded, require_capacity=False
+    )
+
+    candidates = [[] for _ in preferences]
+    for u, i, score in zip(users.tolist(), internships.tolist(), scores.tolist()):
+        candidates[u].append((score, catalog.ids[i]))
+
+    now = datetime.utcnow()
+    rows = []
+    for position, row in enumerate(preferences):
+        ranked = sorted(candidates[position], key=lambda pair: (-pair[0], pair[1]))
+        analysis = analyses.get(row['user'])
+        rows.append({
+            'user': row['user'],
+            'candidates': [{'internship': internship_id, 'score': round(score, 4)} for score, internship_id in ranked],
+            'preferences_updated_at': row.get('updated_at'),
+            'analysis_date': analysis.get('analysis_date') if analysis else None,
+            'application_updated_at': latest_changes.get(row['user']),
+            'catalog_version': catalog.version,
+            'computed_at': now,
+        })
+    return rows
+
+
+def store_candidates(rows):
+    """Upserts computed rows with one unordered bulk write; stored Gemini output is dropped with the inputs it used."""
+    if not rows:
+        return 0
+    operations = [
+        UpdateOne({'user': row['user']}, {'$set': row, '$unset': {'recommendations': '', 'generated_at': ''}}, upsert=True)
+        for row in rows
+    ]
+    PrecomputedRecommendation._get_collection().bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def precompute_chunk(user_ids, catalog=None, top_n=PRECOMPUTE_TOP_N):
+    """Computes and stores the candidates of a chunk of users; returns the stored rows."""
+    rows = compute_candidates(user_ids, catalog or load_catalog(), top_n=top_n)
+    store_candidates(rows)
+    return rows
+
+
+def _inputs_match(doc, inputs):
+    preferences_updated_at, analysis_date, application_updated_at = inputs
+    return (
+        doc.get('preferences_updated_at') == preferences_updated_at
+        and doc.get('analysis_date') == analysis_date
+        and doc.get('application_updated_at') == application_updated_at
+    )
+
+
+def get_fresh(user_id, inputs, catalog_version):
+    """
+    The user's materialized row (raw dict) if it is younger than PRECOMPUTE_MAX_AGE
+    and was computed from the same preferences, resume analysis and applications
+    as inputs (see RecommendationCache.user_inputs) and from catalog_version of
+    the catalog; otherwise None. One indexed read.
+    """
+    if inputs is None or catalog_version is None:
+        return None
+    doc = PrecomputedRecommendation.objects(user=ObjectId(user_id)).as_pymongo().first()
+    if doc is None or doc.get('computed_at') is None:
+        return None
+    if datetime.utcnow() - doc['computed_at'] > PRECOMPUTE_MAX_AGE or not _inputs_match(doc, inputs):
+        return None
+    if doc.get('catalog_version') != catalog_version:
+        return None
+    return doc
+
+
+def save_recommendations(user_id, inputs, catalog_version, recommendations):
+    """Attaches generated recommendations to the user's row, only if it still reflects inputs and catalog_version."""
+    preferences_updated_at, analysis_date, application_updated_at = inputs
+    PrecomputedRecommendation._get_collection().update_one(
+        {
+            'user': ObjectId(user_id),
+            'preferences_updated_at': preferences_updated_at,
+            'analysis_date': analysis_date,
+            'application_updated_at': application_updated_at,
+            'catalog_version': catalog_version,
+        },
+        {'$set': {'recommendations': recommendations, 'generated_at': datetime.utcnow()}}
+    )
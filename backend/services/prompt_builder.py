@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import re
+
+from services.ranker import normalize_skill
+
+# Upper bound on the estimated tokens of a recommendation prompt (user message only)
+PROMPT_TOKEN_BUDGET = int(os.getenv('RECOMMENDATION_PROMPT_TOKEN_BUDGET', 2500))
+# Listings never dropped to meet the budget (the model is asked for 3 picks)
+MIN_PROMPT_LISTINGS = 3
+# Resume summary characters kept; the summary is dropped entirely if the budget still is not met
+SUMMARY_MAX_CHARS = 600
+
+# Word pieces, digit groups and single punctuation marks, roughly as a BPE tokenizer splits them
+_PIECE_PATTERN = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """
+    Local estimate of the Gemini token count of text, without a network call:
+    a letter run counts one token per started 8 characters, a digit run one per
+    3 digits and every other non-space character one token. It overestimates
+    plain English slightly and prices ids, timestamps and JSON punctuation at
+    about what the real tokenizer charges for them.
+    """
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += (len(piece) + 7) // 8
+        elif piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def _clean(value):
+    """One-line field value that cannot break the |-separated listing rows."""
+    return " ".join(str(value or "").replace("|", "/").split())
+
+
+def verbose_prompt(context):
+    """The uncompressed prompt (full JSON documents), used as the baseline for tokens saved."""
+    return f"""
+    --- USER PROFILE ---
+    Preferences: {json.dumps(context['preferences'])}
+    Resume Analysis (If Available): {json.dumps(context['resume_analysis'] or "No analysis available. Base matching on preferences.")}
+
+    --- AVAILABLE INTERNSHIPS (pre-ranked shortlist, best local match first) ---
+    {json.dumps(context['shortlist'])}
+
+    Please provide the 3 best recommendations in the required JSON format.
+    """
+
+
+def _render(context, listings, summary_chars):
+    """Compact prompt for the first `listings` shortlist entries; returns (text, {number: internship id})."""
+    preferences = context['preferences'] or {}
+    analysis = context['resume_analysis'] or {}
+
+    # One vocabulary shared by the user and every listing, so each skill name is sent once
+    vocabulary = {}
+
+    def skill_ids(skills):
+        ids = {vocabulary.setdefault(normalize_skill(s), len(vocabulary)) for s in skills or [] if str(s).strip()}
+        return ",".join(str(i) for i in sorted(ids))
+
+    user_skills = skill_ids(list(preferences.get('skills') or []) + list(analysis.get('skills_extracted') or []))
+
+    id_map, rows = {}, []
+    for number, internship in enumerate(context['shortlist'][:listings], start=1):
+        id_map[str(number)] = internship['id']
+        rows.append("|".join([
+            str(number), _clean(internship.get('title')), _clean(internship.get('company')),
+            _clean(internship.get('location')), skill_ids(internship.get('skills_required'))
+        ]))
+
+    if analysis:
+        summary = _clean(analysis.get('summary'))[:summary_chars]
+        readiness = analysis.get('market_readiness_score')
+        resume = (summary or "No summary.") + (f" Readiness {readiness}/100." if readiness is not None else "")
+    else:
+        resume = "No analysis available. Base matching on preferences."
+
+    text = "\n".join([
+        "--- USER PROFILE ---",
+        f"Skill ids: {user_skills or 'none'}",
+        f"Interests: {', '.join(_clean(i) for i in preferences.get('interests') or []) or 'none'}",
+        f"Preferred location: {_clean(preferences.get('location')) or 'any'}",
+        f"Resume: {resume}",
+        "",
+        "--- SKILLS (id=name) ---",
+        "; ".join(f"{i}={skill}" for skill, i in vocabulary.items()),
+        "",
+        "--- AVAILABLE INTERNSHIPS (pre-ranked shortlist, best local match first) ---",
+        "number|title|company|location|skill ids",
+        *rows,
+        "",
+        "Please provide the 3 best recommendations in the required JSON format, "
+        "using the internship number as internshipId.",
+    ])
+    return text, id_map
+
+
+def build_recommendation_prompt(context, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Encodes a fetch_all_context() result compactly: a shared skill vocabulary,
+    listing numbers instead of ObjectIds and only the fields the model ranks on
+    (no ids, dates, links or counters). Listings are dropped from the tail of
+    the shortlist, then the resume summary is shortened, until the estimated
+    size fits budget.
+
+    Returns (text, id_map, stats): id_map maps listing numbers back to internship
+    ids (see decode_recommendations) and stats reports the estimated tokens sent
+    and saved against verbose_prompt().
+    """
+    listings = len(context['shortlist'])
+    summary_chars = SUMMARY_MAX_CHARS
+    text, id_map = _render(context, listings, summary_chars)
+    tokens = estimate_tokens(text)
+
+    while tokens > budget and listings > MIN_PROMPT_LISTINGS:
+        listings -= 1
+        text, id_map = _render(context, listings, summary_chars)
+        tokens = estimate_tokens(text)
+    while tokens > budget and summary_chars > 0:
+        summary_chars = summary_chars // 2 if summary_chars > 50 else 0
+        text, id_map = _render(context, listings, summary_chars)
+        tokens = estimate_tokens(text)
+    if tokens > budget:
+        logger.warning(f"Recommendation prompt is {tokens} estimated tokens, over the budget of {budget}")
+
+    baseline = estimate_tokens(verbose_prompt(context))
+    stats = {
+        "estimatedTokens": tokens,
+        "baselineTokens": baseline,
+        "tokensSaved": baseline - tokens,
+        "budget": budget,
+        "listings": listings,
+        "droppedListings": len(context['shortlist']) - listings,
+    }
+    return text, id_map, stats
+
+
+def decode_recommendation(recommendation, id_map):
+    """
+    Maps one recommendation's internshipId (a listing number) back to the
+    internship id in place and returns it; a full internship id from the prompt
+    is accepted as is. Returns None for a pick not in the prompt.
+    """
+    value = str(recommendation.get('internshipId', '')).strip().lstrip('#')
+    if value in id_map:
+        recommendation['internshipId'] = id_map[value]
+    elif value not in id_map.values():
+        logger.warning(f"Dropping recommendation for unknown internship {value!r}")
+        return None
+    return recommendation
+
+
+def decode_recommendations(result, id_map):
+    """Applies decode_recommendation to every pick of a parsed response, dropping unknown ones."""
+    decoded = (decode_recommendation(r, id_map) for r in result.get('recommendations') or [])
+    result['recommendations'] = [r for r in decoded if r is not None]
+    return result
@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, request
+from pymongo import monitoring
+
+# Warn when one request issues the same query shape more than this many times (likely N+1)
+REPEAT_WARN_THRESHOLD = int(os.getenv('DB_QUERY_REPEAT_WARN', 5))
+
+# Driver housekeeping that is not caused by application code
+_IGNORED_COMMANDS = {'isMaster', 'ismaster', 'hello', 'ping', 'saslStart', 'saslContinue', 'endSessions', 'buildInfo'}
+
+logger = logging.getLogger(__name__)
+
+
+def query_shape(command_name, command):
+    """
+    Normalizes a command to its shape: the command name, collection and the
+    structure of its filter/query with every literal replaced by '?'.
+    """
+    def shape(value):
+        if isinstance(value, dict):
+            return '{' + ','.join(f"{k}:{shape(v)}" for k, v in sorted(value.items())) + '}'
+        if isinstance(value, (list, tuple)):
+            return '[' + ','.join(sorted(set(shape(v) for v in value))) + ']'
+        return '?'
+
+    collection = command.get(command_name)
+    body = command.get('filter', command.get('query', command.get('q')))
+    if body is None and command_name in ('update', 'delete'):
+        statements = command.get('updates') or command.get('deletes') or []
+        body = statements[0].get('q') if statements else None
+    if command_name == 'aggregate':
+        body = [list(stage.keys())[0] for stage in command.get('pipeline', [])]
+        return f"aggregate {collection} {body}"
+    return f"{command_name} {collection} {shape(body) if body is not None else ''}".rstrip()
+
+
+class QueryStats:
+    """Counts, timings and shapes of the DB commands issued inside one tracked scope."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds spent waiting on the server
+        self.shapes = Counter()
+
+    def repeated(self, threshold=REPEAT_WARN_THRESHOLD):
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+class _QueryListener(monitoring.CommandListener):
+    """pymongo command listener feeding every QueryStats active in the calling thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        stack = self.stack()
+        if stack:
+            shape = query_shape(event.command_name, event.command)
+            for stats in stack:
+                stats.count += 1
+                stats.shapes[shape] += 1
+
+    def _finished(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        for stats in self.stack():
+            stats.duration += event.duration_micros / 1e6
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+_listener = _QueryListener()
+_registered = False
+
+
+def install_listener():
+    """
+    Registers the command listener with pymongo (idempotent). Only clients
+    created afterwards report to it, so call this before connecting.
+    """
+    global _registered
+    if not _registered:
+        monitoring.register(_listener)
+        _registered = True
+
+
+@contextmanager
+def track_queries():
+    """Context manager yielding a QueryStats of every command issued by this thread inside the block."""
+    stats = QueryStats()
+    stack = _listener.stack()
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+def init_query_monitoring(app):
+    """
+    Wires per-request DB instrumentation into the app: counts and times every
+    command, logs a warning for repeated query shapes (N+1 patterns) and, in
+    debug mode or with DB_QUERY_HEADERS enabled, adds X-DB-Queries / X-DB-Time headers.
+    """
+    install_listener()
+    expose_headers = app.debug or app.config.get('DB_QUERY_HEADERS', False)
+
+    @app.before_request
+    def _start_query_tracking():
+        g._query_tracking = track_queries()
+        g.db_stats = g._query_tracking.__enter__()
+
+    @app.after_request
+    def _report_queries(response):
+        stats = g.get('db_stats')
+        if stats is None:
+            return response
+        for shape, n in stats.repeated().items():
+            logger.warning(f"{request.method} {request.path} repeated query shape {n}x (possible N+1): {shape}")
+        if expose_headers:
+            response.headers['X-DB-Queries'] = str(stats.count)
+            response.headers['X-DB-Time'] = f"{stats.duration * 1000:.2f}ms"
+        return response
+
+    @app.teardown_request
+    def _stop_query_tracking(exc=None):
+        tracking = g.pop('_query_tracking', None)
+        if tracking is not None:
+            tracking.__exit__(None, None, None)
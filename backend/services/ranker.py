@@ -0,0 +1,145 @@
+import re
+import numpy as np
+
+# Relative weight of each signal in the final match score (sums to 1.0)
+SKILL_WEIGHT = 0.6
+INTEREST_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.15
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+def normalize_skill(skill):
+    """Canonical form used to compare skills coming from users, resumes and listings."""
+    return " ".join(str(skill).lower().split())
+
+
+def tokenize(text):
+    """Splits free text (titles, interests such as 'AI/ML') into lowercase word tokens."""
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def build_profile(preferences, resume_analysis=None):
+    """
+    Merges Preferences and ResumeAnalysis (both as to_dict() output) into the
+    matching profile consumed by InternshipRanker.score().
+    """
+    preferences = preferences or {}
+    resume_analysis = resume_analysis or {}
+
+    skills = set(normalize_skill(s) for s in preferences.get('skills') or [])
+    skills.update(normalize_skill(s) for s in resume_analysis.get('skills_extracted') or [])
+
+    interest_tokens = set()
+    for interest in preferences.get('interests') or []:
+        interest_tokens.update(tokenize(interest))
+
+    return {
+        "skills": skills,
+        "interest_tokens": interest_tokens,
+        "location": (preferences.get('location') or "").strip().lower(),
+    }
+
+
+def location_matches(preferred, location):
+    if not preferred:
+        return False
+    if location == "remote":
+        return True
+    return preferred == location or preferred in location or location in preferred
+
+
+class InternshipRanker:
+    """
+    Vectorized scorer over a fixed internship catalog.
+
+    The catalog is compiled once into flat NumPy arrays (one entry per skill or
+    title token, plus the index of the internship owning it). Scoring a profile
+    is then a lookup into a per-vocabulary boolean mask followed by a bincount,
+    i.e. O(total tokens) with no Python loop over internships.
+    """
+
+    def __init__(self, internships):
+        self.internships = list(internships)
+        n = len(self.internships)
+
+        skill_vocab, token_vocab, location_vocab = {}, {}, {}
+        skill_ids, skill_owner = [], []
+        token_ids, token_owner = [], []
+        location_ids = np.empty(n, dtype=np.int32)
+
+        for idx, internship in enumerate(self.internships):
+            skills = set(normalize_skill(s) for s in internship.get('skills_required') or [])
+            for skill in skills:
+                skill_ids.append(skill_vocab.setdefault(skill, len(skill_vocab)))
+                skill_owner.append(idx)
+
+            text = " ".join([internship.get('title') or "", internship.get('company') or ""] + list(skills))
+            for token in set(tokenize(text)):
+                token_ids.append(token_vocab.setdefault(token, len(token_vocab)))
+                token_owner.append(idx)
+
+            location = (internship.get('location') or "").strip().lower()
+            location_ids[idx] = location_vocab.setdefault(location, len(location_vocab))
+
+        self._skill_vocab = skill_vocab
+        self._token_vocab = token_vocab
+        self._locations = list(location_vocab)
+        self._skill_ids = np.asarray(skill_ids, dtype=np.int32)
+        self._skill_owner = np.asarray(skill_owner, dtype=np.int32)
+        self._token_ids = np.asarray(token_ids, dtype=np.int32)
+        self._token_owner = np.asarray(token_owner, dtype=np.int32)
+        self._location_ids = location_ids
+        self._skill_counts = np.bincount(self._skill_owner, minlength=n).astype(np.float64)
+
+    def __len__(self):
+        return len(self.internships)
+
+    def _mask(self, vocab, terms):
+        mask = np.zeros(len(vocab), dtype=bool)
+        hits = [vocab[t] for t in terms if t in vocab]
+        if hits:
+            mask[hits] = True
+        return mask
+
+    def score(self, profile):
+        """Returns a float array with a 0-1 match score for every internship in the catalog."""
+        n = len(self.internships)
+        if n == 0:
+            return np.zeros(0)
+
+        # 1. Skill overlap: cosine similarity between the binary skill vectors
+        skill_mask = self._mask(self._skill_vocab, profile['skills'])
+        overlap = np.bincount(self._skill_owner, weights=skill_mask[self._skill_ids], minlength=n)
+        denom = np.sqrt(self._skill_counts * max(len(profile['skills']), 1))
+        skill_score = np.divide(overlap, denom, out=np.zeros(n), where=denom > 0)
+
+        # 2. Interest match: any interest token appearing in the title/company/skills
+        interest_mask = self._mask(self._token_vocab, profile['interest_tokens'])
+        interest_hits = np.bincount(self._token_owner, weights=interest_mask[self._token_ids], minlength=n)
+        interest_score = (interest_hits > 0).astype(np.float64)
+
+        # 3. Location match, resolved once per distinct location string
+        location_table = np.array(
+            [location_matches(profile['location'], loc) for loc in self._locations], dtype=np.float64
+        )
+        location_score = location_table[self._location_ids]
+
+        return SKILL_WEIGHT * skill_score + INTEREST_WEIGHT * interest_score + LOCATION_WEIGHT * location_score
+
+    def top_k(self, profile, k):
+        """Returns [(internship_dict, score), ...] for the k best matches, best first."""
+        scores = self.score(profile)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        # argpartition is O(n); only the k survivors are fully sorted
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.internships[i], float(scores[i])) for i in order]
+
+
+def shortlist(internships, preferences, resume_analysis=None, k=25):
+    """Convenience wrapper: ranks a list of internship dicts and keeps the top k."""
+    ranker = InternshipRanker(internships)
+    return ranker.top_k(build_profile(preferences, resume_analysis), k)
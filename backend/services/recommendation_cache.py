@@ -0,0 +1,89 @@
+import logging
+import os
+
+from bson import ObjectId
+
+from models import Application, Counter, Preferences, ResumeAnalysis
+from services.cache import LRUCache
+
+CATALOG_VERSION_COUNTER = 'catalog_version'
+
+
+def catalog_version():
+    """Current internship catalog version, shared by all workers through the counters collection."""
+    row = Counter.objects(name=CATALOG_VERSION_COUNTER).only('value').as_pymongo().first()
+    return row['value'] if row else 0
+
+
+def bump_catalog_version():
+    """Atomically increments the catalog version; every cached recommendation becomes stale."""
+    try:
+        Counter.objects(name=CATALOG_VERSION_COUNTER).update_one(upsert=True, inc__value=1)
+    except Exception as e:
+        logging.error(f"Failed to bump catalog version: {e}")
+
+
+class RecommendationCache:
+    """
+    Versioned cache of generated recommendations.
+
+    Keys embed everything the result depends on: the user's Preferences.updated_at,
+    their ResumeAnalysis.analysis_date, the catalog version and the time of their
+    latest Application change. Any change therefore produces a new key, so a stale entry
+    can never be served even by a worker that missed an invalidation;
+    invalidate_user() only frees the superseded entries early.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def user_inputs(self, user_id):
+        """
+        Returns (Preferences.updated_at, ResumeAnalysis.analysis_date, latest Application
+        change) with three indexed, projected reads, or None when the user has no preferences.
+        """
+        user_oid = ObjectId(user_id)
+        preferences = Preferences.objects(user=user_oid).only('updated_at').as_pymongo().first()
+        if preferences is None:
+            return None
+        analysis = ResumeAnalysis.objects(user=user_oid).only('analysis_date').as_pymongo().first()
+        application = (
+            Application.objects(user=user_oid).only('updated_at').order_by('-updated_at').as_pymongo().first()
+        )
+        return (
+            preferences.get('updated_at'),
+            analysis.get('analysis_date') if analysis else None,
+            application.get('updated_at') if application else None,
+        )
+
+    def key_for(self, user_id, inputs=None):
+        """
+        Builds the versioned key from user_inputs() (looked up unless given) and the
+        catalog version. Returns None when the user has no preferences (the caller reports the 404).
+        """
+        inputs = inputs if inputs is not None else self.user_inputs(user_id)
+        if inputs is None:
+            return None
+        preferences_updated_at, analysis_date, application_updated_at = inputs
+        return (str(user_id), preferences_updated_at, analysis_date, catalog_version(), application_updated_at)
+
+    def get(self, key):
+        return self.memory.get(key) if key else None
+
+    def set(self, key, recommendations):
+        if key:
+            self.memory.set(key, recommendations)
+
+    def invalidate_user(self, user_id):
+        """Drops every cached entry of a single user (other users are untouched)."""
+        user_id = str(user_id)
+        return self.memory.delete_where(lambda key: key[0] == user_id)
+
+    def stats(self):
+        return self.memory.stats()
+
+
+recommendation_cache = RecommendationCache(
+    maxsize=int(os.getenv('RECOMMENDATION_CACHE_SIZE', 4096)),
+    ttl=int(os.getenv('RECOMMENDATION_CACHE_TTL', 6 * 3600))
+)
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import threading
+
+from mongoengine.errors import NotUniqueError
+
+from models import ResumeAnalysisCache
+from services.cache import LRUCache
+
+# Bump when the prompt or schema changes so stale analyses are not reused
+ANALYSIS_CACHE_VERSION = "1"
+
+
+def normalize_resume_text(resume_text):
+    """Collapses whitespace so trivially reformatted resubmissions hash identically."""
+    return " ".join(resume_text.split())
+
+
+class ResumeAnalysisStore:
+    """
+    Two-tier content-addressed cache for Gemini resume analyses.
+
+    Tier 1 is a per-process LRU with TTL; tier 2 is the resume_analysis_cache
+    collection shared by all workers. A Mongo hit is promoted into the LRU.
+    Cache failures are logged and treated as misses so they never fail a request.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.db_hits = 0
+        self.misses = 0
+
+    def key_for(self, resume_text, model=""):
+        raw = f"{ANALYSIS_CACHE_VERSION}\n{model}\n{normalize_resume_text(resume_text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        analysis = self.memory.get(key)
+        if analysis is not None:
+            return analysis
+
+        try:
+            entry = ResumeAnalysisCache.objects(content_hash=key).first()
+        except Exception as e:
+            logging.warning(f"Resume analysis cache lookup failed: {e}")
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+
+        analysis = entry.to_analysis()
+        self.memory.set(key, analysis)
+        return analysis
+
+    def put(self, key, analysis):
+        self.memory.set(key, analysis)
+        try:
+            ResumeAnalysisCache(
+                content_hash=key,
+                summary=analysis.get('summary'),
+                skills_extracted=analysis.get('skills_extracted') or [],
+                market_readiness_score=analysis.get('market_readiness_score')
+            ).save()
+        except NotUniqueError:
+            pass  # Another worker stored the same analysis first
+        except Exception as e:
+            logging.warning(f"Resume analysis cache write failed: {e}")
+
+    def stats(self):
+        lookups = self.memory.hits + self.db_hits + self.misses
+        hits = self.memory.hits + self.db_hits
+        return {
+            "memory": self.memory.stats(),
+            "memory_hits": self.memory.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "llm_calls_saved": hits,
+        }
+
+
+resume_cache = ResumeAnalysisStore(
+    maxsize=int(os.getenv('RESUME_CACHE_SIZE', 2048)),
+    ttl=int(os.getenv('RESUME_CACHE_TTL', 24 * 3600))
+)
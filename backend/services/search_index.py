@@ -0,0 +1,490 @@
+import bisect
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from bson import ObjectId
+
+from services.catch_up import catch_up_filter
+from services.ranker import tokenize
+
+# Where the compacted index is persisted, so new workers load it instead of rebuilding from Mongo
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'internx_search_index.npz'))
+
+# Term frequency multiplier per indexed field (a BM25F-style weighted tf)
+FIELD_WEIGHTS = {'title': 2.0, 'skills_required': 1.5, 'company': 1.0, 'location': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_QUERY_TERMS = 8
+# Every query term of at least PREFIX_MIN_LENGTH characters also matches the most common
+# vocabulary terms it is a prefix of ("dat" -> data, database, ...)
+PREFIX_MIN_LENGTH = 2
+PREFIX_SCAN = 256
+PREFIX_EXPANSIONS = 16
+PREFIX_WEIGHT = 0.8
+# Query terms of at least TYPO_MIN_LENGTH characters missing from the vocabulary match
+# terms one edit (insert, delete, substitute, swap) away ("pyhton" -> python)
+TYPO_MIN_LENGTH = 4
+TYPO_WEIGHT = 0.6
+
+# Listings added since the last compaction before they are merged into the main postings
+COMPACT_MIN_DELTA = 5000
+FORMAT_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def document_terms(row):
+    """{term: field-weighted term frequency} of one raw internship row."""
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = row.get(field)
+        text = " ".join(value) if isinstance(value, list) else (value or "")
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diffs) == 1 or (
+            len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+        )
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _split_id(internship_id):
+    raw = ObjectId(internship_id).binary
+    return int.from_bytes(raw[:4], 'big'), int.from_bytes(raw[4:], 'big')
+
+
+def _join_id(hi, lo):
+    return ObjectId(int(hi).to_bytes(4, 'big') + int(lo).to_bytes(8, 'big'))
+
+
+class SearchIndex:
+    """
+    In-process BM25 full-text index over internship title, company, location
+    and skills_required.
+
+    The bulk of the postings lives in an immutable "main" segment of flat NumPy
+    arrays (CSR by term id: doc ids and weighted tfs, documents ordered by
+    ObjectId). Listings added afterwards go to a small append-only delta that
+    is merged in once it reaches COMPACT_MIN_DELTA documents (or a tenth of the
+    main segment). Scoring gathers the postings of the query's terms and their
+    prefix / one-typo expansions and sums BM25 contributions with bincount, so a
+    query costs O(matching postings), not O(catalog).
+
+    Like InternshipIndex it is built lazily and kept current incrementally:
+    create_internship calls add() and each query pulls the listings inserted
+    since the highest _id seen, within the catch-up window (see
+    services.catch_up). The compacted index is saved to path (an uncompressed
+    .npz) with the name of the database it was built from, and later workers
+    load it instead of re-tokenizing the catalog; a file from another
+    database, or one that does not account for every listing once caught up,
+    is rebuilt.
+    """
+
+    def __init__(self, path=SEARCH_INDEX_PATH, sync=True):
+        self.path = path
+        self.sync = sync
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._vocab = {}
+        self._terms = []
+        self._sorted_terms = []
+        self._typo_map = None  # one-delete variant -> term ids, built on the first typo lookup
+        self._last_id = None
+        self._database = None  # database the index was built from, saved with it
+        self._install_main(np.zeros(0, np.uint32), np.zeros(0, np.uint64), np.zeros(0, np.float32),
+                           np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32))
+
+    def __len__(self):
+        return self._n_main + len(self._delta_len)
+
+    # --- Building ---
+
+    def _term_id(self, term):
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = self._vocab[term] = len(self._terms)
+            self._terms.append(term)
+            bisect.insort(self._sorted_terms, term)
+            if self._typo_map is not None:
+                for variant in _deletes(term) | {term}:
+                    self._typo_map.setdefault(variant, []).append(term_id)
+        return term_id
+
+    def _install_main(self, ids_hi, ids_lo, doc_len, coo_terms, coo_docs, coo_tfs):
+        """Replaces the main segment with the given documents and COO postings; empties the delta."""
+        order = np.lexsort((ids_lo, ids_hi))
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        docs = position[coo_docs].astype(np.int32)
+
+        by_term = np.argsort(coo_terms, kind='stable')
+        counts = np.bincount(coo_terms, minlength=len(self._terms)) if len(coo_terms) else np.zeros(len(self._terms), np.int64)
+        term_ptr = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=term_ptr[1:])
+
+        self._ids_hi = ids_hi[order]
+        self._ids_lo = ids_lo[order]
+        self._doc_len = doc_len[order].astype(np.float32)
+        self._term_ptr = term_ptr
+        self._post_docs = docs[by_term]
+        self._post_tfs = coo_tfs[by_term].astype(np.float32)
+        self._n_main = len(order)
+        self._delta_ids = []
+        self._delta_len = []
+        self._delta_keys = set()
+        self._delta_postings = {}  # term id -> ([global doc index], [tf])
+        self._total_len = float(self._doc_len.sum())
+
+    def build(self, rows):
+        """Replaces the whole index with the given raw internship rows (_id plus the indexed fields)."""
+        with self._lock:
+            self._vocab, self._terms, self._sorted_terms, self._typo_map = {}, [], [], None
+            ids_hi, ids_lo, doc_len = [], [], []
+            coo_terms, coo_docs, coo_tfs = [], [], []
+            last_id = None
+            for doc, row in enumerate(rows):
+                hi, lo = _split_id(row['_id'])
+                ids_hi.append(hi)
+                ids_lo.append(lo)
+                terms = document_terms(row)
+                doc_len.append(sum(terms.values()))
+                for term, tf in terms.items():
+                    coo_terms.append(self._term_id(term))
+                    coo_docs.append(doc)
+                    coo_tfs.append(tf)
+                if last_id is None or row['_id'] > last_id:
+                    last_id = row['_id']
+            self._install_main(
+                np.asarray(ids_hi, np.uint32), np.asarray(ids_lo, np.uint64), np.asarray(doc_len, np.float32),
+                np.asarray(coo_terms, np.int64), np.asarray(coo_docs, np.int64), np.asarray(coo_tfs, np.float32)
+            )
+            self._last_id = last_id
+            self._loaded = True
+
+    def _contains(self, hi, lo):
+        if (hi, lo) in self._delta_keys:
+            return True
+        start = np.searchsorted(self._ids_hi, hi, 'left')
+        end = np.searchsorted(self._ids_hi, hi, 'right')
+        position = start + np.searchsorted(self._ids_lo[start:end], lo)
+        return position < end and self._ids_lo[position] == lo
+
+    def _add_locked(self, row):
+        hi, lo = _split_id(row['_id'])
+        if self._contains(hi, lo):
+            return
+        doc = self._n_main + len(self._delta_len)
+        terms = document_terms(row)
+        for term, tf in terms.items():
+            docs, tfs = self._delta_postings.setdefault(self._term_id(term), ([], []))
+            docs.append(doc)
+            tfs.append(tf)
+        self._delta_ids.append((hi, lo))
+        self._delta_keys.add((hi, lo))
+        self._delta_len.append(sum(terms.values()))
+        self._total_len += self._delta_len[-1]
+        if self._last_id is None or row['_id'] > self._last_id:
+            self._last_id = row['_id']
+        if len(self._delta_len) >= max(COMPACT_MIN_DELTA, self._n_main // 10):
+            self._compact()
+            if self.path:
+                threading.Thread(target=self.save, name='search-index-save', daemon=True).start()
+
+    def add(self, internship):
+        """Indexes a single Internship document (called right after it is saved)."""
+        with self._lock:
+            if self._loaded:
+                self._add_locked({'_id': internship.id, 'title': internship.title, 'company': internship.company,
+                                  'location': internship.location, 'skills_required': internship.skills_required})
+
+    def _compact(self):
+        """Merges the delta into a new main segment."""
+        if not self._delta_len:
+            return
+        started = time.monotonic()
+        main_terms = np.repeat(np.arange(len(self._term_ptr) - 1, dtype=np.int64), np.diff(self._term_ptr))
+        # Main postings hold positions in the sorted main order; delta docs follow them
+        delta_terms, delta_docs, delta_tfs = [], [], []
+        for term_id, (docs, tfs) in self._delta_postings.items():
+            delta_terms.extend([term_id] * len(docs))
+            delta_docs.extend(docs)
+            delta_tfs.extend(tfs)
+        delta_hi, delta_lo = zip(*self._delta_ids)
+        n = self._n_main + len(self._delta_len)
+        self._install_main(
+            np.concatenate([self._ids_hi, np.asarray(delta_hi, np.uint32)]),
+            np.concatenate([self._ids_lo, np.asarray(delta_lo, np.uint64)]),
+            np.concatenate([self._doc_len, np.asarray(self._delta_len, np.float32)]),
+            np.concatenate([main_terms, np.asarray(delta_terms, np.int64)]),
+            np.concatenate([self._post_docs.astype(np.int64), np.asarray(delta_docs, np.int64)]),
+            np.concatenate([self._post_tfs, np.asarray(delta_tfs, np.float32)])
+        )
+        logger.info(f"Search index compacted to {n} listings in {time.monotonic() - started:.2f}s")
+
+    # --- Persistence ---
+
+    def save(self, path=None):
+        """Compacts and writes the index to path (atomically replaced); returns the file size in bytes."""
+        path = path or self.path
+        with self._lock:
+            self._compact()
+            arrays = {
+                'ids_hi': self._ids_hi, 'ids_lo': self._ids_lo, 'doc_len': self._doc_len,
+                'term_ptr': self._term_ptr, 'post_docs': self._post_docs, 'post_tfs': self._post_tfs,
+                'terms': np.frombuffer("\n".join(self._terms).encode(), dtype=np.uint8),
+                'meta': np.frombuffer(json.dumps({
+                    'version': FORMAT_VERSION, 'fields': FIELD_WEIGHTS, 'database': self._database,
+                    'last_id': str(self._last_id) if self._last_id else None,
+                }).encode(), dtype=np.uint8),
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return os.path.getsize(path)
+
+    def load(self, path=None, database=None):
+        """
+        Loads a saved index; returns False if the file is missing, was written by an
+        incompatible version or (when database is given) was built from another database.
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes())
+            if meta.get('version') != FORMAT_VERSION or meta.get('fields') != FIELD_WEIGHTS:
+                return False
+            if database is not None and meta.get('database') != database:
+                return False
+            terms = data['terms'].tobytes().decode()
+            with self._lock:
+                self._terms = terms.split("\n") if terms else []
+                self._vocab = {term: i for i, term in enumerate(self._terms)}
+                self._sorted_terms = sorted(self._terms)
+                self._typo_map = None
+                self._ids_hi, self._ids_lo = data['ids_hi'], data['ids_lo']
+                self._doc_len, self._term_ptr = data['doc_len'], data['term_ptr']
+                self._post_docs, self._post_tfs = data['post_docs'], data['post_tfs']
+                self._n_main = len(self._ids_hi)
+                self._delta_ids, self._delta_len, self._delta_keys, self._delta_postings = [], [], set(), {}
+                self._total_len = float(self._doc_len.sum())
+                self._last_id = ObjectId(meta['last_id']) if meta.get('last_id') else None
+                self._database = meta.get('database')
+                self._loaded = True
+        return True
+
+    def _catch_up(self):
+        """Indexes the listings inserted since the highest _id seen (and its overlap window)."""
+        from models import Internship
+
+        query = Internship.objects.only('id', *FIELD_WEIGHTS)
+        if self._last_id is not None:
+            query = query.filter(__raw__=catch_up_filter(self._last_id))
+        for row in query.order_by('id').as_pymongo():
+            self._add_locked(row)
+
+    def _sync(self):
+        """Loads the index on first use (saved file, else the catalog), afterwards only newer listings."""
+        if not self.sync:
+            return
+        from mongoengine.connection import get_db
+        from models import Internship
+
+        with self._lock:
+            if not self._loaded:
+                started = time.monotonic()
+                database = get_db().name
+                try:
+                    loaded = self.load(database=database)
+                except Exception as e:
+                    logger.warning(f"Could not load the search index from {self.path}: {e}")
+                    loaded = False
+                if loaded:
+                    # A file left by an earlier catalog of the same database (e.g. reseeded) misses
+                    # listings or holds gone ones: either way the counts differ once caught up
+                    self._catch_up()
+                    if len(self) != Internship.objects.count():
+                        logger.warning(f"Search index at {self.path} does not match the catalog; rebuilding.")
+                        loaded = False
+                if not loaded:
+                    self.build(Internship.objects.only('id', *FIELD_WEIGHTS).order_by('id').as_pymongo())
+                    self._database = database
+                    if self.path:
+                        try:
+                            self.save()
+                        except Exception as e:
+                            logger.warning(f"Could not save the search index to {self.path}: {e}")
+                logger.info(f"Search index {'loaded' if loaded else 'built'} with {len(self)} listings "
+                            f"in {time.monotonic() - started:.2f}s.")
+            self._catch_up()
+
+    # --- Querying ---
+
+    def _expansions(self, token):
+        """[(term id, weight)] a query token matches: itself, its prefix completions and one-typo variants."""
+        matches = {}
+        exact = self._vocab.get(token)
+        if exact is not None:
+            matches[exact] = 1.0
+        if len(token) >= PREFIX_MIN_LENGTH:
+            start = bisect.bisect_left(self._sorted_terms, token)
+            completions = []
+            for term in self._sorted_terms[start:start + PREFIX_SCAN]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    completions.append(self._vocab[term])
+            completions.sort(key=lambda t: -self._df(t))
+            for term_id in completions[:PREFIX_EXPANSIONS]:
+                matches.setdefault(term_id, PREFIX_WEIGHT)
+        if exact is None and len(token) >= TYPO_MIN_LENGTH:
+            if self._typo_map is None:
+                self._typo_map = {}
+                for term_id, term in enumerate(self._terms):
+                    for variant in _deletes(term) | {term}:
+                        self._typo_map.setdefault(variant, []).append(term_id)
+            for variant in _deletes(token) | {token}:
+                for term_id in self._typo_map.get(variant, ()):
+                    if within_one_edit(token, self._terms[term_id]):
+                        matches.setdefault(term_id, TYPO_WEIGHT)
+        return list(matches.items())
+
+    def _df(self, term_id):
+        main = int(self._term_ptr[term_id + 1] - self._term_ptr[term_id]) if term_id < len(self._term_ptr) - 1 else 0
+        delta = self._delta_postings.get(term_id)
+        return main + (len(delta[0]) if delta else 0)
+
+    def _postings(self, term_id):
+        """(global doc indices, tfs) of a term across both segments."""
+        docs, tfs = [], []
+        if term_id < len(self._term_ptr) - 1:
+            start, end = self._term_ptr[term_id], self._term_ptr[term_id + 1]
+            docs.append(self._post_docs[start:end])
+            tfs.append(self._post_tfs[start:end])
+        delta = self._delta_postings.get(term_id)
+        if delta:
+            docs.append(np.asarray(delta[0], dtype=np.int32))
+            tfs.append(np.asarray(delta[1], dtype=np.float32))
+        if not docs:
+            return np.zeros(0, np.int32), np.zeros(0, np.float32)
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Returns (total, [(internship id, score), ...]): the number of matching
+        listings and the page [offset, offset + limit) of them by descending
+        BM25 score (ties in id order). Each query term contributes its best
+        match per listing among its exact, prefix and typo expansions, the
+        latter discounted by PREFIX_WEIGHT / TYPO_WEIGHT.
+        """
+        self._sync()
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not tokens:
+            return 0, []
+
+        # Snapshot what the query needs under the lock; scoring runs outside it
+        with self._lock:
+            n = len(self)
+            if n == 0:
+                return 0, []
+            avg_len = self._total_len / n
+            n_main = self._n_main
+            main_len, delta_len = self._doc_len, np.asarray(self._delta_len, dtype=np.float32)
+            ids_hi, ids_lo, delta_ids = self._ids_hi, self._ids_lo, list(self._delta_ids)
+            token_postings = [
+                [(weight, *self._postings(term_id)) for term_id, weight in self._expansions(token)]
+                for token in tokens
+            ]
+
+        all_docs, all_scores = [], []
+        for expansions in token_postings:
+            # One idf per query token, from the listings any of its expansions match, so a rare
+            # completion ("datanine") cannot outweigh the exact term ("data") it was expanded from
+            matched = min(n, sum(len(docs) for _, docs, _ in expansions))
+            idf = math.log(1 + (n - matched + 0.5) / (matched + 0.5))
+            token_docs, token_scores = [], []
+            for weight, docs, tfs in expansions:
+                if not len(docs):
+                    continue
+                in_main = docs < n_main
+                lengths = np.empty(len(docs), dtype=np.float32)
+                lengths[in_main] = main_len[docs[in_main]]
+                lengths[~in_main] = delta_len[docs[~in_main] - n_main]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_len)
+                token_docs.append(docs)
+                token_scores.append((weight * idf) * tfs * (BM25_K1 + 1) / (tfs + norm))
+            if not token_docs:
+                continue
+            docs, scores = np.concatenate(token_docs), np.concatenate(token_scores)
+            if len(token_docs) > 1:
+                # Keep each listing's best expansion for this token
+                order = np.lexsort((-scores, docs))
+                docs, scores = docs[order], scores[order]
+                first = np.ones(len(docs), dtype=bool)
+                first[1:] = docs[1:] != docs[:-1]
+                docs, scores = docs[first], scores[first]
+            all_docs.append(docs)
+            all_scores.append(scores)
+
+        if not all_docs:
+            return 0, []
+        docs, scores = np.concatenate(all_docs), np.concatenate(all_scores)
+        if len(all_docs) > 1:
+            docs, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+
+        total = len(docs)
+        k = min(offset + limit, total)
+        if k <= 0:
+            return total, []
+        top = np.argpartition(-scores, k - 1)[:k] if k < total else np.arange(total)
+        top = top[np.lexsort((docs[top], -scores[top]))][offset:k]
+
+        results = []
+        for i in top.tolist():
+            doc = int(docs[i])
+            if doc < n_main:
+                internship_id = _join_id(ids_hi[doc], ids_lo[doc])
+            else:
+                internship_id = _join_id(*delta_ids[doc - n_main])
+            results.append((internship_id, round(float(scores[i]), 4)))
+        return total, results
+
+
+# Process-wide index shared by the internship controller
+search_index = SearchIndex()
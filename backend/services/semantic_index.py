@@ -0,0 +1,442 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+from bson import ObjectId
+
+from services.catch_up import catch_up_filter
+from services.ranker import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+# Directory holding the memory-mapped matrix shared by every worker on the host
+SEMANTIC_INDEX_DIR = os.getenv('SEMANTIC_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'internx_semantic_index'))
+# Width of the hashed feature space (4 bytes per listing per dimension); changing it rebuilds the matrix
+SEMANTIC_DIM = int(os.getenv('SEMANTIC_DIM', 512))
+
+# Weight of each internship field, and of each profile source on the query side
+LISTING_FIELDS = {'title': 2.0, 'skills_required': 1.5, 'company': 0.5, 'location': 0.5}
+RESUME_TEXT_WEIGHT = 1.0
+SKILL_WEIGHT = 2.0
+INTEREST_WEIGHT = 1.5
+
+# Character trigrams relate spellings of one skill ("postgres" / "postgresql", "react" / "reactjs"),
+# word bigrams keep phrases ("machine learning") apart from their words
+NGRAM_MIN_WORD = 4
+NGRAM_WEIGHT = 0.3
+BIGRAM_WEIGHT = 0.5
+# Common abbreviations are indexed together with their spelled-out words
+ABBREVIATIONS = {
+    'ml': 'machine learning', 'ai': 'artificial intelligence', 'dl': 'deep learning',
+    'nlp': 'natural language processing', 'js': 'javascript', 'ts': 'typescript',
+    'k8s': 'kubernetes', 'db': 'database', 'ui': 'user interface', 'ux': 'user experience',
+    'aws': 'amazon web services', 'gcp': 'google cloud platform',
+}
+
+# Spare rows added whenever the matrix file grows
+GROW_MIN_ROWS = 1024
+# The IDF weights are recomputed (full rebuild) once the catalog has grown this much since
+REBUILD_GROWTH = 2.0
+BUILD_CHUNK = 4096
+FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash(feature):
+    """Stable 64-bit feature hash (Python's hash() differs between worker processes)."""
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+
+
+def _words(text):
+    words = []
+    for token in tokenize(text):
+        words.append(token)
+        words.extend(ABBREVIATIONS.get(token, "").split())
+    return words
+
+
+def text_features(fields):
+    """
+    {feature: weight} of an iterable of (value, weight) pairs, where value is a
+    string or a list of strings (each item is tokenized on its own). Features
+    are words, adjacent word pairs and character trigrams of longer words.
+    """
+    features = {}
+    for value, weight in fields:
+        parts = value if isinstance(value, (list, tuple)) else [value]
+        for part in parts:
+            words = _words(part or "")
+            for i, word in enumerate(words):
+                key = 'w:' + word
+                features[key] = features.get(key, 0.0) + weight
+                if i:
+                    key = f"b:{words[i - 1]} {word}"
+                    features[key] = features.get(key, 0.0) + weight * BIGRAM_WEIGHT
+                if len(word) >= NGRAM_MIN_WORD:
+                    padded = f"<{word}>"
+                    for j in range(len(padded) - 2):
+                        key = 'c:' + padded[j:j + 3]
+                        features[key] = features.get(key, 0.0) + weight * NGRAM_WEIGHT
+    return features
+
+
+def listing_fields(row):
+    """(value, weight) pairs of a raw internship row."""
+    return [(row.get(field), weight) for field, weight in LISTING_FIELDS.items()]
+
+
+def profile_fields(preferences=None, resume=None):
+    """(value, weight) pairs of a user: Preferences (to_dict()) and a raw ResumeAnalysis row."""
+    preferences = preferences or {}
+    resume = resume or {}
+    return [
+        (resume.get('raw_text'), RESUME_TEXT_WEIGHT),
+        (resume.get('skills_extracted') or [], SKILL_WEIGHT),
+        (preferences.get('skills') or [], SKILL_WEIGHT),
+        (preferences.get('interests') or [], INTEREST_WEIGHT),
+    ]
+
+
+def hashed_block(feature_maps, dim):
+    """
+    (len(feature_maps), dim) float32 term-frequency rows: sublinear weights
+    (log1p) summed into signed hash buckets, before IDF and normalization.
+    """
+    cells, values = [], []
+    for row, features in enumerate(feature_maps):
+        for feature, weight in features.items():
+            h = _hash(feature)
+            cells.append(row * dim + h % dim)
+            values.append(math.log1p(weight) if h >> 63 else -math.log1p(weight))
+    block = np.bincount(np.asarray(cells, np.int64), weights=np.asarray(values, np.float64),
+                        minlength=len(feature_maps) * dim)
+    return block.astype(np.float32).reshape(len(feature_maps), dim)
+
+
+def _normalize(block):
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return block / norms
+
+
+class SemanticIndex:
+    """
+    Local similarity search between user profiles and internships, with no
+    embedding service: texts become TF-IDF weighted, hashed feature vectors
+    (words, word pairs, character trigrams; see text_features) and similarity
+    is their cosine.
+
+    The internship matrix (one L2-normalized float32 row per listing) lives in a
+    file under directory that every worker maps read-only with np.memmap, so
+    gunicorn workers share one copy through the page cache and a query is a
+    single matrix-vector product over the mapped rows. meta.json records the
+    database, generation, row count and capacity; writers serialize on an
+    flock of .lock. New listings are vectorized with the stored IDF and
+    appended in place (create_internship calls add(), and each query pulls the
+    listings inserted since the highest _id indexed, within the catch-up window
+    of services.catch_up, like InternshipIndex); the file grows with spare
+    capacity so other workers' mappings stay valid. A full rebuild writes a
+    new generation, picked up on the workers' next query, and happens when no
+    usable matrix exists, it was built from another database or does not
+    account for every listing (checked once per process), or the catalog has
+    grown by REBUILD_GROWTH since the IDF weights were computed. The previous
+    generation's files are kept for workers still switching over and removed
+    by the build after.
+    """
+
+    def __init__(self, directory=SEMANTIC_INDEX_DIR, dim=SEMANTIC_DIM, sync=True):
+        self.directory = directory
+        self.dim = dim
+        self.sync = sync
+        self._lock = threading.RLock()
+        self._meta = None
+        self._meta_stat = None
+        self._matrix = None
+        self._ids = None
+        self._idf = None
+        self._rows = 0
+        self._sorted_keys = np.zeros(0, 'S12')
+        self._sorted_rows = np.zeros(0, np.int64)
+        self._recent = {}  # id bytes -> row, for rows appended since the sorted id index was built
+        self._verified = False  # the row count has been checked against the catalog
+
+    def __len__(self):
+        return self._rows
+
+    # --- Files ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _files(self, generation):
+        return (self._path(f"matrix-{generation}.f32"), self._path(f"ids-{generation}.bin"),
+                self._path(f"idf-{generation}.npy"))
+
+    @contextmanager
+    def _file_lock(self):
+        """Excludes other processes writing the index (and other threads, through self._lock)."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._path('.lock'), 'a') as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_meta(self, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path('meta.json'))
+
+    def _refresh(self):
+        """Maps the current generation and picks up rows other workers appended; False if there is none."""
+        try:
+            stat = os.stat(self._path('meta.json'))
+        except FileNotFoundError:
+            return False
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._meta_stat:
+            return True
+        with open(self._path('meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION or meta.get('dim') != self.dim:
+            return False
+
+        same_generation = self._meta is not None and meta['generation'] == self._meta['generation']
+        if not same_generation or meta['capacity'] != self._meta['capacity']:
+            matrix_path, ids_path, idf_path = self._files(meta['generation'])
+            self._matrix = np.memmap(matrix_path, np.float32, 'r', shape=(meta['capacity'], self.dim))
+            self._ids = np.memmap(ids_path, 'S12', 'r', shape=(meta['capacity'],))
+            if not same_generation:
+                self._idf = np.load(idf_path)
+                self._rows = 0
+                self._recent = {}
+                self._sorted_keys, self._sorted_rows = np.zeros(0, 'S12'), np.zeros(0, np.int64)
+
+        for row in range(self._rows, meta['rows']):
+            self._recent[bytes(self._ids[row])] = row
+        self._rows = meta['rows']
+        if len(self._recent) > BUILD_CHUNK:
+            keys = np.asarray(self._ids[:self._rows])
+            self._sorted_rows = np.argsort(keys, kind='stable')
+            self._sorted_keys = keys[self._sorted_rows]
+            self._recent = {}
+        self._meta, self._meta_stat = meta, key
+        return True
+
+    def _find(self, internship_id):
+        """Row of a listing, or None."""
+        # 'S12' values drop trailing zero bytes, so keys are compared in that form
+        key = ObjectId(internship_id).binary.rstrip(b"\0")
+        if key in self._recent:
+            return self._recent[key]
+        position = np.searchsorted(self._sorted_keys, key)
+        if position < len(self._sorted_keys) and self._sorted_keys[position] == key:
+            return int(self._sorted_rows[position])
+        return None
+
+    # --- Writing (under _file_lock) ---
+
+    def _prune(self, generation):
+        """Removes the files of generations older than the one before generation."""
+        for name in os.listdir(self.directory):
+            kind, _, rest = name.partition('-')
+            number = rest.split('.', 1)[0]
+            if kind in ('matrix', 'ids', 'idf') and number.isdigit() and int(number) < generation - 1:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def build(self, rows, database=None):
+        """
+        Vectorizes raw internship rows (read from database) into a new generation,
+        computing the IDF weights from them.
+        """
+        started = time.monotonic()
+        self._refresh()
+        generation = (self._meta['generation'] + 1) if self._meta else 1
+        matrix_path, ids_path, idf_path = self._files(generation)
+        df = np.zeros(self.dim, np.int64)
+        n, last_id, chunk = 0, None, []
+
+        with open(matrix_path, 'wb') as matrix_file, open(ids_path, 'wb') as ids_file:
+            def flush():
+                block = hashed_block([text_features(listing_fields(row)) for row in chunk], self.dim)
+                df[:] += np.count_nonzero(block, axis=0)
+                matrix_file.write(block.tobytes())
+                ids_file.write(b"".join(ObjectId(row['_id']).binary for row in chunk))
+
+            for row in rows:
+                chunk.append(row)
+                n += 1
+                if last_id is None or row['_id'] > last_id:
+                    last_id = row['_id']
+                if len(chunk) == BUILD_CHUNK:
+                    flush()
+                    chunk = []
+            if chunk:
+                flush()
+            capacity = n + max(GROW_MIN_ROWS, n // 4)
+            matrix_file.truncate(capacity * self.dim * 4)
+            ids_file.truncate(capacity * 12)
+
+        # Second pass over the file: apply the IDF weights and normalize each row
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        np.save(idf_path, idf)
+        matrix = np.memmap(matrix_path, np.float32, 'r+', shape=(capacity, self.dim))
+        for start in range(0, n, BUILD_CHUNK):
+            matrix[start:start + BUILD_CHUNK] = _normalize(matrix[start:start + BUILD_CHUNK] * idf)
+        matrix.flush()
+        del matrix
+
+        self._write_meta({
+            'version': FORMAT_VERSION, 'dim': self.dim, 'database': database, 'generation': generation,
+            'rows': n, 'capacity': capacity, 'idf_rows': n, 'last_id': str(last_id) if last_id else None,
+        })
+        self._refresh()
+        # Another worker may have read the previous generation from meta.json and not mapped it yet
+        self._prune(generation)
+        logger.info(f"Semantic index built with {n} listings in {time.monotonic() - started:.2f}s.")
+
+    def _append(self, rows):
+        """Appends listings not indexed yet, weighted with the current IDF."""
+        self._refresh()
+        new, seen = [], set()
+        for row in rows:
+            if row['_id'] not in seen and self._find(row['_id']) is None:
+                seen.add(row['_id'])
+                new.append(row)
+        if not new:
+            return
+        meta = dict(self._meta)
+        matrix_path, ids_path, _ = self._files(meta['generation'])
+        start, end = meta['rows'], meta['rows'] + len(new)
+        if end > meta['capacity']:
+            meta['capacity'] = max(end + GROW_MIN_ROWS, meta['capacity'] * 2)
+            os.truncate(matrix_path, meta['capacity'] * self.dim * 4)
+            os.truncate(ids_path, meta['capacity'] * 12)
+
+        block = _normalize(hashed_block([text_features(listing_fields(row)) for row in new], self.dim) * self._idf)
+        with open(matrix_path, 'r+b') as f:
+            f.seek(start * self.dim * 4)
+            f.write(block.astype(np.float32).tobytes())
+        with open(ids_path, 'r+b') as f:
+            f.seek(start * 12)
+            f.write(b"".join(ObjectId(row['_id']).binary for row in new))
+
+        last_id = max(row['_id'] for row in new)
+        if meta['last_id'] is None or last_id > ObjectId(meta['last_id']):
+            meta['last_id'] = str(last_id)
+        meta['rows'] = end
+        self._write_meta(meta)
+        self._refresh()
+
+    def add(self, internship):
+        """Indexes a single Internship document (called right after it is saved)."""
+        with self._lock:
+            if self._meta is None:
+                return
+            with self._file_lock():
+                self._append([{'_id': internship.id, 'title': internship.title, 'company': internship.company,
+                               'location': internship.location, 'skills_required': internship.skills_required}])
+
+    def _catalog(self):
+        from models import Internship
+
+        return Internship.objects.only('id', *LISTING_FIELDS).order_by('id').as_pymongo()
+
+    def rebuild(self):
+        """Rebuilds the matrix from the whole catalog."""
+        from mongoengine.connection import get_db
+
+        with self._file_lock():
+            self.build(self._catalog(), database=get_db().name)
+
+    def _needs_build(self, database):
+        """True if the mapped matrix was built from another database or its IDF weights are outdated."""
+        return (self._meta.get('database') != database
+                or self._meta['rows'] > REBUILD_GROWTH * max(self._meta['idf_rows'], GROW_MIN_ROWS))
+
+    def _sync(self):
+        """Maps the shared matrix (building it when missing or stale), then appends listings inserted since."""
+        with self._lock:
+            ready = self._refresh()
+            if not self.sync:
+                return
+            from mongoengine.connection import get_db
+            from models import Internship
+
+            database = get_db().name
+            if not ready or self._needs_build(database):
+                with self._file_lock():
+                    # Another worker may have built it while this one waited for the lock
+                    if not self._refresh() or self._needs_build(database):
+                        self.build(self._catalog(), database=database)
+                        self._verified = True
+
+            query = Internship.objects.only('id', *LISTING_FIELDS)
+            if self._meta['last_id']:
+                query = query.filter(__raw__=catch_up_filter(self._meta['last_id']))
+            rows = [row for row in query.order_by('id').as_pymongo() if self._find(row['_id']) is None]
+            if rows:
+                with self._file_lock():
+                    self._append(rows)
+
+            if not self._verified:
+                # A matrix left by an earlier catalog of this database (e.g. reseeded) misses
+                # listings or holds gone ones: either way the counts differ once caught up
+                self._verified = True
+                if self._rows != Internship.objects.count():
+                    logger.warning(f"Semantic index in {self.directory} does not match the catalog; rebuilding.")
+                    with self._file_lock():
+                        self.build(self._catalog(), database=database)
+
+    # --- Querying ---
+
+    def vectorize(self, fields):
+        """L2-normalized query vector of (value, weight) pairs, weighted with the index's IDF."""
+        return _normalize(hashed_block([text_features(fields)], self.dim) * self._idf)[0]
+
+    def top_k(self, fields, k=10, exclude=()):
+        """
+        The k listings most similar to fields (see profile_fields) as
+        [(ObjectId, cosine)], best first; listings in exclude and those sharing
+        no feature with the query are left out.
+        """
+        self._sync()
+        with self._lock:
+            if self._matrix is None or not self._rows:
+                return []
+            matrix, ids, rows = self._matrix, self._ids, self._rows
+            query = self.vectorize(fields)
+            excluded = [r for r in (self._find(i) for i in exclude) if r is not None]
+
+        scores = matrix[:rows] @ query
+        scores[excluded] = -np.inf
+        k = min(k, rows)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(ObjectId(bytes(ids[r]).ljust(12, b"\0")), round(float(scores[r]), 4)) for r in top if scores[r] > 0]
+
+
+# Process-wide index; the matrix itself is shared by every worker through the mapped file
+semantic_index = SemanticIndex()
@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from models import FlightLease
+from services.metrics import record_flight
+
+# Also coalesce across gunicorn workers through the flight_leases collection
+SINGLEFLIGHT_MONGO_LEASE = os.getenv('SINGLEFLIGHT_MONGO_LEASE', '0').lower() in ('1', 'true', 'yes')
+# Longest a worker may hold a lease before another one takes over (covers GEMINI_TIMEOUT)
+SINGLEFLIGHT_LEASE_SECONDS = float(os.getenv('SINGLEFLIGHT_LEASE_SECONDS', 45))
+# How long a finished result stays readable for requests that were waiting on it
+SINGLEFLIGHT_RESULT_SECONDS = float(os.getenv('SINGLEFLIGHT_RESULT_SECONDS', 10))
+SINGLEFLIGHT_POLL_SECONDS = 0.05
+
+
+class SingleFlight:
+    """
+    Request coalescing for expensive idempotent calls (Gemini) keyed on the
+    normalized request.
+
+    Within a process, callers asking for a key that is already in flight share
+    the running call's outcome instead of starting their own (do() blocks,
+    submit() returns the shared Future). With mongo_lease, the process running
+    a key first takes a lease in flight_leases; a worker finding the lease held
+    polls it and returns the owner's stored result, and takes over if the owner
+    fails or its lease expires. Results must then be BSON-serializable dicts.
+    Lease errors are logged and the call simply runs locally.
+    """
+
+    def __init__(self, name, mongo_lease=SINGLEFLIGHT_MONGO_LEASE, lease_seconds=SINGLEFLIGHT_LEASE_SECONDS,
+                 result_seconds=SINGLEFLIGHT_RESULT_SECONDS):
+        self.name = name
+        self.mongo_lease = mongo_lease
+        self.lease = timedelta(seconds=lease_seconds)
+        self.result_ttl = timedelta(seconds=result_seconds)
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> Future of the in-process call
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote = 0
+
+    def _count(self, counter, role):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        record_flight(self.name, role)
+
+    def _join(self, key):
+        """Returns (future, leader): the key's in-flight Future, registering a new one if there is none."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is None:
+                future = self._flights[key] = Future()
+                return future, True
+        self._count('coalesced', 'coalesced')
+        return future, False
+
+    def _run(self, key, future, fn):
+        try:
+            result = self._run_leased(key, fn) if self.mongo_lease else self._run_local(fn)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _run_local(self, fn):
+        self._count('leaders', 'upstream')
+        return fn()
+
+    def do(self, key, fn):
+        """Runs fn() for key unless an identical call is already in flight here, and returns its result."""
+        if key is None:
+            return fn()
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    def submit(self, key, executor, fn):
+        """Like do(), but schedules the leader's fn on executor; every caller gets the same Future."""
+        if key is None:
+            return executor.submit(fn)
+        future, leader = self._join(key)
+        if leader:
+            try:
+                executor.submit(self._run, key, future, fn)
+            except BaseException as e:
+                with self._lock:
+                    self._flights.pop(key, None)
+                future.set_exception(e)
+        return future
+
+    # --- Cross-worker lease ---
+
+    def _acquire(self, key, owner):
+        """True if this call now holds the lease for key; otherwise the lease document held by someone else."""
+        now = datetime.utcnow()
+        collection = FlightLease._get_collection()
+        lease = {'owner': owner, 'status': 'running', 'result': {}, 'expires_at': now + self.lease}
+        try:
+            collection.insert_one({'_id': key, **lease})
+            return True
+        except DuplicateKeyError:
+            pass
+        # Take over a lease whose owner failed, or died and let it expire
+        taken = collection.find_one_and_update(
+            {'_id': key, '$or': [{'status': 'failed'}, {'status': 'running', 'expires_at': {'$lt': now}},
+                                 {'status': 'done', 'expires_at': {'$lt': now}}]},
+            {'$set': lease},
+            return_document=ReturnDocument.AFTER
+        )
+        if taken is not None:
+            return True
+        return collection.find_one({'_id': key}) or {}
+
+    def _run_leased(self, key, fn):
+        flight_key = f"{self.name}:{key}"
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lease.total_seconds()
+        try:
+            while True:
+                held = self._acquire(flight_key, owner)
+                if held is True:
+                    break
+                if held.get('status') == 'done':
+                    self._count('remote', 'other_worker')
+                    return held.get('result')
+                if time.monotonic() > deadline:
+                    break  # the owner is stuck; run unleased rather than wait forever
+                time.sleep(SINGLEFLIGHT_POLL_SECONDS)
+        except Exception as e:
+            logging.warning(f"Single-flight lease for {flight_key} unavailable, running locally: {e}")
+            return self._run_local(fn)
+
+        collection = FlightLease._get_collection()
+        try:
+            result = self._run_local(fn)
+        except BaseException:
+            self._release(collection, flight_key, owner, {'status': 'failed'})
+            raise
+        self._release(collection, flight_key, owner,
+                      {'status': 'done', 'result': result, 'expires_at': datetime.utcnow() + self.result_ttl})
+        return result
+
+    def _release(self, collection, flight_key, owner, update):
+        try:
+            collection.update_one({'_id': flight_key, 'owner': owner}, {'$set': update})
+        except Exception as e:
+            logging.warning(f"Could not release single-flight lease {flight_key}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "upstream_calls": self.leaders,
+                "coalesced": self.coalesced,
+                "served_by_other_workers": self.remote,
+            }
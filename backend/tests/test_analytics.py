@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from models import AnalyticsRollup, Internship
+from services import analytics
+
+
+def _insert_listing(internship_id, skills):
+    Internship._get_collection().insert_one({
+        '_id': internship_id, 'title': 'Intern', 'company': 'Acme', 'location': 'Remote',
+        'skills_required': skills, 'posted_date': datetime.utcnow()
+    })
+
+
+def test_late_insert_below_the_newest_id_is_counted(app):
+    old = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(hours=1))
+    _insert_listing(old, ['Python'])
+    newest = ObjectId()
+    _insert_listing(newest, ['SQL'])
+    assert analytics.refresh_rollup().total_listings == 2
+
+    # Another worker's insert from the same second, with a smaller id than the newest one seen
+    _insert_listing(ObjectId(newest.binary[:4] + b'\0' * 8), ['Python'])
+    rollup = analytics.refresh_rollup()
+    assert rollup.total_listings == 3
+    assert rollup.skill_counts[0] == {"skill": "Python", "count": 2}
+
+    # Refreshing again does not count the unsettled tail twice
+    assert analytics.refresh_rollup().total_listings == 3
+    assert analytics.refresh_rollup(full=True).total_listings == 3
+
+
+def test_first_request_without_the_lease_computes_inline(app):
+    _insert_listing(ObjectId(), ['Python'])
+    # Another worker holds the lease and has not stored anything yet
+    AnalyticsRollup(key=analytics.ROLLUP_KEY, refreshing_until=datetime.utcnow() + timedelta(minutes=5)).save()
+
+    rollup = analytics.get_rollup()
+    assert rollup.total_listings == 1
+    assert rollup.computed_at is not None
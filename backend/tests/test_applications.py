@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/applications/apply', '/api/applications/save', '/api/applications/dismiss'])
+@pytest.mark.parametrize('body', ['[{"userId": "x", "internshipId": "y"}]', '"apply"', 'null'])
+def test_non_object_body_gets_the_json_error(client, path, body):
+    response = client.post(path, data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json['message'] == "Missing required fields: userId and internshipId."
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.endpoint_benchmark import seed_dataset
+
+
+@pytest.mark.parametrize('body', ['[{"userId": "x"}]', '"updates"', '42', '{"updates": ', 'null'])
+def test_malformed_body_gets_the_json_error(client, body):
+    response = client.post('/api/internships/preferences/bulk', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json['field'] == 'updates'
+
+
+def test_bulk_update_applies_valid_rows(client):
+    user_id = seed_dataset(1, 1, seed=3)[0]
+    response = client.post('/api/internships/preferences/bulk', json={'updates': [
+        {'userId': user_id, 'skills': ['Rust']},
+        {'userId': 'not-an-id', 'skills': ['Go']},
+    ]})
+    assert response.status_code == 200
+    assert [r['status'] for r in response.json['results']] == ['success', 'error']
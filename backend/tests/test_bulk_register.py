@@ -0,0 +1,49 @@
+import pytest
+from pymongo.errors import BulkWriteError
+
+from controllers import user_controller
+from models import Preferences, User
+
+
+def _fast_hashes(monkeypatch):
+    monkeypatch.setattr(user_controller, 'hash_passwords', lambda passwords: [f"hash:{p}" for p in passwords])
+
+
+def test_users_get_default_preferences(app, monkeypatch):
+    _fast_hashes(monkeypatch)
+    results, summary = user_controller.register_users_bulk([
+        {'name': 'A', 'email': 'a@x.com', 'password': 'pw'},
+        {'name': 'B', 'email': 'a@x.com', 'password': 'pw'},
+    ])
+    assert [r['status'] for r in results] == ['success', 'error']
+    assert summary['created'] == 1
+    assert Preferences.objects.count() == 1
+
+
+def test_preferences_insert_failure_is_reported_per_row(app, monkeypatch):
+    _fast_hashes(monkeypatch)
+    collection = Preferences._get_collection()
+    original = collection.insert_many
+
+    def insert_many(documents, ordered=True):
+        original(documents[:1] + documents[2:], ordered=ordered)
+        raise BulkWriteError({'writeErrors': [{'index': 1, 'code': 121, 'errmsg': 'validation failed'}]})
+
+    monkeypatch.setattr(collection, 'insert_many', insert_many)
+    results, summary = user_controller.register_users_bulk([
+        {'name': n, 'email': f"{n}@x.com", 'password': 'pw'} for n in ('a', 'b', 'c')
+    ])
+
+    assert [r['status'] for r in results] == ['success', 'error', 'success']
+    assert 'preferences' in results[1]['message']
+    assert summary['created'] == 2
+    # The user left without Preferences was removed, so the row can simply be retried
+    assert sorted(u.email for u in User.objects) == ['a@x.com', 'c@x.com']
+
+
+@pytest.mark.parametrize('body', ['[{"name": "A", "email": "a@x.com", "password": "secret1"}]', '"users"', 'null'])
+def test_non_object_body_gets_the_json_error(client, body):
+    response = client.post('/api/users/register/bulk', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'users must be' in response.json['message']
+    assert User.objects.count() == 0
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', ['[{"userId": "x", "resumeText": "Python"}]', '"items"', '{"items": ', 'null'])
+def test_non_object_body_gets_the_json_error(client, body):
+    response = client.post('/api/resume/analyze/bulk', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json['status'] == 'error'
+    assert 'items' in response.json['message']
@@ -0,0 +1,56 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Job
+from services.jobs import JobQueueFull, JobRunner
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_exclusive_job_runs_once_across_workers(app):
+    release = threading.Event()
+    # Two runners stand for the same runner in two gunicorn workers
+    first, second = (JobRunner('exclusive-test', lambda payload: release.wait(5) and {"ok": True},
+                               max_workers=1, max_pending=1, exclusive=True) for _ in range(2))
+
+    job = first.submit({})
+    with pytest.raises(JobQueueFull):
+        second.submit({})
+
+    release.set()
+    _wait_for(lambda: Job.objects(id=job.id).first().status == 'done')
+    assert Job.objects(id=job.id).first().exclusive_key is None
+    assert second.submit({}).status == 'queued'
+
+
+def test_holder_whose_worker_died_is_released(app):
+    dead = Job(kind='exclusive-test', status='running', attempts=2, exclusive_key='exclusive-test',
+               locked_until=datetime.utcnow() - timedelta(minutes=1)).save()
+    runner = JobRunner('exclusive-test', lambda payload: {}, max_attempts=2, exclusive=True)
+
+    job = runner.submit({})
+    assert job.id != dead.id
+    assert Job.objects(id=dead.id).first().status == 'failed'
+
+
+def test_allocation_run_conflicts_with_another_workers_run(client):
+    Job(kind='allocation', status='running', attempts=1, exclusive_key='allocation',
+        locked_until=datetime.utcnow() + timedelta(hours=1)).save()
+
+    response = client.post('/api/allocation/run', json={})
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('body', [[{'candidates': 5}], 'run', 3])
+def test_allocation_run_rejects_a_non_object_body(client, body):
+    response = client.post('/api/allocation/run', json=body)
+    assert response.status_code == 400
+    assert Job.objects(kind='allocation').count() == 0
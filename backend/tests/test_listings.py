@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/internships/?fields=title,salary', '/api/internships/search?q=python&fields=salary'])
+def test_unknown_projection_fields_are_rejected(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert response.json['message'] == "Unknown fields: salary."
+    assert response.json['allowed_fields'][0] == 'id'
@@ -0,0 +1,22 @@
+from benchmarks.endpoint_benchmark import seed_dataset
+from models import Internship
+from services.precompute import get_fresh, precompute_chunk
+from services.recommendation_cache import bump_catalog_version, catalog_version, recommendation_cache
+
+
+def test_row_is_stale_once_the_catalog_changes(app):
+    user_id = seed_dataset(1, 5, seed=3)[0]
+    precompute_chunk([user_id])
+    inputs = recommendation_cache.user_inputs(user_id)
+
+    assert get_fresh(user_id, inputs, catalog_version()) is not None
+    bump_catalog_version()
+    assert get_fresh(user_id, inputs, catalog_version()) is None
+
+
+def test_listings_without_seats_are_ranked_like_the_live_path(app):
+    user_id = seed_dataset(1, 5, seed=3)[0]
+    Internship._get_collection().update_many({}, {'$set': {'capacity': 0}})
+
+    row = precompute_chunk([user_id])[0]
+    assert len(row['candidates']) == 5
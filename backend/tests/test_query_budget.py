@@ -0,0 +1,47 @@
+import pytest
+
+from benchmarks.endpoint_benchmark import seed_dataset
+
+# Catalog sizes every endpoint is exercised at: the command count must not grow with them
+SIZES = [(3, 20), (20, 300)]
+
+
+@pytest.mark.parametrize('n_users,n_internships', SIZES)
+def test_listing_is_one_query(client, query_budget, n_users, n_internships):
+    seed_dataset(n_users, n_internships, seed=7)
+
+    with query_budget(1):
+        response = client.get('/api/internships/')
+    assert response.status_code == 200
+    assert response.json['count'] == n_internships
+
+    with query_budget(1):
+        response = client.get('/api/internships/?limit=10')
+    assert response.status_code == 200
+    assert len(response.json['internships']) == 10
+
+
+@pytest.mark.parametrize('n_users,n_internships', SIZES)
+def test_filtered_listing_fetches_matches_in_one_batch(client, query_budget, n_users, n_internships):
+    seed_dataset(n_users, n_internships, seed=7)
+    client.get('/api/internships/?skills=Python')  # loads the in-process index
+
+    with query_budget(2) as stats:
+        response = client.get('/api/internships/?skills=Python,SQL&location=Remote')
+    assert response.status_code == 200
+    assert all(n == 1 for n in stats.shapes.values()), stats.shapes
+
+
+@pytest.mark.parametrize('n_users,n_internships', SIZES)
+def test_recommend_query_budget(client, query_budget, fake_gemini, n_users, n_internships):
+    user_id = seed_dataset(n_users, n_internships, seed=7)[0]
+
+    with query_budget(10) as stats:
+        response = client.post('/api/allocation/recommend', json={'userId': user_id})
+    assert response.status_code == 200
+    assert not response.json.get('degraded')
+    assert stats.repeated(threshold=2) == {}
+
+    with query_budget(5):
+        response = client.post('/api/allocation/recommend', json={'userId': user_id})
+    assert response.json['cached'] is True
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from bson import ObjectId
+from mongoengine.connection import get_db
+
+from models import Internship
+from services.search_index import SearchIndex
+
+
+def _insert_listing(internship_id, title):
+    Internship._get_collection().insert_one({
+        '_id': internship_id, 'title': title, 'company': 'Acme', 'location': 'Remote',
+        'skills_required': ['Python'], 'posted_date': datetime.utcnow()
+    })
+
+
+def _ids(index, query):
+    return [internship_id for internship_id, _ in index.search(query)[1]]
+
+
+def test_late_insert_below_the_newest_id_is_indexed(app, tmp_path):
+    index = SearchIndex(path=str(tmp_path / 'index.npz'))
+    newest = ObjectId()
+    _insert_listing(newest, 'Quantum Intern')
+    assert _ids(index, 'quantum') == [newest]
+
+    # Another worker's insert from the same second, with a smaller id than the newest one seen
+    late = ObjectId(newest.binary[:4] + b'\0' * 8)
+    _insert_listing(late, 'Quantum Analyst')
+    assert sorted(_ids(index, 'quantum')) == sorted([newest, late])
+    assert len(index) == 2
+
+
+def test_saved_index_of_an_earlier_catalog_is_rebuilt(app, tmp_path):
+    path = str(tmp_path / 'index.npz')
+    _insert_listing(ObjectId(), 'Quantum Intern')
+    first = SearchIndex(path=path)
+    assert len(_ids(first, 'quantum')) == 1
+
+    # The database is reseeded: the saved file no longer describes it
+    Internship._get_collection().delete_many({})
+    replacement = ObjectId()
+    _insert_listing(replacement, 'Botany Intern')
+
+    second = SearchIndex(path=path)
+    assert _ids(second, 'quantum') == []
+    assert _ids(second, 'botany') == [replacement]
+    assert len(second) == 1
+
+
+def test_saved_index_of_another_database_is_not_loaded(app, tmp_path):
+    path = str(tmp_path / 'index.npz')
+    _insert_listing(ObjectId(), 'Quantum Intern')
+    SearchIndex(path=path).search('quantum')
+
+    assert SearchIndex(path=path, sync=False).load(database='another_db') is False
+    assert SearchIndex(path=path, sync=False).load(database=get_db().name) is True
@@ -0,0 +1,36 @@
+from mongoengine.connection import get_db
+
+import seed
+from models import Application, Internship, Preferences, User
+
+
+def _content(docs):
+    return [{k: v for k, v in doc.items() if k not in ('_id', 'link', 'email', 'posted_date', 'updated_at')}
+            for doc in docs]
+
+
+def test_appended_chunks_differ_from_the_base_chunks(app, monkeypatch):
+    monkeypatch.setattr(seed, '_connect_worker_db', lambda mongo_uri, db_name: get_db())
+
+    # A base run's first chunk, then the first chunk of an --append run over it (offset 20)
+    seed._generate_internship_chunk(None, None, 42, 0, 20)
+    seed._generate_internship_chunk(None, None, 42, 20, 20)
+    rows = list(Internship._get_collection().find().sort('_id', 1))
+    assert _content(rows[:20]) != _content(rows[20:])
+
+    seed._generate_user_chunk(None, None, 42, 0, 20, 'hash')
+    seed._generate_user_chunk(None, None, 42, 20, 20, 'hash')
+    users = list(User._get_collection().find().sort('_id', 1))
+    preferences = list(Preferences._get_collection().find().sort('_id', 1))
+    assert [u['name'] for u in users[:20]] != [u['name'] for u in users[20:]]
+    assert _content(preferences[:20]) != _content(preferences[20:])
+
+
+def test_reseeding_drops_documents_pointing_at_the_old_data(app):
+    user = User(name='Old', email='old@internx.com', password='x').save()
+    internship = Internship(title='Old', company='Acme', location='Remote', link='https://old').save()
+    Application(user=user, internship=internship, status='applied').save()
+
+    seed._drop_seeded_data()
+    assert Application.objects.count() == 0
+    assert User.objects.count() == 0
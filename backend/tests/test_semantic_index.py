@@ -0,0 +1,70 @@
+import json
+import os
+from datetime import datetime
+
+from bson import ObjectId
+
+from models import Internship
+from services.semantic_index import SemanticIndex
+
+
+def _insert_listing(internship_id, title):
+    Internship._get_collection().insert_one({
+        '_id': internship_id, 'title': title, 'company': 'Acme', 'location': 'Remote',
+        'skills_required': ['Python'], 'posted_date': datetime.utcnow()
+    })
+
+
+def _ids(index, text):
+    return [internship_id for internship_id, _ in index.top_k([(text, 1.0)])]
+
+
+def test_late_insert_below_the_newest_id_is_indexed(app, tmp_path):
+    index = SemanticIndex(directory=str(tmp_path / 'semantic'))
+    newest = ObjectId()
+    _insert_listing(newest, 'Quantum Intern')
+    assert _ids(index, 'quantum') == [newest]
+
+    # Another worker's insert from the same second, with a smaller id than the newest one seen
+    late = ObjectId(newest.binary[:4] + b'\0' * 8)
+    _insert_listing(late, 'Quantum Analyst')
+    assert sorted(_ids(index, 'quantum')) == sorted([newest, late])
+    assert len(index) == 2
+
+
+def test_matrix_of_an_earlier_catalog_is_rebuilt(app, tmp_path):
+    directory = str(tmp_path / 'semantic')
+    _insert_listing(ObjectId(), 'Quantum Intern')
+    assert len(_ids(SemanticIndex(directory=directory), 'quantum')) == 1
+
+    # The database is emptied: a new worker must not serve the old catalog
+    Internship._get_collection().delete_many({})
+    assert _ids(SemanticIndex(directory=directory), 'quantum') == []
+
+
+def test_matrix_of_another_database_is_rebuilt(app, tmp_path):
+    directory = str(tmp_path / 'semantic')
+    _insert_listing(ObjectId(), 'Quantum Intern')
+    SemanticIndex(directory=directory).top_k([('quantum', 1.0)])
+
+    meta_path = os.path.join(directory, 'meta.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta['database'] = 'another_db'
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    index = SemanticIndex(directory=directory)
+    assert len(_ids(index, 'quantum')) == 1
+    assert index._meta['generation'] == meta['generation'] + 1
+
+
+def test_rebuild_keeps_the_previous_generation(app, tmp_path):
+    directory = str(tmp_path / 'semantic')
+    _insert_listing(ObjectId(), 'Quantum Intern')
+    index = SemanticIndex(directory=directory)
+    for _ in range(3):
+        index.rebuild()
+
+    generations = {name.split('-')[1].split('.')[0] for name in os.listdir(directory) if name.startswith('matrix-')}
+    assert generations == {'2', '3'}
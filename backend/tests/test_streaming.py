@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from benchmarks.endpoint_benchmark import seed_dataset
+from services.json_stream import JsonArrayStreamParser
+
+DOCUMENT = json.dumps({
+    "recommendations": [
+        {"internshipId": "1", "matchScore": 91.5, "reasoning": 'Uses "Flask" {daily} [and] C:\\tools\\n',
+         "preparationMaterials": ["Review {braces}", "Quote \" and \\ escapes"]},
+        {"internshipId": "2", "matchScore": 74, "reasoning": "Nested {\"a\": [1, 2]} text",
+         "preparationMaterials": []},
+    ],
+    "note": "[{not an item}]",
+})
+EXPECTED = json.loads(DOCUMENT)['recommendations']
+
+
+def _events(response):
+    """(event, data) pairs of a text/event-stream response body."""
+    events = []
+    for frame in response.get_data(as_text=True).split('\n\n'):
+        if not frame:
+            continue
+        fields = dict(line.split(': ', 1) for line in frame.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def _feed_all(chunks):
+    parser = JsonArrayStreamParser('recommendations')
+    items = [item for chunk in chunks for item in parser.feed(chunk)]
+    return parser, items
+
+
+@pytest.mark.parametrize('marker,offset', [
+    ('Flask', 2),           # inside a string
+    ('\\\\tools', 1),       # between a backslash and the character it escapes
+    ('\\"', 1),             # inside an escaped quote
+    ('"matchScore": 74', 0),  # inside the second element
+    ('"note"', 0),          # after the array, inside the outer object
+])
+def test_parser_handles_a_split_anywhere(marker, offset):
+    split = DOCUMENT.index(marker) + offset
+    parser, items = _feed_all([DOCUMENT[:split], DOCUMENT[split:]])
+    assert items == EXPECTED
+    assert parser.done
+    assert parser.result() == json.loads(DOCUMENT)
+
+
+def test_parser_returns_each_element_once_it_closes():
+    parser = JsonArrayStreamParser('recommendations')
+    second = DOCUMENT.index('"internshipId": "2"')
+    assert parser.feed(DOCUMENT[:second]) == EXPECTED[:1]
+    assert parser.feed(DOCUMENT[second:]) == EXPECTED[1:]
+
+
+def test_parser_every_split_and_single_characters():
+    for split in range(len(DOCUMENT) + 1):
+        assert _feed_all([DOCUMENT[:split], DOCUMENT[split:]])[1] == EXPECTED, split
+    assert _feed_all(DOCUMENT)[1] == EXPECTED
+
+
+def test_stream_sends_meta_then_each_recommendation_then_done(client, fake_gemini):
+    fake_gemini.stream_chunk_chars = 7
+    user_id = seed_dataset(1, 5, seed=11)[0]
+
+    response = client.post('/api/allocation/recommend/stream', json={'userId': user_id})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = _events(response)
+    names = [name for name, _ in events]
+    done = events[-1][1]
+    assert names == ['meta'] + ['recommendation'] * len(done['recommendations']) + ['done']
+    assert done['recommendations']
+    assert events[0][1]['cached'] is False
+    assert [data['matchScore'] for name, data in events if name == 'recommendation'] == [
+        r['matchScore'] for r in done['recommendations']
+    ]
+
+    # The finished result is cached and replayed in the same order
+    events = _events(client.post('/api/allocation/recommend/stream', json={'userId': user_id}))
+    assert [name for name, _ in events] == names
+    assert events[0][1] == {"cached": True}
+
+
+def test_cut_off_stream_ends_with_an_error_and_is_not_cached(client, fake_gemini):
+    fake_gemini.stream_chunk_chars = 7
+    fake_gemini.cut_after_chunks = 3
+    user_id = seed_dataset(1, 5, seed=11)[0]
+
+    events = _events(client.post('/api/allocation/recommend/stream', json={'userId': user_id}))
+    names = [name for name, _ in events]
+    assert names[0] == 'meta' and names[-1] == 'error'
+    assert 'done' not in names
+    assert events[-1][1] == {"message": "Failed to parse AI response."}
+
+    fake_gemini.cut_after_chunks = None
+    events = _events(client.post('/api/allocation/recommend/stream', json={'userId': user_id}))
+    assert events[0][1]['cached'] is False
+    assert events[-1][0] == 'done'